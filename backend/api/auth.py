@@ -3,24 +3,64 @@
 Authentication API endpoints for Planet Code Forge
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, field_validator
+from typing import Optional, Tuple
+from dataclasses import dataclass
 import jwt
-from datetime import datetime, timedelta
+from jwt.algorithms import get_default_algorithms
+from jwt.utils import base64url_decode, base64url_encode
+import orjson
+import binascii
+import hashlib
+import hmac
+import time
+from datetime import datetime
+from cachetools import TTLCache
 from passlib.context import CryptContext
 from web3 import Web3
-from eth_account import Account
+from eth_utils import keccak
+from coincurve import PublicKey
 import httpx
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from loguru import logger
 
-from models.database import User, SessionLocal
+from sqlalchemy import select, bindparam
+from sqlalchemy.orm import Session
+
+from models.database import User, Planet, get_db
 from config import config
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hot lookups built once so SQLAlchemy's compiled cache is hit on every request
+_ACTIVE_USER_BY_ID_STMT = select(User).where(User.id == bindparam("user_id"), User.is_active == True)
+_USER_BY_WALLET_STMT = select(User).where(User.wallet_address == bindparam("wallet_address"))
+_USER_BY_EMAIL_STMT = select(User).where(User.email == bindparam("email"))
+_ACTIVE_USER_WITH_PLANET_STMT = (
+    select(User, Planet)
+    .outerjoin(Planet, Planet.user_id == User.id)
+    .where(User.id == bindparam("user_id"), User.is_active == True)
+    .limit(1)
+)
+
+WALLET_MESSAGE_TEMPLATE = (
+    "Sign this message to authenticate with Planet Code Forge.\n\n"
+    "Wallet: %s\n"
+    "Timestamp: %d\n\n"
+    "This request will not trigger a blockchain transaction or cost any gas fees."
+)
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=config.BCRYPT_ROUNDS,
+    bcrypt__ident="2b"
+)
 
 # Pydantic models
 class UserLogin(BaseModel):
@@ -31,9 +71,15 @@ class WalletLogin(BaseModel):
     wallet_address: str
     signature: str
     message: str
+    
+    @field_validator("wallet_address")
+    @classmethod
+    def normalize_wallet_address(cls, v: str) -> str:
+        return v.lower()
 
 class GoogleLogin(BaseModel):
-    google_token: str
+    google_token: Optional[str] = None  # OAuth access token (verified remotely)
+    id_token: Optional[str] = None  # Google ID token (verified locally against cached JWKS)
 
 class UserResponse(BaseModel):
     id: str
@@ -48,73 +94,234 @@ class TokenResponse(BaseModel):
     token_type: str
     user: UserResponse
 
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Shared outbound HTTP client created in the app lifespan"""
+    return request.app.state.http_client
+
+# JWT signing context, resolved once instead of on every encode/decode
+_jwt_algorithm = get_default_algorithms()[config.JWT_ALGORITHM]
+_jwt_signing_key = _jwt_algorithm.prepare_key(config.jwt_signing_key)
+_jwt_verification_key = _jwt_algorithm.prepare_key(config.jwt_verification_key)
+_jwt_header_segment = base64url_encode(orjson.dumps({"alg": config.JWT_ALGORITHM, "typ": "JWT"}))
+
+if config.JWT_ALGORITHM.startswith("HS"):
+    # One-shot OpenSSL HMAC; skips building a Python hmac object per token
+    _jwt_digest_name = _jwt_algorithm.hash_alg().name
+    
+    def _jwt_sign(signing_input: bytes) -> bytes:
+        return hmac.digest(_jwt_signing_key, signing_input, _jwt_digest_name)
+    
+    def _jwt_verify(signing_input: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(hmac.digest(_jwt_verification_key, signing_input, _jwt_digest_name), signature)
+else:
+    def _jwt_sign(signing_input: bytes) -> bytes:
+        return _jwt_algorithm.sign(signing_input, _jwt_signing_key)
+    
+    def _jwt_verify(signing_input: bytes, signature: bytes) -> bool:
+        return _jwt_algorithm.verify(signing_input, _jwt_verification_key, signature)
+
 # JWT functions
 def create_access_token(user_id: str) -> str:
     """Create JWT access token"""
-    expire = datetime.utcnow() + timedelta(seconds=config.JWT_EXPIRATION)
+    now = int(time.time())
     to_encode = {
         "sub": user_id,
-        "exp": expire,
-        "iat": datetime.utcnow(),
+        "exp": now + config.JWT_EXPIRATION,
+        "iat": now,
         "type": "access"
     }
-    return jwt.encode(to_encode, config.JWT_SECRET, algorithm=config.JWT_ALGORITHM)
+    signing_input = _jwt_header_segment + b"." + base64url_encode(orjson.dumps(to_encode))
+    signature = _jwt_sign(signing_input)
+    return (signing_input + b"." + base64url_encode(signature)).decode()
 
-def verify_token(token: str) -> str:
-    """Verify JWT token and return user_id"""
+def _decode_token(token: str) -> dict:
+    """Verify signature and expiry with the cached signing context"""
+    try:
+        signing_input, crypto_segment = token.encode().rsplit(b".", 1)
+        header_segment, payload_segment = signing_input.split(b".", 1)
+        signature = base64url_decode(crypto_segment)
+    except (ValueError, binascii.Error):
+        raise jwt.DecodeError("Malformed token")
+    
+    # Only tokens minted by create_access_token are accepted
+    if header_segment != _jwt_header_segment:
+        raise jwt.InvalidAlgorithmError("Unexpected token header")
+    if not _jwt_verify(signing_input, signature):
+        raise jwt.InvalidSignatureError("Signature verification failed")
+    
     try:
-        payload = jwt.decode(token, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
+        payload = orjson.loads(base64url_decode(payload_segment))
+    except (ValueError, binascii.Error):
+        raise jwt.DecodeError("Invalid payload")
+    
+    exp = payload.get("exp")
+    if not isinstance(exp, int) or exp < time.time():
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    return payload
+
+def verify_token_claims(token: str) -> dict:
+    """Verify JWT token and return its claims"""
+    try:
+        payload = _decode_token(token)
+        if payload.get("sub") is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token"
             )
-        return user_id
+        return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired"
         )
-    except jwt.JWTError:
+    except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+def verify_token(token: str) -> str:
+    """Verify JWT token and return user_id"""
+    return verify_token_claims(token)["sub"]
+
+@dataclass(frozen=True, slots=True)
+class AuthenticatedUser:
+    """Column snapshot of a User, safe to share across requests once its session is closed"""
+    id: object
+    email: Optional[str]
+    wallet_address: Optional[str]
+    username: Optional[str]
+    avatar_url: Optional[str]
+    created_at: Optional[datetime]
+    is_active: bool
+
+def _snapshot(user: User) -> AuthenticatedUser:
+    return AuthenticatedUser(
+        id=user.id,
+        email=user.email,
+        wallet_address=user.wallet_address,
+        username=user.username,
+        avatar_url=user.avatar_url,
+        created_at=user.created_at,
+        is_active=user.is_active
+    )
+
+# Authenticated user snapshots keyed by token digest -> (user, exp)
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+# Revoked token digests live in Redis so a logout applies on every worker
+_redis = Redis.from_url(config.redis_url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _revoked_key(token_key: bytes) -> str:
+    return f"auth:revoked:{token_key.hex()}"
+
+async def _check_not_revoked(token_key: bytes):
+    try:
+        revoked = await _redis.exists(_revoked_key(token_key))
+    except RedisError as e:
+        # Fail closed: a logged-out token must not pass while revocation can't be checked
+        logger.error(f"Token revocation check unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication temporarily unavailable"
+        )
+    if revoked:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked"
+        )
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> AuthenticatedUser:
     """Get current user from JWT token"""
-    user_id = verify_token(credentials.credentials)
+    token_key = _token_key(credentials.credentials)
+    await _check_not_revoked(token_key)
     
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.id == user_id, User.is_active == True).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found"
-            )
-        return user
-    finally:
-        db.close()
+    cached = _user_cache.get(token_key)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+    
+    claims = verify_token_claims(credentials.credentials)
+    
+    user = db.execute(_ACTIVE_USER_BY_ID_STMT, {"user_id": claims["sub"]}).scalar_one_or_none()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    snapshot = _snapshot(user)
+    _user_cache[token_key] = (snapshot, claims["exp"])
+    return snapshot
+
+async def get_current_user_with_planet(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Tuple[User, Optional[Planet]]:
+    """Authenticate and load the user's planet in the same round trip"""
+    token_key = _token_key(credentials.credentials)
+    await _check_not_revoked(token_key)
+    
+    claims = verify_token_claims(credentials.credentials)
+    
+    row = db.execute(_ACTIVE_USER_WITH_PLANET_STMT, {"user_id": claims["sub"]}).first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    user, planet = row
+    _user_cache[token_key] = (_snapshot(user), claims["exp"])
+    return user, planet
+
+async def hash_password(password: str) -> str:
+    """Hash a password off the event loop (bcrypt is CPU-bound)"""
+    return await asyncio.to_thread(pwd_context.hash, password)
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """Verify a password off the event loop so a KDF run doesn't stall other requests"""
+    return await asyncio.to_thread(pwd_context.verify, password, hashed_password)
+
+_EIP191_PREFIX = b"\x19Ethereum Signed Message:\n"
+
+def recover_wallet_address(message: str, signature: str) -> str:
+    """Recover the lowercase address that signed an EIP-191 personal message.
+
+    Hashes the prefixed message once and recovers the public key through
+    libsecp256k1 directly, skipping eth_account's SignableMessage envelope.
+    """
+    sig = bytes.fromhex(signature[2:] if signature.startswith("0x") else signature)
+    if len(sig) != 65:
+        raise ValueError("Signature must be 65 bytes")
+    
+    # personal_sign produces v in {27, 28}; libsecp256k1 expects a recovery id in {0, 1}
+    recovery_id = sig[64] - 27 if sig[64] >= 27 else sig[64]
+    
+    message_bytes = message.encode()
+    digest = keccak(_EIP191_PREFIX + str(len(message_bytes)).encode() + message_bytes)
+    public_key = PublicKey.from_signature_and_message(
+        sig[:64] + bytes([recovery_id]), digest, hasher=None
+    )
+    return "0x" + keccak(public_key.format(compressed=False)[1:])[-20:].hex()
 
 # Authentication endpoints
 
 @router.post("/wallet-login", response_model=TokenResponse)
-async def wallet_login(login_data: WalletLogin):
+async def wallet_login(login_data: WalletLogin, db: Session = Depends(get_db)):
     """Web3 wallet authentication"""
     
     try:
         # Verify wallet signature
         message = login_data.message
         signature = login_data.signature
-        wallet_address = login_data.wallet_address.lower()
+        wallet_address = login_data.wallet_address
         
-        # Verify the signature using web3
-        recovered_address = Account.recover_message(
-            text=message,
-            signature=signature
-        ).lower()
+        # Verify the signature (EIP-191 personal_sign)
+        recovered_address = recover_wallet_address(message, signature)
         
         if recovered_address != wallet_address:
             raise HTTPException(
@@ -123,41 +330,35 @@ async def wallet_login(login_data: WalletLogin):
             )
         
         # Check if user exists or create new one
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.wallet_address == wallet_address).first()
-            
-            if not user:
-                # Create new user
-                username = f"planet_{wallet_address[:8]}"
-                user = User(
-                    wallet_address=wallet_address,
-                    username=username
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-                
-                logger.info(f"🎆 New user created via wallet: {wallet_address}")
-            
-            # Generate access token
-            access_token = create_access_token(str(user.id))
-            
-            return TokenResponse(
-                access_token=access_token,
-                token_type="bearer",
-                user=UserResponse(
-                    id=str(user.id),
-                    username=user.username,
-                    email=user.email,
-                    wallet_address=user.wallet_address,
-                    avatar_url=user.avatar_url,
-                    created_at=user.created_at
-                )
+        user = db.execute(_USER_BY_WALLET_STMT, {"wallet_address": wallet_address}).scalar_one_or_none()
+        
+        if not user:
+            # Create new user
+            username = f"planet_{wallet_address[:8]}"
+            user = User(
+                wallet_address=wallet_address,
+                username=username
             )
+            db.add(user)
+            db.commit()
             
-        finally:
-            db.close()
+            logger.info(f"🎆 New user created via wallet: {wallet_address}")
+        
+        # Generate access token
+        access_token = create_access_token(str(user.id))
+        
+        return TokenResponse(
+            access_token=access_token,
+            token_type="bearer",
+            user=UserResponse(
+                id=str(user.id),
+                username=user.username,
+                email=user.email,
+                wallet_address=user.wallet_address,
+                avatar_url=user.avatar_url,
+                created_at=user.created_at
+            )
+        )
             
     except Exception as e:
         logger.error(f"Wallet login error: {e}")
@@ -166,37 +367,86 @@ async def wallet_login(login_data: WalletLogin):
             detail="Wallet authentication failed"
         )
 
+_GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+_GOOGLE_ISSUERS = {"accounts.google.com", "https://accounts.google.com"}
+_google_signing_keys: TTLCache = TTLCache(maxsize=1, ttl=3600)
+
+async def _get_google_signing_key(client: httpx.AsyncClient, kid: Optional[str]):
+    """Return Google's prepared public key for kid, refreshing the JWKS on a miss"""
+    keys = _google_signing_keys.get("keys")
+    if keys is None or kid not in keys:
+        response = await client.get(_GOOGLE_CERTS_URL)
+        response.raise_for_status()
+        keys = {jwk.key_id: jwk.key for jwk in jwt.PyJWKSet.from_dict(response.json()).keys}
+        _google_signing_keys["keys"] = keys
+    
+    if kid not in keys:
+        raise jwt.InvalidKeyError("Unknown Google signing key")
+    return keys[kid]
+
+async def verify_google_id_token(client: httpx.AsyncClient, id_token: str) -> dict:
+    """Verify a Google ID token and return its claims"""
+    kid = jwt.get_unverified_header(id_token).get("kid")
+    key = await _get_google_signing_key(client, kid)
+    claims = jwt.decode(id_token, key, algorithms=["RS256"], audience=config.GOOGLE_CLIENT_ID)
+    
+    if claims.get("iss") not in _GOOGLE_ISSUERS:
+        raise jwt.InvalidIssuerError("Invalid issuer")
+    if not claims.get("email_verified"):
+        raise jwt.InvalidTokenError("Google email not verified")
+    return claims
+
+async def _fetch_google_user_info(client: httpx.AsyncClient, access_token: str) -> dict:
+    """Validate an OAuth access token and fetch the user's profile from Google"""
+    # Verify Google token and fetch user info concurrently (same access token)
+    response, user_response = await asyncio.gather(
+        client.get(
+            f"https://www.googleapis.com/oauth2/v1/tokeninfo?access_token={access_token}"
+        ),
+        client.get(
+            f"https://www.googleapis.com/oauth2/v2/userinfo?access_token={access_token}"
+        )
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid Google token"
+        )
+    
+    if user_response.status_code != 200:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Failed to get Google user info"
+        )
+    
+    return user_response.json()
+
 @router.post("/google-login", response_model=TokenResponse)
-async def google_login(login_data: GoogleLogin):
+async def google_login(
+    login_data: GoogleLogin,
+    client: httpx.AsyncClient = Depends(get_http_client),
+    db: Session = Depends(get_db)
+):
     """Google OAuth authentication"""
     
     try:
-        # Verify Google token
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://www.googleapis.com/oauth2/v1/tokeninfo?access_token={login_data.google_token}"
-            )
-            
-            if response.status_code != 200:
+        if login_data.id_token:
+            # Verify the ID token signature locally; no round trip once the JWKS is cached
+            try:
+                user_info = await verify_google_id_token(client, login_data.id_token)
+            except jwt.PyJWTError:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid Google token"
                 )
-            
-            google_data = response.json()
-            
-            # Get user info from Google
-            user_response = await client.get(
-                f"https://www.googleapis.com/oauth2/v2/userinfo?access_token={login_data.google_token}"
+        elif login_data.google_token:
+            user_info = await _fetch_google_user_info(client, login_data.google_token)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Google token required"
             )
-            
-            if user_response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Failed to get Google user info"
-                )
-            
-            user_info = user_response.json()
         
         email = user_info.get('email')
         if not email:
@@ -206,42 +456,36 @@ async def google_login(login_data: GoogleLogin):
             )
         
         # Check if user exists or create new one
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.email == email).first()
-            
-            if not user:
-                # Create new user
-                username = user_info.get('name', f"user_{email.split('@')[0]}")
-                user = User(
-                    email=email,
-                    username=username,
-                    avatar_url=user_info.get('picture')
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-                
-                logger.info(f"🎆 New user created via Google: {email}")
-            
-            # Generate access token
-            access_token = create_access_token(str(user.id))
-            
-            return TokenResponse(
-                access_token=access_token,
-                token_type="bearer",
-                user=UserResponse(
-                    id=str(user.id),
-                    username=user.username,
-                    email=user.email,
-                    wallet_address=user.wallet_address,
-                    avatar_url=user.avatar_url,
-                    created_at=user.created_at
-                )
+        user = db.execute(_USER_BY_EMAIL_STMT, {"email": email}).scalar_one_or_none()
+        
+        if not user:
+            # Create new user
+            username = user_info.get('name', f"user_{email.split('@')[0]}")
+            user = User(
+                email=email,
+                username=username,
+                avatar_url=user_info.get('picture')
             )
+            db.add(user)
+            db.commit()
             
-        finally:
-            db.close()
+            logger.info(f"🎆 New user created via Google: {email}")
+        
+        # Generate access token
+        access_token = create_access_token(str(user.id))
+        
+        return TokenResponse(
+            access_token=access_token,
+            token_type="bearer",
+            user=UserResponse(
+                id=str(user.id),
+                username=user.username,
+                email=user.email,
+                wallet_address=user.wallet_address,
+                avatar_url=user.avatar_url,
+                created_at=user.created_at
+            )
+        )
             
     except HTTPException:
         raise
@@ -253,7 +497,7 @@ async def google_login(login_data: GoogleLogin):
         )
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: AuthenticatedUser = Depends(get_current_user)):
     """Get current user information"""
     
     return UserResponse(
@@ -266,8 +510,18 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     )
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user)):
-    """User logout (token invalidation would be handled by client)"""
+async def logout(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """User logout - revokes the presented token"""
+    
+    token_key = _token_key(credentials.credentials)
+    # Kept only until the token would have expired anyway
+    ttl = int(verify_token_claims(credentials.credentials)["exp"] - time.time())
+    if ttl > 0:
+        await _redis.setex(_revoked_key(token_key), ttl, "1")
+    _user_cache.pop(token_key, None)
     
     return {
         "message": "Logged out successfully",
@@ -278,8 +532,8 @@ async def logout(current_user: User = Depends(get_current_user)):
 async def get_wallet_message(wallet_address: str):
     """Get message for wallet signature"""
     
-    timestamp = int(datetime.utcnow().timestamp())
-    message = f"Sign this message to authenticate with Planet Code Forge.\n\nWallet: {wallet_address}\nTimestamp: {timestamp}\n\nThis request will not trigger a blockchain transaction or cost any gas fees."
+    timestamp = int(time.time())
+    message = WALLET_MESSAGE_TEMPLATE % (wallet_address, timestamp)
     
     return {
         "message": message,
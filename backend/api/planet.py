@@ -5,12 +5,16 @@ Planet API endpoints
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from loguru import logger
 
-from models.database import Planet, EvolutionEvent, User, SessionLocal
-from api.auth import get_current_user
+from sqlalchemy import select, bindparam, text
+from sqlalchemy.orm import Session, load_only
+from cachetools import TTLCache
+
+from models.database import Planet, EvolutionEvent, User, get_db
+from api.auth import AuthenticatedUser, get_current_user, get_current_user_with_planet
 from services.planet_builder import PlanetBuilderAPI
 
 router = APIRouter()
@@ -18,6 +22,26 @@ router = APIRouter()
 # Global planet builder instance (injected by main app)
 planet_builder: PlanetBuilderAPI = None
 
+# Hot lookups built once so SQLAlchemy's compiled cache is hit on every request
+_PLANET_BY_USER_STMT = select(Planet).where(Planet.user_id == bindparam("user_id")).limit(1)
+_EVOLUTION_HISTORY_STMT = (
+    select(EvolutionEvent)
+    .where(EvolutionEvent.planet_id == bindparam("planet_id"))
+    .order_by(EvolutionEvent.created_at.desc())
+    .offset(bindparam("offset"))
+    .limit(bindparam("limit"))
+)
+
+# Platform stats don't need per-request freshness
+_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=60)
+
+_PLANET_STATS_STMT = text("""
+    SELECT planet_type, evolution_stage,
+           GROUPING(planet_type), GROUPING(evolution_stage), COUNT(*)
+    FROM planets
+    GROUP BY GROUPING SETS ((planet_type), (evolution_stage), ())
+""")
+
 # Pydantic models
 class PlanetResponse(BaseModel):
     id: str
@@ -43,10 +67,45 @@ class EvolutionEventResponse(BaseModel):
 class PlanetUpdateRequest(BaseModel):
     genome_data: Dict[str, Any]
 
+async def _fetch_planet_response(user_id: str, planet: Optional[Planet]) -> PlanetResponse:
+    """Build the response for a user's planet; callers are responsible for authorization"""
+    try:
+        if not planet:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Planet not found"
+            )
+        
+        planet_data = await planet_builder.get_planet_data(str(planet.id))
+        
+        return PlanetResponse(
+            id=planet_data['id'],
+            name=planet_data['name'],
+            type=planet_data['type'],
+            visual_params=planet_data['visual_params'],
+            atmosphere=planet_data['atmosphere'],
+            terrain=planet_data['terrain'],
+            skills=planet_data['skills'],
+            evolution=planet_data['evolution'],
+            personality=planet_data['personality'],
+            created_at=planet_data['created_at'],
+            updated_at=planet_data['updated_at']
+        )
+            
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get planet for user {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve planet data"
+        )
+
 @router.get("/user/{user_id}", response_model=PlanetResponse)
 async def get_user_planet(
     user_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """Get a user's planet data"""
     
@@ -57,80 +116,40 @@ async def get_user_planet(
             detail="Access denied"
         )
     
-    try:
-        db = SessionLocal()
-        try:
-            planet = db.query(Planet).filter(Planet.user_id == user_id).first()
-            
-            if not planet:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Planet not found"
-                )
-            
-            planet_data = await planet_builder.get_planet_data(str(planet.id))
-            
-            return PlanetResponse(
-                id=planet_data['id'],
-                name=planet_data['name'],
-                type=planet_data['type'],
-                visual_params=planet_data['visual_params'],
-                atmosphere=planet_data['atmosphere'],
-                terrain=planet_data['terrain'],
-                skills=planet_data['skills'],
-                evolution=planet_data['evolution'],
-                personality=planet_data['personality'],
-                created_at=datetime.fromisoformat(planet_data['created_at']),
-                updated_at=datetime.fromisoformat(planet_data['updated_at'])
-            )
-            
-        finally:
-            db.close()
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Failed to get planet for user {user_id}: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve planet data"
-        )
+    planet = db.execute(_PLANET_BY_USER_STMT, {"user_id": user_id}).scalars().first()
+    return await _fetch_planet_response(user_id, planet)
 
 @router.get("/me", response_model=PlanetResponse)
-async def get_my_planet(current_user: User = Depends(get_current_user)):
+async def get_my_planet(
+    user_and_planet: Tuple[User, Optional[Planet]] = Depends(get_current_user_with_planet)
+):
     """Get current user's planet"""
-    return await get_user_planet(str(current_user.id), current_user)
+    current_user, planet = user_and_planet
+    return await _fetch_planet_response(str(current_user.id), planet)
 
 @router.put("/me", response_model=PlanetResponse)
 async def update_my_planet(
     update_data: PlanetUpdateRequest,
-    current_user: User = Depends(get_current_user)
+    user_and_planet: Tuple[User, Optional[Planet]] = Depends(get_current_user_with_planet)
 ):
     """Update current user's planet with new genome data"""
     
+    current_user, planet = user_and_planet
     try:
         user_id = str(current_user.id)
         
-        # Check if planet exists
-        db = SessionLocal()
-        try:
-            planet = db.query(Planet).filter(Planet.user_id == user_id).first()
-            
-            if planet:
-                # Update existing planet
-                planet_id = await planet_builder.update_planet(
-                    str(planet.id), 
-                    update_data.genome_data
-                )
-            else:
-                # Create new planet
-                planet_id = await planet_builder.create_planet(
-                    user_id, 
-                    update_data.genome_data
-                )
-            
-        finally:
-            db.close()
+        if planet:
+            # Update existing planet
+            planet_id = await planet_builder.update_planet(
+                str(planet.id), 
+                update_data.genome_data
+            )
+        else:
+            # Create new planet
+            planet_id = await planet_builder.create_planet(
+                user_id, 
+                update_data.genome_data
+            )
         
         # Return updated planet data
         planet_data = await planet_builder.get_planet_data(planet_id)
@@ -145,8 +164,8 @@ async def update_my_planet(
             skills=planet_data['skills'],
             evolution=planet_data['evolution'],
             personality=planet_data['personality'],
-            created_at=datetime.fromisoformat(planet_data['created_at']),
-            updated_at=datetime.fromisoformat(planet_data['updated_at'])
+            created_at=planet_data['created_at'],
+            updated_at=planet_data['updated_at']
         )
         
     except Exception as e:
@@ -160,46 +179,38 @@ async def update_my_planet(
 async def get_my_evolution_history(
     limit: int = 50,
     offset: int = 0,
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """Get evolution history for current user's planet"""
     
     try:
-        db = SessionLocal()
-        try:
-            # Get user's planet
-            planet = db.query(Planet).filter(Planet.user_id == str(current_user.id)).first()
-            
-            if not planet:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Planet not found"
-                )
-            
-            # Get evolution events
-            events = (
-                db.query(EvolutionEvent)
-                .filter(EvolutionEvent.planet_id == planet.id)
-                .order_by(EvolutionEvent.created_at.desc())
-                .offset(offset)
-                .limit(limit)
-                .all()
+        # Get user's planet
+        planet = db.execute(_PLANET_BY_USER_STMT, {"user_id": str(current_user.id)}).scalars().first()
+        
+        if not planet:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Planet not found"
             )
-            
-            return [
-                EvolutionEventResponse(
-                    id=str(event.id),
-                    event_type=event.event_type,
-                    description=event.description,
-                    points_earned=event.points_earned,
-                    metadata=event.metadata,
-                    created_at=event.created_at
-                )
-                for event in events
-            ]
-            
-        finally:
-            db.close()
+        
+        # Get evolution events
+        events = db.execute(
+            _EVOLUTION_HISTORY_STMT,
+            {"planet_id": planet.id, "limit": limit, "offset": offset}
+        ).scalars().all()
+        
+        return [
+            EvolutionEventResponse.model_construct(
+                id=str(event.id),
+                event_type=event.event_type,
+                description=event.description,
+                points_earned=event.points_earned,
+                metadata=event.metadata,
+                created_at=event.created_at
+            )
+            for event in events
+        ]
             
     except HTTPException:
         raise
@@ -214,51 +225,48 @@ async def get_my_evolution_history(
 async def get_planet_gallery(
     limit: int = 20,
     offset: int = 0,
-    planet_type: Optional[str] = None
+    planet_type: Optional[str] = None,
+    db: Session = Depends(get_db)
 ):
     """Get public planet gallery (anonymized)"""
     
     try:
-        db = SessionLocal()
-        try:
-            query = db.query(Planet)
-            
-            if planet_type:
-                query = query.filter(Planet.planet_type == planet_type)
-            
-            planets = (
-                query
-                .order_by(Planet.evolution_points.desc())
-                .offset(offset)
-                .limit(limit)
-                .all()
+        # Only the ordering columns are needed here; full rows come from one bulk fetch
+        query = db.query(Planet).options(
+            load_only(Planet.id, Planet.planet_type, Planet.evolution_points)
+        )
+        
+        if planet_type:
+            query = query.filter(Planet.planet_type == planet_type)
+        
+        planet_ids = [
+            str(planet.id)
+            for planet in query
+            .order_by(Planet.evolution_points.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        ]
+        
+        planets_data = await planet_builder.get_planets_bulk(planet_ids)
+        
+        # Data is built from trusted ORM rows, so skip re-validation
+        return [
+            PlanetResponse.model_construct(
+                id=planet_data['id'],
+                name=planet_data['name'],
+                type=planet_data['type'],
+                visual_params=planet_data['visual_params'],
+                atmosphere=planet_data['atmosphere'],
+                terrain=planet_data['terrain'],
+                skills=planet_data['skills'],
+                evolution=planet_data['evolution'],
+                personality=planet_data['personality'],
+                created_at=planet_data['created_at'],
+                updated_at=planet_data['updated_at']
             )
-            
-            gallery_planets = []
-            for planet in planets:
-                planet_data = await planet_builder.get_planet_data(str(planet.id))
-                
-                # Remove user-identifying information
-                planet_data.pop('user_id', None)
-                
-                gallery_planets.append(PlanetResponse(
-                    id=planet_data['id'],
-                    name=planet_data['name'],
-                    type=planet_data['type'],
-                    visual_params=planet_data['visual_params'],
-                    atmosphere=planet_data['atmosphere'],
-                    terrain=planet_data['terrain'],
-                    skills=planet_data['skills'],
-                    evolution=planet_data['evolution'],
-                    personality=planet_data['personality'],
-                    created_at=datetime.fromisoformat(planet_data['created_at']),
-                    updated_at=datetime.fromisoformat(planet_data['updated_at'])
-                ))
-            
-            return gallery_planets
-            
-        finally:
-            db.close()
+            for planet_data in (planets_data[planet_id] for planet_id in planet_ids if planet_id in planets_data)
+        ]
             
     except Exception as e:
         logger.error(f"Failed to get planet gallery: {e}")
@@ -268,37 +276,36 @@ async def get_planet_gallery(
         )
 
 @router.get("/stats")
-async def get_planet_stats():
+async def get_planet_stats(db: Session = Depends(get_db)):
     """Get platform-wide planet statistics"""
     
+    cached = _stats_cache.get('stats')
+    if cached is not None:
+        return cached
+    
     try:
-        db = SessionLocal()
-        try:
-            total_planets = db.query(Planet).count()
-            
-            # Planet type distribution
-            type_stats = (
-                db.query(Planet.planet_type, db.func.count(Planet.id))
-                .group_by(Planet.planet_type)
-                .all()
-            )
-            
-            # Evolution stage distribution
-            stage_stats = (
-                db.query(Planet.evolution_stage, db.func.count(Planet.id))
-                .group_by(Planet.evolution_stage)
-                .all()
-            )
-            
-            return {
-                'total_planets': total_planets,
-                'planet_types': dict(type_stats),
-                'evolution_stages': dict(stage_stats),
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-        finally:
-            db.close()
+        # One scan answers the total and both distributions
+        rows = db.execute(_PLANET_STATS_STMT).all()
+        
+        total_planets = 0
+        type_stats: Dict[str, int] = {}
+        stage_stats: Dict[str, int] = {}
+        for planet_type, evolution_stage, type_grouped, stage_grouped, count in rows:
+            if type_grouped and stage_grouped:
+                total_planets = count
+            elif stage_grouped:
+                type_stats[planet_type] = count
+            else:
+                stage_stats[evolution_stage] = count
+        
+        stats = {
+            'total_planets': total_planets,
+            'planet_types': type_stats,
+            'evolution_stages': stage_stats,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        _stats_cache['stats'] = stats
+        return stats
             
     except Exception as e:
         logger.error(f"Failed to get planet stats: {e}")
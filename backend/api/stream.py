@@ -5,15 +5,16 @@ Real-time code streaming API endpoints
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends
 from fastapi.security import HTTPBearer
-from typing import Dict, Any
-import json
+from typing import Dict, Any, Optional
+from dataclasses import dataclass
 import asyncio
+import time
+import orjson
 from loguru import logger
 from datetime import datetime
 
 from services.code_stream_ingestor import CodeStreamIngestor
-from api.auth import get_current_user
-from models.database import User
+from api.auth import AuthenticatedUser, get_current_user
 
 router = APIRouter()
 security = HTTPBearer()
@@ -21,40 +22,65 @@ security = HTTPBearer()
 # Global ingestor instance (injected by main app)
 code_ingestor: CodeStreamIngestor = None
 
+# Analysis payloads may carry numpy scalars/arrays from the ML pipeline
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+async def send_json(websocket: WebSocket, message: dict):
+    """Serialize with orjson and send as a text frame (clients JSON.parse the frame)"""
+    await websocket.send_text(orjson.dumps(message, option=_ORJSON_OPTIONS).decode())
+
+@dataclass(slots=True)
+class Connection:
+    """A user's live socket and their active coding session, if any"""
+    websocket: WebSocket
+    session_id: Optional[str] = None
+
 class ConnectionManager:
     """Manage WebSocket connections for real-time updates"""
     
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.user_sessions: Dict[str, str] = {}  # user_id -> session_id
+        self.connections: Dict[str, Connection] = {}  # user_id -> Connection
     
     async def connect(self, websocket: WebSocket, user_id: str):
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        self.connections[user_id] = Connection(websocket)
         logger.info(f"🔗 WebSocket connected for user {user_id}")
     
-    def disconnect(self, user_id: str):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-        if user_id in self.user_sessions:
-            del self.user_sessions[user_id]
+    def disconnect(self, user_id: str) -> Optional[Connection]:
+        connection = self.connections.pop(user_id, None)
         logger.info(f"🔗 WebSocket disconnected for user {user_id}")
+        return connection
+    
+    def get_session(self, user_id: str) -> Optional[str]:
+        connection = self.connections.get(user_id)
+        return connection.session_id if connection else None
+    
+    def set_session(self, user_id: str, session_id: Optional[str]):
+        connection = self.connections.get(user_id)
+        if connection:
+            connection.session_id = session_id
     
     async def send_personal_message(self, message: dict, user_id: str):
-        if user_id in self.active_connections:
-            websocket = self.active_connections[user_id]
+        connection = self.connections.get(user_id)
+        if connection:
             try:
-                await websocket.send_text(json.dumps(message))
+                await send_json(connection.websocket, message)
             except Exception as e:
                 logger.error(f"Failed to send message to {user_id}: {e}")
                 self.disconnect(user_id)
     
     async def broadcast_message(self, message: dict):
-        for user_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Failed to broadcast to {user_id}: {e}")
+        # Encode once and fan out concurrently; snapshot the connections so
+        # disconnecting failed sockets doesn't mutate the dict mid-iteration
+        payload = orjson.dumps(message, option=_ORJSON_OPTIONS).decode()
+        connections = list(self.connections.items())
+        results = await asyncio.gather(
+            *(connection.websocket.send_text(payload) for _, connection in connections),
+            return_exceptions=True
+        )
+        for (user_id, _), result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to broadcast to {user_id}: {result}")
                 self.disconnect(user_id)
 
 manager = ConnectionManager()
@@ -68,8 +94,7 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
     try:
         while True:
             # Receive code stream data
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(await websocket.receive_text())
             
             message_type = message.get('type')
             
@@ -83,23 +108,24 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
                 await handle_end_session(user_id, message, websocket)
                 
             elif message_type == 'ping':
-                await websocket.send_text(json.dumps({
+                # Epoch seconds; the client formats it if needed
+                await send_json(websocket, {
                     'type': 'pong',
-                    'timestamp': datetime.utcnow().isoformat()
-                }))
+                    'timestamp': time.time()
+                })
                 
             else:
-                await websocket.send_text(json.dumps({
+                await send_json(websocket, {
                     'type': 'error',
                     'message': f'Unknown message type: {message_type}'
-                }))
+                })
                 
     except WebSocketDisconnect:
-        manager.disconnect(user_id)
+        connection = manager.disconnect(user_id)
         
         # Clean up any active sessions
-        if user_id in manager.user_sessions:
-            session_id = manager.user_sessions[user_id]
+        if connection and connection.session_id:
+            session_id = connection.session_id
             try:
                 await code_ingestor.end_session(session_id)
             except Exception as e:
@@ -117,27 +143,27 @@ async def handle_start_session(user_id: str, message: Dict, websocket: WebSocket
         session_metadata = message.get('metadata', {})
         session_id = await code_ingestor.start_session(user_id, session_metadata)
         
-        manager.user_sessions[user_id] = session_id
+        manager.set_session(user_id, session_id)
         
         response = {
             'type': 'session_started',
             'session_id': session_id,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow()
         }
         
-        await websocket.send_text(json.dumps(response))
+        await send_json(websocket, response)
         
     except Exception as e:
         error_response = {
             'type': 'error',
             'message': f'Failed to start session: {str(e)}'
         }
-        await websocket.send_text(json.dumps(error_response))
+        await send_json(websocket, error_response)
 
 async def handle_code_stream(user_id: str, message: Dict, websocket: WebSocket):
     """Handle real-time code streaming"""
     try:
-        session_id = manager.user_sessions.get(user_id)
+        session_id = manager.get_session(user_id)
         if not session_id:
             raise ValueError("No active session found")
         
@@ -153,52 +179,51 @@ async def handle_code_stream(user_id: str, message: Dict, websocket: WebSocket):
         response = {
             'type': 'analysis_update',
             'analysis': analysis_result,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow()
         }
         
-        await websocket.send_text(json.dumps(response))
+        await send_json(websocket, response)
         
     except Exception as e:
         error_response = {
             'type': 'error', 
             'message': f'Failed to process code stream: {str(e)}'
         }
-        await websocket.send_text(json.dumps(error_response))
+        await send_json(websocket, error_response)
 
 async def handle_end_session(user_id: str, message: Dict, websocket: WebSocket):
     """Handle session end request"""
     try:
-        session_id = manager.user_sessions.get(user_id)
+        session_id = manager.get_session(user_id)
         if not session_id:
             raise ValueError("No active session found")
         
         session_summary = await code_ingestor.end_session(session_id)
         
         # Clean up
-        if user_id in manager.user_sessions:
-            del manager.user_sessions[user_id]
+        manager.set_session(user_id, None)
         
         response = {
             'type': 'session_ended',
             'session_summary': session_summary,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow()
         }
         
-        await websocket.send_text(json.dumps(response))
+        await send_json(websocket, response)
         
     except Exception as e:
         error_response = {
             'type': 'error',
             'message': f'Failed to end session: {str(e)}'
         }
-        await websocket.send_text(json.dumps(error_response))
+        await send_json(websocket, error_response)
 
 # REST API endpoints for code submission (alternative to WebSocket)
 
 @router.post("/submit")
 async def submit_code(
     code_data: Dict[str, Any],
-    current_user: User = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """Submit code for analysis (REST API alternative)"""
     
@@ -230,7 +255,7 @@ async def submit_code(
             'session_id': session_id,
             'analysis': analysis_result,
             'session_summary': session_summary,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcnow()
         }
         
     except Exception as e:
@@ -238,16 +263,16 @@ async def submit_code(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/active-sessions")
-async def get_active_sessions(current_user: User = Depends(get_current_user)):
+async def get_active_sessions(current_user: AuthenticatedUser = Depends(get_current_user)):
     """Get active coding sessions for current user"""
     
     user_id = str(current_user.id)
     
-    active_session = manager.user_sessions.get(user_id)
+    active_session = manager.get_session(user_id)
     
     return {
         'user_id': user_id,
         'active_session': active_session,
-        'connected': user_id in manager.active_connections,
-        'timestamp': datetime.utcnow().isoformat()
+        'connected': user_id in manager.connections,
+        'timestamp': datetime.utcnow()
     }
\ No newline at end of file
@@ -3,20 +3,34 @@
 Authentication API routes for Planet Code Forge with Google & GitHub OAuth
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import RedirectResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional
 import jwt
-from datetime import datetime, timedelta
+from jwt.utils import base64url_encode
+from datetime import datetime
 import asyncio
+import hashlib
+import hmac
+import time
 import httpx
+import uuid
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from loguru import logger
+from urllib.parse import urlencode
+from cachetools import TTLCache
 
 from ..models.database import User
 import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
+if "config" not in sys.modules:
+    # Entry points (main.py, start_server.py, the Docker PYTHONPATH) already put
+    # backend/ on the path; only standalone imports of this module need it added
+    import os
+    sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 from config import load_config
 
 config = load_config()
@@ -25,6 +39,8 @@ auth_router = APIRouter()
 security = HTTPBearer(auto_error=False)
 
 class LoginRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     provider: str  # 'google' or 'github'
     code: Optional[str] = None  # OAuth authorization code
     wallet_address: Optional[str] = None
@@ -55,17 +71,101 @@ class UserProfile(BaseModel):
     created_at: datetime
     planets_count: int = 0
 
-def create_access_token(data: dict) -> str:
-    """Create JWT access token"""
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Shared outbound HTTP client created in the app lifespan"""
+    return request.app.state.http_client
+
+async def get_redis(request: Request) -> Redis:
+    """Shared Redis connection pool created in the app lifespan"""
+    return request.app.state.redis
+
+# Keys are parsed once; for EdDSA/RS* this avoids re-loading the PEM per token
+_jwt_algorithm = jwt.get_algorithm_by_name(config.JWT_ALGORITHM)
+_jwt_signing_key = _jwt_algorithm.prepare_key(config.jwt_signing_key)
+_jwt_verification_key = _jwt_algorithm.prepare_key(config.jwt_verification_key)
+# The header never changes for a given algorithm, so it's encoded once
+_jwt_header_segment = base64url_encode(orjson.dumps({"alg": config.JWT_ALGORITHM, "typ": "JWT"}))
+
+if config.JWT_ALGORITHM.startswith("HS"):
+    _jwt_digest_name = _jwt_algorithm.hash_alg().name
+    
+    def _jwt_sign(signing_input: bytes) -> bytes:
+        return hmac.digest(_jwt_signing_key, signing_input, _jwt_digest_name)
+else:
+    def _jwt_sign(signing_input: bytes) -> bytes:
+        return _jwt_algorithm.sign(signing_input, _jwt_signing_key)
+
+def create_access_token(data: dict, ver: int = 0) -> str:
+    """Create JWT access token stamped with the user's current token version"""
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(seconds=config.JWT_EXPIRATION)
-    to_encode.update({"exp": expire})
+    # Integer epoch seconds is what PyJWT would serialize a datetime to anyway
+    expire = int(time.time()) + config.JWT_EXPIRATION
+    to_encode.update({"exp": expire, "jti": str(uuid.uuid4()), "ver": ver})
     
-    encoded_jwt = jwt.encode(to_encode, config.JWT_SECRET, algorithm=config.JWT_ALGORITHM)
-    return encoded_jwt
+    signing_input = _jwt_header_segment + b"." + base64url_encode(orjson.dumps(to_encode))
+    return (signing_input + b"." + base64url_encode(_jwt_sign(signing_input))).decode()
 
-async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> User:
-    """Get current authenticated user"""
+# Verified token payloads keyed by token digest; exp is re-checked on every hit
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=config.JWT_EXPIRATION)
+
+def _decode_token(token: str) -> dict:
+    """Decode and verify a JWT, reusing the result for repeat requests with the same token"""
+    token_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _token_cache.get(token_key)
+    if payload is not None and payload["exp"] > time.time():
+        return payload
+    
+    payload = jwt.decode(
+        token,
+        _jwt_verification_key,
+        algorithms=[config.JWT_ALGORITHM],
+        options={"require": ["exp"]}
+    )
+    _token_cache[token_key] = payload
+    return payload
+
+def _revoked_key(jti: str) -> str:
+    return f"auth:revoked:{jti}"
+
+def _version_key(user_id: str) -> str:
+    return f"auth:ver:{user_id}"
+
+# user_id -> current token version; bumping the version in Redis invalidates
+# every outstanding token for that user within this TTL
+_token_versions: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+async def _fetch_token_version(redis: Redis, user_id: str) -> int:
+    """Current token version for a user, served from process memory when fresh; raises RedisError"""
+    ver = _token_versions.get(user_id)
+    if ver is None:
+        raw = await redis.get(_version_key(user_id))
+        ver = int(raw) if raw else 0
+        _token_versions[user_id] = ver
+    return ver
+
+async def get_token_version(redis: Redis, user_id: str) -> int:
+    """Token version to stamp on a newly issued token; 0 (the oldest) when Redis is unreachable"""
+    try:
+        return await _fetch_token_version(redis, user_id)
+    except RedisError as e:
+        logger.warning(f"Token version lookup skipped: {e}")
+        return 0
+
+async def revoke_all_tokens(redis: Redis, user_id: str):
+    """Invalidate every token issued to a user so far"""
+    _token_versions[user_id] = await redis.incr(_version_key(user_id))
+
+async def revoke_token(redis: Redis, payload: dict):
+    """Blacklist a token's jti until the token would have expired anyway"""
+    ttl = int(payload["exp"] - time.time())
+    if ttl > 0:
+        await redis.setex(_revoked_key(payload["jti"]), ttl, "1")
+
+async def get_token_payload(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    redis: Redis = Depends(get_redis)
+) -> dict:
+    """Verify the bearer token and check it hasn't been revoked"""
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,9 +174,8 @@ async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] =
         )
     
     try:
-        payload = jwt.decode(credentials.credentials, config.JWT_SECRET, algorithms=[config.JWT_ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        payload = _decode_token(credentials.credentials)
+        if payload.get("sub") is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token",
@@ -89,39 +188,70 @@ async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] =
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    jti = payload.get("jti")
+    try:
+        # Version check is an in-process lookup unless the cached entry expired
+        revoked = payload.get("ver", 0) < await _fetch_token_version(redis, payload["sub"])
+        if not revoked and jti:
+            revoked = await redis.exists(_revoked_key(jti))
+    except RedisError as e:
+        # Fail closed: a revoked token must not pass while revocation can't be checked
+        logger.error(f"Token revocation check unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication temporarily unavailable",
+        )
+    
+    if revoked:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return payload
+
+async def get_current_user(payload: dict = Depends(get_token_payload)) -> User:
+    """Get current authenticated user"""
     # TODO: Fetch user from database
     # For now, return a mock user
-    return User(id=user_id, username=payload.get("username", "demo_user"))
+    return User(id=payload["sub"], username=payload.get("username", "demo_user"))
+
+# Shorthand for the authenticated-user dependency used across the routers
+CurrentUser = Depends(get_current_user)
+
+# OAuth authorization URLs depend only on static config, so build them once
+_GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth?" + urlencode({
+    "client_id": config.GOOGLE_CLIENT_ID,
+    "redirect_uri": f"{config.OAUTH_REDIRECT_URL}/",
+    "scope": "openid email profile",
+    "response_type": "code",
+    "state": "google"
+})
+
+_GITHUB_AUTH_URL = "https://github.com/login/oauth/authorize?" + urlencode({
+    "client_id": config.GITHUB_CLIENT_ID,
+    "redirect_uri": f"{config.OAUTH_REDIRECT_URL}/",
+    "scope": "user:email",
+    "state": "github"
+})
 
 @auth_router.get("/google/url")
 async def get_google_auth_url():
     """Get Google OAuth authorization URL"""
-    params = {
-        "client_id": config.GOOGLE_CLIENT_ID,
-        "redirect_uri": f"{config.OAUTH_REDIRECT_URL}/",
-        "scope": "openid email profile",
-        "response_type": "code",
-        "state": "google"
-    }
-    
-    auth_url = "https://accounts.google.com/o/oauth2/v2/auth?" + "&".join([f"{k}={v}" for k, v in params.items()])
-    return {"auth_url": auth_url}
+    return {"auth_url": _GOOGLE_AUTH_URL}
 
 @auth_router.get("/github/url")
 async def get_github_auth_url():
     """Get GitHub OAuth authorization URL"""
-    params = {
-        "client_id": config.GITHUB_CLIENT_ID,
-        "redirect_uri": f"{config.OAUTH_REDIRECT_URL}/",
-        "scope": "user:email",
-        "state": "github"
-    }
-    
-    auth_url = "https://github.com/login/oauth/authorize?" + "&".join([f"{k}={v}" for k, v in params.items()])
-    return {"auth_url": auth_url}
+    return {"auth_url": _GITHUB_AUTH_URL}
 
 @auth_router.post("/google/token", response_model=AuthResponse)
-async def google_oauth(request: LoginRequest):
+async def google_oauth(
+    request: LoginRequest,
+    client: httpx.AsyncClient = Depends(get_http_client),
+    redis: Redis = Depends(get_redis)
+):
     """Handle Google OAuth token exchange"""
     try:
         if not request.code:
@@ -131,59 +261,60 @@ async def google_oauth(request: LoginRequest):
             )
         
         # Exchange code for access token
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "client_id": config.GOOGLE_CLIENT_ID,
-                    "client_secret": config.GOOGLE_CLIENT_SECRET,
-                    "code": request.code,
-                    "grant_type": "authorization_code",
-                    "redirect_uri": f"{config.OAUTH_REDIRECT_URL}/"
-                }
-            )
-            
-            if token_response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to exchange code for token: {token_response.text}"
-                )
-            
-            token_data = token_response.json()
-            access_token = token_data.get("access_token")
-            
-            # Get user info
-            user_response = await client.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {access_token}"}
+        token_response = await client.post(
+            "https://oauth2.googleapis.com/token",
+            data={
+                "client_id": config.GOOGLE_CLIENT_ID,
+                "client_secret": config.GOOGLE_CLIENT_SECRET,
+                "code": request.code,
+                "grant_type": "authorization_code",
+                "redirect_uri": f"{config.OAUTH_REDIRECT_URL}/"
+            }
+        )
+        
+        if token_response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Failed to exchange code for token: {token_response.text}"
             )
-            
-            if user_response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to get user info"
-                )
-            
-            user_data = user_response.json()
-            
-            # Create user ID and JWT token
-            user_id = f"google_{user_data['id']}"
-            jwt_token = create_access_token({
-                "sub": user_id,
-                "email": user_data["email"],
-                "username": user_data.get("name", user_data["email"].split("@")[0]),
-                "provider": "google"
-            })
-            
-            return AuthResponse(
-                access_token=jwt_token,
-                user_id=user_id,
-                username=user_data.get("name", user_data["email"].split("@")[0]),
-                email=user_data["email"],
-                avatar_url=user_data.get("picture"),
-                provider="google"
+        
+        token_data = token_response.json()
+        access_token = token_data.get("access_token")
+        
+        # Get user info
+        user_response = await client.get(
+            "https://www.googleapis.com/oauth2/v2/userinfo",
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        
+        if user_response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to get user info"
             )
-            
+        
+        user_data = user_response.json()
+        
+        # Create user ID and JWT token
+        user_id = f"google_{user_data['id']}"
+        jwt_token = create_access_token({
+            "sub": user_id,
+            "email": user_data["email"],
+            "username": user_data.get("name", user_data["email"].split("@")[0]),
+            "provider": "google"
+        }, ver=await get_token_version(redis, user_id))
+        
+        return AuthResponse(
+            access_token=jwt_token,
+            user_id=user_id,
+            username=user_data.get("name", user_data["email"].split("@")[0]),
+            email=user_data["email"],
+            avatar_url=user_data.get("picture"),
+            provider="google"
+        )
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -191,7 +322,11 @@ async def google_oauth(request: LoginRequest):
         )
 
 @auth_router.post("/github/token", response_model=AuthResponse)
-async def github_oauth(request: LoginRequest):
+async def github_oauth(
+    request: LoginRequest,
+    client: httpx.AsyncClient = Depends(get_http_client),
+    redis: Redis = Depends(get_redis)
+):
     """Handle GitHub OAuth token exchange"""
     try:
         if not request.code:
@@ -201,80 +336,77 @@ async def github_oauth(request: LoginRequest):
             )
         
         # Exchange code for access token
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(
-                "https://github.com/login/oauth/access_token",
-                data={
-                    "client_id": config.GITHUB_CLIENT_ID,
-                    "client_secret": config.GITHUB_CLIENT_SECRET,
-                    "code": request.code,
-                },
-                headers={"Accept": "application/json"}
+        token_response = await client.post(
+            "https://github.com/login/oauth/access_token",
+            data={
+                "client_id": config.GITHUB_CLIENT_ID,
+                "client_secret": config.GITHUB_CLIENT_SECRET,
+                "code": request.code,
+            },
+            headers={"Accept": "application/json"}
+        )
+        
+        if token_response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Failed to exchange code for token: {token_response.text}"
             )
-            
-            if token_response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Failed to exchange code for token: {token_response.text}"
-                )
-            
-            token_data = token_response.json()
-            access_token = token_data.get("access_token")
-            
-            if not access_token:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="No access token received from GitHub"
-                )
-            
-            # Get user info
-            user_response = await client.get(
-                "https://api.github.com/user",
-                headers={"Authorization": f"Bearer {access_token}"}
+        
+        token_data = token_response.json()
+        access_token = token_data.get("access_token")
+        
+        if not access_token:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No access token received from GitHub"
             )
-            
-            if user_response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to get user info"
-                )
-            
-            user_data = user_response.json()
-            
-            # Get user email (may be private)
-            email = None
-            try:
-                email_response = await client.get(
-                    "https://api.github.com/user/emails",
-                    headers={"Authorization": f"Bearer {access_token}"}
-                )
-                
-                if email_response.status_code == 200:
-                    emails = email_response.json()
-                    primary_email = next((e for e in emails if e.get("primary")), None)
-                    if primary_email:
-                        email = primary_email["email"]
-            except:
-                pass  # Email is optional
-            
-            # Create user ID and JWT token
-            user_id = f"github_{user_data['id']}"
-            jwt_token = create_access_token({
-                "sub": user_id,
-                "email": email,
-                "username": user_data.get("login"),
-                "provider": "github"
-            })
-            
-            return AuthResponse(
-                access_token=jwt_token,
-                user_id=user_id,
-                username=user_data.get("login"),
-                email=email,
-                avatar_url=user_data.get("avatar_url"),
-                provider="github"
+        
+        # Get user info and emails concurrently (email may be private)
+        headers = {"Authorization": f"Bearer {access_token}"}
+        user_response, email_response = await asyncio.gather(
+            client.get("https://api.github.com/user", headers=headers),
+            client.get("https://api.github.com/user/emails", headers=headers),
+            return_exceptions=True
+        )
+        
+        if isinstance(user_response, Exception):
+            raise user_response
+        
+        if user_response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to get user info"
             )
-            
+        
+        user_data = user_response.json()
+        
+        email = None
+        if not isinstance(email_response, Exception) and email_response.status_code == 200:
+            emails = email_response.json()
+            primary_email = next((e for e in emails if e.get("primary")), None)
+            if primary_email:
+                email = primary_email["email"]
+        
+        # Create user ID and JWT token
+        user_id = f"github_{user_data['id']}"
+        jwt_token = create_access_token({
+            "sub": user_id,
+            "email": email,
+            "username": user_data.get("login"),
+            "provider": "github"
+        }, ver=await get_token_version(redis, user_id))
+        
+        return AuthResponse(
+            access_token=jwt_token,
+            user_id=user_id,
+            username=user_data.get("login"),
+            email=email,
+            avatar_url=user_data.get("avatar_url"),
+            provider="github"
+        )
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -282,21 +414,28 @@ async def github_oauth(request: LoginRequest):
         )
 
 @auth_router.post("/login", response_model=AuthResponse)
-async def login(request: LoginRequest):
+async def login(
+    request: LoginRequest,
+    client: httpx.AsyncClient = Depends(get_http_client),
+    redis: Redis = Depends(get_redis)
+):
     """
     Login with OAuth providers or traditional credentials
     """
     try:
         if request.provider == "google":
-            return await google_oauth(request)
+            return await google_oauth(request, client, redis)
         elif request.provider == "github":
-            return await github_oauth(request)
+            return await github_oauth(request, client, redis)
         
         # Web3 wallet authentication
         elif request.wallet_address and request.signature:
             user_id = f"web3_{request.wallet_address[:10]}"
             
-            access_token = create_access_token(data={"sub": user_id, "wallet": request.wallet_address})
+            access_token = create_access_token(
+                data={"sub": user_id, "wallet": request.wallet_address},
+                ver=await get_token_version(redis, user_id)
+            )
             
             return AuthResponse(
                 access_token=access_token,
@@ -310,7 +449,10 @@ async def login(request: LoginRequest):
         elif request.email and request.password:
             user_id = f"email_{request.email.split('@')[0]}"
             
-            access_token = create_access_token(data={"sub": user_id, "email": request.email})
+            access_token = create_access_token(
+                data={"sub": user_id, "email": request.email},
+                ver=await get_token_version(redis, user_id)
+            )
             
             return AuthResponse(
                 access_token=access_token,
@@ -326,6 +468,8 @@ async def login(request: LoginRequest):
                 detail="Valid provider (google/github), wallet_address with signature, or email with password required"
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -333,7 +477,11 @@ async def login(request: LoginRequest):
         )
 
 @auth_router.post("/register", response_model=AuthResponse)
-async def register(request: LoginRequest):
+async def register(
+    request: LoginRequest,
+    client: httpx.AsyncClient = Depends(get_http_client),
+    redis: Redis = Depends(get_redis)
+):
     """
     Register new user with OAuth or traditional method
     """
@@ -342,8 +490,10 @@ async def register(request: LoginRequest):
         # TODO: Create user in database
         
         # For now, return same as login
-        return await login(request)
+        return await login(request, client, redis)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -351,7 +501,7 @@ async def register(request: LoginRequest):
         )
 
 @auth_router.get("/profile", response_model=UserProfile)
-async def get_profile(current_user: User = Depends(get_current_user)):
+async def get_profile(current_user: User = CurrentUser):
     """
     Get current user profile
     """
@@ -367,14 +517,39 @@ async def get_profile(current_user: User = Depends(get_current_user)):
             planets_count=1  # Mock data
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get profile: {str(e)}"
         )
 
+@auth_router.post("/logout")
+async def logout(
+    payload: dict = Depends(get_token_payload),
+    redis: Redis = Depends(get_redis)
+):
+    """
+    Revoke the current access token
+    """
+    if payload.get("jti"):
+        await revoke_token(redis, payload)
+    return {"message": "Successfully logged out"}
+
+@auth_router.post("/logout-all")
+async def logout_all(
+    payload: dict = Depends(get_token_payload),
+    redis: Redis = Depends(get_redis)
+):
+    """
+    Revoke every token issued to the current user
+    """
+    await revoke_all_tokens(redis, payload["sub"])
+    return {"message": "All sessions logged out"}
+
 @auth_router.get("/verify")
-async def verify_token(current_user: User = Depends(get_current_user)):
+async def verify_token(current_user: User = CurrentUser):
     """
     Verify if token is valid
     """
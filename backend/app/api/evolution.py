@@ -3,12 +3,14 @@
 Evolution tracking API routes for Planet Code Forge
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict
 from datetime import datetime
+import orjson
 
-from ..api.auth import get_current_user
+from ..api.auth import CurrentUser
 from ..models.database import User
 
 evolution_router = APIRouter()
@@ -31,16 +33,11 @@ class Achievement(BaseModel):
     rarity: str
     unlocked_at: datetime
 
-@evolution_router.get("/events/{planet_id}")
-async def get_evolution_events(
-    planet_id: str,
-    current_user: User = Depends(get_current_user)
-):
-    """Get evolution timeline for planet"""
-    
+def _load_evolution_events(planet_id: str) -> List[EvolutionEvent]:
+    """Evolution timeline for a planet, shared by the JSON and NDJSON endpoints"""
     # TODO: Fetch from database
     return [
-        EvolutionEvent(
+        EvolutionEvent.model_construct(
             id="evt_1",
             event_type="skill_level_up",
             description="Algorithm mastery reached level 67",
@@ -51,31 +48,54 @@ async def get_evolution_events(
         )
     ]
 
+@evolution_router.get("/events/{planet_id}")
+async def get_evolution_events(
+    planet_id: str,
+    current_user: User = CurrentUser
+):
+    """Get evolution timeline for planet"""
+    
+    return _load_evolution_events(planet_id)
+
+@evolution_router.get("/events/{planet_id}/stream")
+async def stream_evolution_events(
+    planet_id: str,
+    current_user: User = CurrentUser
+):
+    """Stream evolution timeline for planet as NDJSON, one event per line"""
+    
+    async def generate():
+        for event in _load_evolution_events(planet_id):
+            yield orjson.dumps(event.model_dump()) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @evolution_router.get("/achievements/{planet_id}")
 async def get_planet_achievements(
     planet_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = CurrentUser
 ):
     """Get all achievements for planet"""
     
     # TODO: Fetch from database
+    now = datetime.utcnow()
     return [
-        Achievement(
+        Achievement.model_construct(
             id="perfectionist",
             title="The Perfectionist",
             description="Maintained 95%+ code quality for 10 sessions",
             icon="🎯",
             points=100,
             rarity="epic",
-            unlocked_at=datetime.utcnow()
+            unlocked_at=now
         ),
-        Achievement(
+        Achievement.model_construct(
             id="comment_poet",
             title="Comment Poet",
             description="Wrote beautiful, comprehensive documentation",
             icon="📝",
             points=50,
             rarity="rare",
-            unlocked_at=datetime.utcnow()
+            unlocked_at=now
         )
     ]
\ No newline at end of file
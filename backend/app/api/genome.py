@@ -3,16 +3,69 @@
 Genome analysis API routes for Planet Code Forge
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Dict, List
 from datetime import datetime
+import ahocorasick
+import numpy as np
 
-from ..api.auth import get_current_user
+from ..api.auth import CurrentUser
 from ..models.database import User
 
 genome_router = APIRouter()
 
+# Substring -> pattern category; matched together in one Aho-Corasick scan
+_PATTERN_TOKENS = {
+    'function': 'functions', 'def ': 'functions', '=>': 'functions',
+    'class ': 'classes',
+    '//': 'comments', '#': 'comments', '/*': 'comments',
+    'try': 'error_handling', 'catch': 'error_handling', 'except': 'error_handling',
+    'async': 'async', 'await': 'async', 'Promise': 'async',
+    'for': 'optimization', 'while': 'optimization', 'map': 'optimization',
+}
+_ALL_PATTERNS = frozenset(_PATTERN_TOKENS.values())
+
+_pattern_automaton = ahocorasick.Automaton()
+for _token, _category in _PATTERN_TOKENS.items():
+    _pattern_automaton.add_word(_token, _category)
+_pattern_automaton.make_automaton()
+
+# Complexity bonus for every combination of the six pattern flags, indexed by
+# functions|classes|comments|error_handling|async|optimization (MSB first)
+_BONUS_TABLE = tuple(
+    15 * functions + 20 * classes + 10 * comments + 25 * error_handling + 15 * is_async + 12 * optimization
+    for functions in (0, 1)
+    for classes in (0, 1)
+    for comments in (0, 1)
+    for error_handling in (0, 1)
+    for is_async in (0, 1)
+    for optimization in (0, 1)
+)
+
+def _detect_patterns(code: str) -> set:
+    """Return the pattern categories present in code"""
+    found = set()
+    for _, category in _pattern_automaton.iter(code):
+        found.add(category)
+        if len(found) == len(_ALL_PATTERNS):
+            break
+    return found
+
+def _pattern_index(found: set) -> int:
+    """Pack the pattern flags into the _BONUS_TABLE index"""
+    return (
+        (('functions' in found) << 5) | (('classes' in found) << 4) | (('comments' in found) << 3)
+        | (('error_handling' in found) << 2) | (('async' in found) << 1) | ('optimization' in found)
+    )
+
+def _score_batch(lines: np.ndarray, code_length: np.ndarray, bonus: np.ndarray):
+    """Vectorized evolution points and complexity scores for many snippets at once"""
+    base_points = np.clip(code_length // 10, 1, 50)
+    evolution_points = np.minimum(100, base_points + bonus)
+    complexity_score = np.clip(evolution_points // 10 + lines // 5, 1, 10)
+    return evolution_points, complexity_score
+
 class GenomeAnalysis(BaseModel):
     user_id: str
     coding_dna: Dict[str, float]
@@ -30,33 +83,20 @@ async def analyze_code_genome(request: dict):
     metrics = request.get("metrics", {})
     
     # Real-time code analysis logic
-    lines = len(code.split('\n')) if code else 0
+    lines = code.count('\n') + 1 if code else 0
     code_length = len(code)
     
-    # Pattern detection
-    has_functions = 'function' in code or 'def ' in code or '=>' in code
-    has_classes = 'class ' in code
-    has_comments = '//' in code or '#' in code or '/*' in code
-    has_error_handling = 'try' in code or 'catch' in code or 'except' in code
-    has_async = 'async' in code or 'await' in code or 'Promise' in code
-    has_optimization = 'for' in code or 'while' in code or 'map' in code
+    # Pattern detection (single pass over the code)
+    found = _detect_patterns(code)
+    has_functions = 'functions' in found
+    has_classes = 'classes' in found
+    has_comments = 'comments' in found
+    has_error_handling = 'error_handling' in found
+    has_async = 'async' in found
     
     # Calculate scores
     base_points = min(50, max(1, code_length // 10))
-    complexity_bonus = 0
-    
-    if has_functions:
-        complexity_bonus += 15
-    if has_classes:
-        complexity_bonus += 20
-    if has_comments:
-        complexity_bonus += 10
-    if has_error_handling:
-        complexity_bonus += 25
-    if has_async:
-        complexity_bonus += 15
-    if has_optimization:
-        complexity_bonus += 12
+    complexity_bonus = _BONUS_TABLE[_pattern_index(found)]
     
     evolution_points = min(100, base_points + complexity_bonus)
     complexity_score = min(10, max(1, (evolution_points // 10) + (lines // 5)))
@@ -105,18 +145,48 @@ async def analyze_code_genome(request: dict):
         "suggestions": suggestions,
         "quality": "excellent" if evolution_points > 70 else "good" if evolution_points > 30 else "developing",
         "analysis_source": "planet_forge_api",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
+    }
+
+@genome_router.post("/analyze/batch")
+async def analyze_code_genome_batch(requests: List[dict]):
+    """Score many code snippets in one call (e.g. re-scoring stored sessions)"""
+    
+    codes = [request.get("code", "") for request in requests]
+    
+    # Pattern scan stays per-snippet; the scoring arithmetic runs over whole arrays
+    lines = np.fromiter((code.count('\n') + 1 if code else 0 for code in codes), dtype=np.int64, count=len(codes))
+    code_length = np.fromiter((len(code) for code in codes), dtype=np.int64, count=len(codes))
+    bonus = np.fromiter(
+        (_BONUS_TABLE[_pattern_index(_detect_patterns(code))] for code in codes),
+        dtype=np.int64,
+        count=len(codes)
+    )
+    
+    evolution_points, complexity_score = _score_batch(lines, code_length, bonus)
+    
+    return {
+        "results": [
+            {
+                "evolution_points": int(points),
+                "complexity_score": int(score),
+                "quality": "excellent" if points > 70 else "good" if points > 30 else "developing"
+            }
+            for points, score in zip(evolution_points.tolist(), complexity_score.tolist())
+        ],
+        "analysis_source": "planet_forge_api",
+        "timestamp": datetime.utcnow()
     }
 
 @genome_router.get("/{user_id}")
 async def get_genome_profile(
     user_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = CurrentUser
 ):
     """Get user's coding genome profile"""
     
     # TODO: Fetch from ML analysis results
-    return GenomeAnalysis(
+    return GenomeAnalysis.model_construct(
         user_id=user_id,
         coding_dna={
             "algorithm_affinity": 0.8,
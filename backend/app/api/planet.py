@@ -3,19 +3,27 @@
 Planet API routes for Planet Code Forge
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
+import os
 import json
+import string
+import orjson
+from functools import lru_cache
+from collections import deque
 
 from ..models.database import User, Planet, PlanetType, EvolutionStage
-from ..api.auth import get_current_user
+from ..api.auth import CurrentUser
 
 planet_router = APIRouter()
 
 class PlanetCreate(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     name: str = Field(..., min_length=1, max_length=50)
     planet_type: Optional[PlanetType] = PlanetType.TERRESTRIAL
 
@@ -53,43 +61,84 @@ class PlanetStats(BaseModel):
     recent_achievements: List[Dict[str, Any]]
 
 class SkillUpdate(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
     algorithm_mastery: Optional[float] = None
     web_development_skill: Optional[float] = None
     api_design_discipline: Optional[float] = None
     devops_maturity: Optional[float] = None
     security_awareness: Optional[float] = None
 
+# Random bytes for new ids are read from the OS in batches instead of per call
+_ID_BATCH_SIZE = 256
+_id_pool: deque = deque()
+
+def _new_planet_id() -> str:
+    """Return a fresh UUIDv4 string from the pre-generated pool"""
+    if not _id_pool:
+        raw = os.urandom(16 * _ID_BATCH_SIZE)
+        _id_pool.extend(
+            str(uuid.UUID(bytes=raw[i:i + 16], version=4))
+            for i in range(0, len(raw), 16)
+        )
+    return _id_pool.pop()
+
+# Mock payloads until the database is wired up; handlers overlay the few
+# per-request fields and return them without a model validation pass
+_MOCK_PLANET = {
+    "name": "Algorithmic Nexus",
+    "planet_type": PlanetType.CHAOTIC,
+    "evolution_stage": EvolutionStage.YOUNG_WORLD,
+    "atmosphere": "neon",
+    "terrain": "crystalline_formations",
+    "primary_color": "#6366f1",
+    "secondary_color": "#8b5cf6",
+    "algorithm_mastery": 67.0,
+    "web_development_skill": 45.0,
+    "api_design_discipline": 23.0,
+    "devops_maturity": 12.0,
+    "security_awareness": 8.0,
+    "evolution_points": 348,
+    "total_code_time": 1240,
+    "visual_preview_url": None
+}
+
+_NEW_PLANET = {
+    "evolution_stage": EvolutionStage.PROTOPLANET,
+    "atmosphere": "clear",
+    "terrain": "rocky",
+    "primary_color": "#3b82f6",
+    "secondary_color": "#1d4ed8",
+    "algorithm_mastery": 0.0,
+    "web_development_skill": 0.0,
+    "api_design_discipline": 0.0,
+    "devops_maturity": 0.0,
+    "security_awareness": 0.0,
+    "evolution_points": 0,
+    "total_code_time": 0,
+    "visual_preview_url": None
+}
+
 @planet_router.get("/", response_model=List[PlanetResponse])
-async def get_user_planets(current_user: User = Depends(get_current_user)):
+async def get_user_planets(current_user: User = CurrentUser):
     """
     Get all planets owned by current user
     """
     try:
         # TODO: Fetch from database
         # For now, return mock data
-        mock_planet = PlanetResponse(
-            id=str(uuid.uuid4()),
-            name="Algorithmic Nexus",
-            planet_type=PlanetType.CHAOTIC,
-            evolution_stage=EvolutionStage.YOUNG_WORLD,
-            atmosphere="neon",
-            terrain="crystalline_formations",
-            primary_color="#6366f1",
-            secondary_color="#8b5cf6",
-            algorithm_mastery=67.0,
-            web_development_skill=45.0,
-            api_design_discipline=23.0,
-            devops_maturity=12.0,
-            security_awareness=8.0,
-            evolution_points=348,
-            total_code_time=1240,
-            last_activity=datetime.utcnow(),
-            created_at=datetime.utcnow(),
-            visual_preview_url="/api/v1/planet/visual/preview"
-        )
+        now = datetime.utcnow()
+        mock_planet = _MOCK_PLANET | {
+            "id": _new_planet_id(),
+            "last_activity": now,
+            "created_at": now,
+            "visual_preview_url": "/api/v1/planet/visual/preview"
+        }
         
-        return [mock_planet]
+        return ORJSONResponse([mock_planet])
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -99,7 +148,7 @@ async def get_user_planets(current_user: User = Depends(get_current_user)):
 @planet_router.post("/", response_model=PlanetResponse)
 async def create_planet(
     planet_data: PlanetCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = CurrentUser
 ):
     """
     Create a new planet for the user
@@ -110,28 +159,19 @@ async def create_planet(
         # TODO: Save to database
         
         # For now, return mock created planet
-        new_planet = PlanetResponse(
-            id=str(uuid.uuid4()),
-            name=planet_data.name,
-            planet_type=planet_data.planet_type,
-            evolution_stage=EvolutionStage.PROTOPLANET,
-            atmosphere="clear",
-            terrain="rocky",
-            primary_color="#3b82f6",
-            secondary_color="#1d4ed8",
-            algorithm_mastery=0.0,
-            web_development_skill=0.0,
-            api_design_discipline=0.0,
-            devops_maturity=0.0,
-            security_awareness=0.0,
-            evolution_points=0,
-            total_code_time=0,
-            last_activity=datetime.utcnow(),
-            created_at=datetime.utcnow()
-        )
+        now = datetime.utcnow()
+        new_planet = _NEW_PLANET | {
+            "id": _new_planet_id(),
+            "name": planet_data.name,
+            "planet_type": planet_data.planet_type,
+            "last_activity": now,
+            "created_at": now
+        }
         
-        return new_planet
+        return ORJSONResponse(new_planet)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -141,7 +181,7 @@ async def create_planet(
 @planet_router.get("/{planet_id}", response_model=PlanetResponse)
 async def get_planet(
     planet_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = CurrentUser
 ):
     """
     Get specific planet details
@@ -150,79 +190,99 @@ async def get_planet(
         # TODO: Fetch from database and verify ownership
         
         # Return mock planet data
-        return PlanetResponse(
-            id=planet_id,
-            name="Algorithmic Nexus",
-            planet_type=PlanetType.CHAOTIC,
-            evolution_stage=EvolutionStage.YOUNG_WORLD,
-            atmosphere="neon",
-            terrain="crystalline_formations", 
-            primary_color="#6366f1",
-            secondary_color="#8b5cf6",
-            algorithm_mastery=67.0,
-            web_development_skill=45.0,
-            api_design_discipline=23.0,
-            devops_maturity=12.0,
-            security_awareness=8.0,
-            evolution_points=348,
-            total_code_time=1240,
-            last_activity=datetime.utcnow(),
-            created_at=datetime.utcnow()
-        )
+        now = datetime.utcnow()
+        return ORJSONResponse(_MOCK_PLANET | {
+            "id": planet_id,
+            "last_activity": now,
+            "created_at": now
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch planet: {str(e)}"
         )
 
+def _load_planet_stats(planet_id: str) -> PlanetStats:
+    """Planet statistics, shared by the JSON and NDJSON endpoints"""
+    # TODO: Calculate real stats from database
+    return PlanetStats.model_construct(
+        total_sessions=42,
+        avg_session_duration=28.5,
+        dominant_language="Python",
+        skill_progression={
+            "algorithm_mastery": [0, 15, 35, 52, 67],
+            "web_development_skill": [0, 8, 22, 35, 45],
+            "api_design_discipline": [0, 3, 12, 18, 23]
+        },
+        recent_achievements=[
+            {
+                "id": "perfectionist",
+                "title": "The Perfectionist",
+                "points": 100,
+                "unlocked_at": "2025-11-22T10:30:00Z"
+            },
+            {
+                "id": "comment_poet",
+                "title": "Comment Poet",
+                "points": 50,
+                "unlocked_at": "2025-11-22T09:15:00Z"
+            }
+        ]
+    )
+
 @planet_router.get("/{planet_id}/stats", response_model=PlanetStats)
 async def get_planet_stats(
     planet_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = CurrentUser
 ):
     """
     Get detailed planet statistics and progression
     """
     try:
-        # TODO: Calculate real stats from database
-        
-        return PlanetStats(
-            total_sessions=42,
-            avg_session_duration=28.5,
-            dominant_language="Python",
-            skill_progression={
-                "algorithm_mastery": [0, 15, 35, 52, 67],
-                "web_development_skill": [0, 8, 22, 35, 45],
-                "api_design_discipline": [0, 3, 12, 18, 23]
-            },
-            recent_achievements=[
-                {
-                    "id": "perfectionist",
-                    "title": "The Perfectionist",
-                    "points": 100,
-                    "unlocked_at": "2025-11-22T10:30:00Z"
-                },
-                {
-                    "id": "comment_poet",
-                    "title": "Comment Poet",
-                    "points": 50,
-                    "unlocked_at": "2025-11-22T09:15:00Z"
-                }
-            ]
-        )
+        return _load_planet_stats(planet_id)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch planet stats: {str(e)}"
         )
 
+@planet_router.get("/{planet_id}/stats/stream")
+async def stream_planet_stats(
+    planet_id: str,
+    current_user: User = CurrentUser
+):
+    """
+    Stream planet statistics as NDJSON, one record per line, so dashboards
+    can start rendering before the progression/achievement lists are complete
+    """
+    async def generate():
+        stats = _load_planet_stats(planet_id)
+        yield orjson.dumps({
+            "type": "summary",
+            "total_sessions": stats.total_sessions,
+            "avg_session_duration": stats.avg_session_duration,
+            "dominant_language": stats.dominant_language
+        }) + b"\n"
+        
+        for skill, values in stats.skill_progression.items():
+            yield orjson.dumps({"type": "skill_progression", "skill": skill, "values": values}) + b"\n"
+        
+        for achievement in stats.recent_achievements:
+            yield orjson.dumps({"type": "achievement", **achievement}) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @planet_router.put("/{planet_id}/skills")
 async def update_planet_skills(
     planet_id: str,
     skills: SkillUpdate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = CurrentUser
 ):
     """
     Update planet skills based on code analysis
@@ -240,29 +300,16 @@ async def update_planet_skills(
             "achievements_unlocked": []
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update skills: {str(e)}"
         )
 
-@planet_router.get("/{planet_id}/visual")
-async def get_planet_visual(
-    planet_id: str,
-    format: str = "svg",
-    size: int = 512
-):
-    """
-    Generate or retrieve planet visual representation
-    """
-    try:
-        # TODO: Generate visual based on planet characteristics
-        # TODO: Cache generated visuals
-        
-        if format == "svg":
-            # Return SVG planet visualization
-            svg_content = f"""
-            <svg width="{size}" height="{size}" viewBox="0 0 {size} {size}" xmlns="http://www.w3.org/2000/svg">
+_SVG_TEMPLATE = string.Template("""
+            <svg width="${size}" height="${size}" viewBox="0 0 ${size} ${size}" xmlns="http://www.w3.org/2000/svg">
                 <defs>
                     <radialGradient id="planetGrad" cx="30%" cy="30%">
                         <stop offset="0%" stop-color="#6366f1" />
@@ -276,16 +323,48 @@ async def get_planet_visual(
                         </feMerge>
                     </filter>
                 </defs>
-                <circle cx="{size//2}" cy="{size//2}" r="{size//2-20}" 
+                <circle cx="${center}" cy="${center}" r="${radius}" 
                         fill="url(#planetGrad)" filter="url(#glow)" />
-                <circle cx="{size//2-80}" cy="{size//2-40}" r="8" fill="#8b5cf6" opacity="0.7" />
-                <circle cx="{size//2+60}" cy="{size//2+30}" r="12" fill="#a855f7" opacity="0.5" />
+                <circle cx="${moon1_x}" cy="${moon1_y}" r="8" fill="#8b5cf6" opacity="0.7" />
+                <circle cx="${moon2_x}" cy="${moon2_y}" r="12" fill="#a855f7" opacity="0.5" />
             </svg>
-            """
+            """)
+
+@lru_cache(maxsize=512)
+def _render_svg(size: int) -> str:
+    """Render the planet SVG; output depends only on size, so it's cached"""
+    center = size // 2
+    return _SVG_TEMPLATE.substitute(
+        size=size,
+        center=center,
+        radius=center - 20,
+        moon1_x=center - 80,
+        moon1_y=center - 40,
+        moon2_x=center + 60,
+        moon2_y=center + 30
+    )
+
+@planet_router.get("/{planet_id}/visual")
+async def get_planet_visual(
+    planet_id: str,
+    format: str = "svg",
+    size: int = 512
+):
+    """
+    Generate or retrieve planet visual representation
+    """
+    try:
+        # TODO: Generate visual based on planet characteristics
+        
+        if format == "svg":
+            # Return SVG planet visualization
+            svg_content = _render_svg(size)
             return {"content": svg_content, "format": "svg"}
         
         return {"message": "Planet visual generated", "format": format}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -4,60 +4,179 @@ Real-time streaming API for code analysis
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import Dict, List
-import json
+from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from collections import deque
 import asyncio
+import time
+import orjson
+import numpy as np
 from datetime import datetime
 
 from ..api.auth import get_current_user
+from ..services.code_stream_ingestor import code_stream_ingestor
 from ..models.database import User
 
 stream_router = APIRouter()
 
+# Naive utcnow() datetimes are written as UTC ISO-8601 with a Z suffix
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+# Message timestamp shared by everything sent within the same millisecond of loop time
+_timestamp_cache = {"tick": -1, "value": None}
+
+def _utcnow() -> datetime:
+    """Current UTC time at millisecond resolution, reused across a loop tick"""
+    tick = int(asyncio.get_running_loop().time() * 1000)
+    if tick != _timestamp_cache["tick"]:
+        _timestamp_cache["tick"] = tick
+        _timestamp_cache["value"] = datetime.utcnow()
+    return _timestamp_cache["value"]
+
+# Pre-serialized skeletons for frames whose structure never changes; only the
+# variable field is encoded per send and spliced in before the closing brace
+_BATCH_PREFIX = b'{"type":"batch","items":['
+_WELCOME_PREFIX = orjson.dumps({
+    "type": "connected",
+    "message": "🚀 Planet Code Forge analysis stream connected!"
+})[:-1] + b',"session_id":'
+_HEARTBEAT_ACK_PREFIX = b'{"type":"heartbeat_ack","timestamp":'
+_ERROR_PREFIX = b'{"type":"error","message":'
+
+# Pending messages allowed per connection before merging/dropping kicks in
+_OUTBOX_LIMIT = 256
+
+# JSON.stringify() emits keys in insertion order, so client heartbeats start with this
+_HEARTBEAT_FRAME_PREFIX = '{"type":"heartbeat"'
+
+def _error_frame(message: str) -> bytes:
+    return _ERROR_PREFIX + orjson.dumps(message) + b"}"
+
+@dataclass(slots=True)
+class _ConnRecord:
+    """Everything tracked for one connected user, reached with a single lookup"""
+    ws: WebSocket
+    session_id: str
+    connected_ns: int  # time.monotonic_ns()
+    binary: bool = False  # client opted in to binary frames with ?binary=1
+    analysis_count: int = 0
+    outbox: deque = field(default_factory=deque)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)  # set when outbox has items
+    writer: Optional[asyncio.Task] = None
+    session: dict = field(default_factory=dict)
+    session_started_ns: int = 0  # time.monotonic_ns() at start_session, 0 if none yet
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time streaming"""
     
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.user_sessions: Dict[str, dict] = {}
+        self.conns: Dict[str, _ConnRecord] = {}
+        # Back-pressure counters for slow clients whose outbox hit _OUTBOX_LIMIT
+        self.merged_messages = 0
+        self.dropped_messages = 0
     
     async def connect(self, websocket: WebSocket, user_id: str):
         """Accept WebSocket connection"""
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-        self.user_sessions[user_id] = {
-            "connected_at": datetime.utcnow(),
-            "session_id": f"session_{user_id}_{datetime.utcnow().isoformat()}",
-            "analysis_count": 0
-        }
+        previous = self.conns.get(user_id)
+        if previous is not None and previous.writer is not None:
+            previous.writer.cancel()
+        
+        record = _ConnRecord(
+            ws=websocket,
+            session_id=f"session_{user_id}_{datetime.utcnow().isoformat()}",
+            connected_ns=time.monotonic_ns(),
+            binary=websocket.query_params.get("binary") == "1"
+        )
+        record.writer = asyncio.create_task(self._writer(user_id, record))
+        self.conns[user_id] = record
         
         # Send welcome message
-        await self.send_message(user_id, {
-            "type": "connected",
-            "message": "🚀 Planet Code Forge analysis stream connected!",
-            "session_id": self.user_sessions[user_id]["session_id"]
-        })
+        await self.send_frame(user_id, _WELCOME_PREFIX + orjson.dumps(record.session_id) + b"}")
     
     def disconnect(self, user_id: str):
         """Remove connection"""
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-        if user_id in self.user_sessions:
-            del self.user_sessions[user_id]
+        record = self.conns.pop(user_id, None)
+        if record is not None and record.writer is not None and record.writer is not asyncio.current_task():
+            record.writer.cancel()
     
     async def send_message(self, user_id: str, message: dict):
-        """Send message to specific user"""
-        if user_id in self.active_connections:
-            try:
-                await self.active_connections[user_id].send_text(json.dumps(message))
-            except:
-                # Connection lost, clean up
+        """Queue message for a specific user; the connection's writer task sends it"""
+        record = self.conns.get(user_id)
+        if record is not None:
+            self._enqueue(record, message)
+    
+    async def send_frame(self, user_id: str, frame: bytes):
+        """Queue an already-encoded JSON frame for a specific user"""
+        record = self.conns.get(user_id)
+        if record is not None:
+            self._enqueue(record, frame)
+    
+    def _enqueue(self, record: _ConnRecord, item):
+        """Append to a connection's outbox, degrading gracefully once it is full"""
+        outbox = record.outbox
+        if len(outbox) >= _OUTBOX_LIMIT:
+            last = outbox[-1]
+            last_type = last.get("type") if isinstance(last, dict) else None
+            item_type = item.get("type") if isinstance(item, dict) else None
+            
+            if last_type == item_type == "analysis_result":
+                # Latest result supersedes the one still waiting
+                outbox[-1] = item
+                self.merged_messages += 1
+                return
+            if last_type == item_type == "planet_evolution":
+                outbox[-1] = {**item, "points_earned": last["points_earned"] + item["points_earned"]}
+                self.merged_messages += 1
+                return
+            
+            # Make room: a pending heartbeat ack is the cheapest thing to lose, else the oldest item
+            for queued in outbox:
+                if isinstance(queued, bytes) and queued.startswith(_HEARTBEAT_ACK_PREFIX):
+                    outbox.remove(queued)
+                    break
+            else:
+                outbox.popleft()
+            self.dropped_messages += 1
+        
+        outbox.append(item)
+        record.ready.set()
+    
+    async def _writer(self, user_id: str, record: _ConnRecord):
+        """Drain the outbox, coalescing everything queued since the last send into one frame"""
+        outbox = record.outbox
+        try:
+            while True:
+                await record.ready.wait()
+                record.ready.clear()
+                items = list(outbox)
+                outbox.clear()
+                if not items:
+                    continue
+                
+                frames = [
+                    item if isinstance(item, bytes) else orjson.dumps(item, option=_ORJSON_OPTIONS)
+                    for item in items
+                ]
+                payload = frames[0] if len(frames) == 1 else _BATCH_PREFIX + b",".join(frames) + b"]}"
+                if record.binary:
+                    # orjson already produced UTF-8 bytes; hand them to the transport as-is
+                    await record.ws.send_bytes(payload)
+                else:
+                    await record.ws.send_text(payload.decode())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Connection lost, clean up
+            if self.conns.get(user_id) is record:
                 self.disconnect(user_id)
     
     async def broadcast(self, message: dict):
         """Broadcast message to all connected users"""
-        for user_id in list(self.active_connections.keys()):
-            await self.send_message(user_id, message)
+        # Encoded once and shared; each connection's writer sends concurrently
+        frame = orjson.dumps(message, option=_ORJSON_OPTIONS)
+        for record in list(self.conns.values()):
+            self._enqueue(record, frame)
 
 # Global connection manager
 manager = ConnectionManager()
@@ -73,7 +192,13 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str):
         while True:
             # Receive code analysis request
             data = await websocket.receive_text()
-            message = json.loads(data)
+            
+            # Heartbeats are answered without parsing the frame at all
+            if data.startswith(_HEARTBEAT_FRAME_PREFIX):
+                await handle_heartbeat(user_id, None)
+                continue
+            
+            message = orjson.loads(data)
             
             # Process different message types
             await handle_stream_message(user_id, message)
@@ -89,129 +214,190 @@ async def handle_stream_message(user_id: str, message: dict):
     """Handle incoming WebSocket messages"""
     
     message_type = message.get("type")
+    handler = _MESSAGE_HANDLERS.get(message_type)
     
-    if message_type == "code_analysis":
-        await handle_code_analysis(user_id, message)
-    elif message_type == "heartbeat":
-        await manager.send_message(user_id, {"type": "heartbeat_ack", "timestamp": datetime.utcnow().isoformat()})
-    elif message_type == "start_session":
-        await handle_start_session(user_id, message)
-    elif message_type == "end_session":
-        await handle_end_session(user_id, message)
+    if handler is not None:
+        await handler(user_id, message)
     else:
-        await manager.send_message(user_id, {"type": "error", "message": f"Unknown message type: {message_type}"})
+        await manager.send_frame(user_id, _error_frame(f"Unknown message type: {message_type}"))
+
+async def handle_heartbeat(user_id: str, message: Optional[dict]):
+    """Acknowledge a client heartbeat"""
+    await manager.send_frame(
+        user_id, _HEARTBEAT_ACK_PREFIX + orjson.dumps(_utcnow(), option=_ORJSON_OPTIONS) + b"}"
+    )
 
 async def handle_code_analysis(user_id: str, message: dict):
-    """Process real-time code analysis"""
+    """Queue real-time code analysis so the receive loop never waits on the ML service"""
     
-    try:
-        # Extract code metrics (no actual code stored)
-        metrics = message.get("metrics", {})
-        language = message.get("language", "unknown")
-        
-        # Simulate ML analysis (in production, this calls the ML service)
-        analysis_result = await simulate_ml_analysis(metrics, language)
-        
-        # Update session stats
-        if user_id in manager.user_sessions:
-            manager.user_sessions[user_id]["analysis_count"] += 1
-        
-        # Send analysis results
-        await manager.send_message(user_id, {
-            "type": "analysis_result",
-            "result": analysis_result,
-            "timestamp": datetime.utcnow().isoformat(),
-            "latency_ms": 45  # Mock latency under target
-        })
-        
-        # Check for achievements or evolution events
-        await check_evolution_triggers(user_id, analysis_result)
-        
-    except Exception as e:
-        await manager.send_message(user_id, {
-            "type": "error",
-            "message": f"Analysis failed: {str(e)}"
-        })
+    # Extract code metrics (no actual code stored)
+    code_stream_ingestor.submit({
+        "user_id": user_id,
+        "metrics": message.get("metrics", {}),
+        "language": message.get("language", "unknown")
+    })
+
+async def process_code_analysis(items: List[dict]):
+    """Analyze a batch of queued requests and push each result to its user (ingestor handler)"""
+    
+    # Simulate ML analysis (in production, this calls the ML service)
+    analysis_results = await simulate_ml_analysis_batch(items)
+    
+    for item, analysis_result in zip(items, analysis_results):
+        user_id = item["user_id"]
+        try:
+            # Update session stats
+            record = manager.conns.get(user_id)
+            if record is not None:
+                record.analysis_count += 1
+            
+            # Send analysis results
+            await manager.send_message(user_id, {
+                "type": "analysis_result",
+                "result": analysis_result,
+                "timestamp": _utcnow(),
+                "latency_ms": 45  # Mock latency under target
+            })
+            
+            # Check for achievements or evolution events
+            await check_evolution_triggers(user_id, analysis_result)
+            
+        except Exception as e:
+            await manager.send_frame(user_id, _error_frame(f"Analysis failed: {str(e)}"))
+
+_WEB_LANGUAGES = frozenset({"javascript", "typescript", "html", "css"})
+_SKILL_NAMES = (
+    "algorithm_mastery",
+    "web_development_skill",
+    "api_design_discipline",
+    "devops_maturity",
+    "security_awareness"
+)
+
+# Coding style by (comment-heavy | function-dense << 1 | complex << 2); the
+# lowest set bit wins, matching the original methodical > modular > complex order
+_STYLES = ("pragmatic", "methodical", "modular", "methodical", "complex", "methodical", "modular", "methodical")
+_STYLE_TABLE = np.array(_STYLES)
+
+def _heuristic_kernel(lines: np.ndarray, functions: np.ndarray, comments: np.ndarray,
+                      complexity: np.ndarray, is_web: np.ndarray):
+    """Fallback scoring for a whole batch: (comment_ratio, function_density, (N, 5) skill deltas, totals, styles)"""
+    inv_lines = 1.0 / np.maximum(lines, 1)
+    comment_ratio = comments * inv_lines
+    function_density = functions * inv_lines
+    
+    # Columns in _SKILL_NAMES order
+    deltas = np.empty((len(lines), 5))
+    np.minimum(complexity * 0.1, 2.0, out=deltas[:, 0])
+    deltas[:, 1] = np.where(is_web, 1.5, 0.5)
+    deltas[:, 2] = np.where(functions > 0, 1.0, 0.2)
+    deltas[:, 3] = 0.3
+    deltas[:, 4] = np.where(comment_ratio > 0.1, 0.2, 0.1)
+    
+    style_index = (
+        (comment_ratio > 0.15).astype(np.uint8)
+        | ((function_density > 0.1).astype(np.uint8) << 1)
+        | ((complexity > 5).astype(np.uint8) << 2)
+    )
+    return comment_ratio, function_density, deltas, deltas.sum(axis=1), _STYLE_TABLE[style_index]
 
-async def simulate_ml_analysis(metrics: dict, language: str):
-    """AI-powered code analysis using Groq service"""
+async def simulate_ml_analysis_batch(items: List[dict]) -> List[dict]:
+    """AI-powered code analysis using Groq service, one call for the whole batch"""
     
     try:
         # Import Groq service
         from ..services.groq_ai import groq_service
         
         # Enhance metrics with additional context
-        enhanced_metrics = {
-            **metrics,
-            "language": language,
-            "analysis_timestamp": datetime.utcnow().isoformat()
-        }
+        analysis_timestamp = datetime.utcnow().isoformat()
+        enhanced_metrics = [
+            {**item["metrics"], "language": item["language"], "analysis_timestamp": analysis_timestamp}
+            for item in items
+        ]
         
         # Get AI analysis
-        analysis = await groq_service.analyze_code_behavior(enhanced_metrics)
+        analyses = await groq_service.analyze_code_behavior_batch(enhanced_metrics)
         
-        return {
-            "skill_deltas": analysis.get("skill_deltas", {}),
-            "coding_style": analysis.get("coding_style", "pragmatic"),
-            "language": language,
-            "behavioral_patterns": {
-                "comment_ratio": metrics.get("comments", 0) / max(metrics.get("lines", 1), 1),
-                "function_density": metrics.get("functions", 0) / max(metrics.get("lines", 1), 1),
-                "complexity_preference": metrics.get("complexity", 1)
-            },
-            "evolution_points": analysis.get("evolution_points", 0),
-            "session_quality": "highly_productive" if analysis.get("evolution_points", 0) > 5 else "productive",
-            "ai_insights": analysis.get("ai_insights", []),
-            "planet_updates": analysis.get("planet_updates", {}),
-            "analysis_method": "groq_ai",
-            "model_used": analysis.get("model_used", "groq")
-        }
+        return [
+            _groq_analysis_result(item["metrics"], item["language"], analysis)
+            for item, analysis in zip(items, analyses)
+        ]
         
     except Exception as e:
         print(f"Groq analysis failed, using fallback: {e}")
-        
-        # Fallback to heuristic analysis
-        lines = metrics.get("lines", 0)
-        functions = metrics.get("functions", 0)
-        comments = metrics.get("comments", 0)
-        complexity = metrics.get("complexity", 1)
-        
-        # Calculate behavioral patterns
-        comment_ratio = comments / max(lines, 1)
-        function_density = functions / max(lines, 1)
-        
-        # Generate skill improvements
-        skill_deltas = {
-            "algorithm_mastery": min(complexity * 0.1, 2.0),
-            "web_development_skill": 1.5 if language in ["javascript", "typescript", "html", "css"] else 0.5,
-            "api_design_discipline": 1.0 if functions > 0 else 0.2,
-            "devops_maturity": 0.3,
-            "security_awareness": 0.2 if comment_ratio > 0.1 else 0.1
-        }
-        
-        # Determine coding style
-        if comment_ratio > 0.15:
-            style = "methodical"
-        elif function_density > 0.1:
-            style = "modular"
-        elif complexity > 5:
-            style = "complex"
-        else:
-            style = "pragmatic"
-        
-        return {
-            "skill_deltas": skill_deltas,
+        return _heuristic_analysis_batch(items)
+
+def _groq_analysis_result(metrics: dict, language: str, analysis: dict) -> dict:
+    """Shape a Groq analysis into the analysis_result payload"""
+    
+    inv_lines = 1.0 / max(metrics.get("lines", 1), 1)
+    return {
+        "skill_deltas": analysis.get("skill_deltas", {}),
+        "coding_style": analysis.get("coding_style", "pragmatic"),
+        "language": language,
+        "behavioral_patterns": {
+            "comment_ratio": metrics.get("comments", 0) * inv_lines,
+            "function_density": metrics.get("functions", 0) * inv_lines,
+            "complexity_preference": metrics.get("complexity", 1)
+        },
+        "evolution_points": analysis.get("evolution_points", 0),
+        "session_quality": "highly_productive" if analysis.get("evolution_points", 0) > 5 else "productive",
+        "ai_insights": analysis.get("ai_insights", []),
+        "planet_updates": analysis.get("planet_updates", {}),
+        "analysis_method": "groq_ai",
+        "model_used": analysis.get("model_used", "groq")
+    }
+
+def _heuristic_analysis_batch(items: List[dict]) -> List[dict]:
+    """Fallback to heuristic analysis, scored for the whole batch at once"""
+    
+    # Columns: lines, functions, comments, complexity
+    columns = np.array([
+        (m.get("lines", 0), m.get("functions", 0), m.get("comments", 0), m.get("complexity", 1))
+        for m in (item["metrics"] for item in items)
+    ], dtype=np.float64).reshape(-1, 4)
+    is_web = np.fromiter((item["language"] in _WEB_LANGUAGES for item in items), dtype=bool, count=len(items))
+    
+    comment_ratio, function_density, deltas, evolution_points, styles = _heuristic_kernel(
+        columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3], is_web
+    )
+    
+    results = []
+    for item, ratio, density, row, points, style in zip(
+        items, comment_ratio.tolist(), function_density.tolist(), deltas.tolist(),
+        evolution_points.tolist(), styles.tolist()
+    ):
+        results.append({
+            "skill_deltas": dict(zip(_SKILL_NAMES, row)),
             "coding_style": style,
-            "language": language,
+            "language": item["language"],
             "behavioral_patterns": {
-                "comment_ratio": comment_ratio,
-                "function_density": function_density,
-                "complexity_preference": complexity
+                "comment_ratio": ratio,
+                "function_density": density,
+                "complexity_preference": item["metrics"].get("complexity", 1)
             },
-            "evolution_points": sum(skill_deltas.values()),
-            "session_quality": "productive" if sum(skill_deltas.values()) > 2 else "standard",
+            "evolution_points": points,
+            "session_quality": "productive" if points > 2 else "standard",
             "analysis_method": "fallback_heuristic"
-        }
+        })
+    return results
+
+# Achievement payloads are shared, never mutated; plain dicts so orjson can encode them
+ACHIEVEMENT_COMMENT_MASTER = {
+    "id": "comment_master",
+    "title": "Documentation Champion",
+    "description": "Maintained excellent code documentation",
+    "points": 50,
+    "icon": "📝"
+}
+
+ACHIEVEMENT_BURST = {
+    "id": "productivity_burst",
+    "title": "Productivity Burst",
+    "description": "Achieved high learning velocity",
+    "points": 25,
+    "icon": "⚡"
+}
 
 async def check_evolution_triggers(user_id: str, analysis_result: dict):
     """Check if analysis triggers any achievements or evolution events"""
@@ -222,38 +408,28 @@ async def check_evolution_triggers(user_id: str, analysis_result: dict):
     achievements = []
     
     if analysis_result.get("behavioral_patterns", {}).get("comment_ratio", 0) > 0.2:
-        achievements.append({
-            "id": "comment_master",
-            "title": "Documentation Champion",
-            "description": "Maintained excellent code documentation",
-            "points": 50,
-            "icon": "📝"
-        })
+        achievements.append(ACHIEVEMENT_COMMENT_MASTER)
     
     if evolution_points > 3.0:
-        achievements.append({
-            "id": "productivity_burst",
-            "title": "Productivity Burst",
-            "description": "Achieved high learning velocity",
-            "points": 25,
-            "icon": "⚡"
-        })
+        achievements.append(ACHIEVEMENT_BURST)
     
     # Send achievement notifications
     for achievement in achievements:
         await manager.send_message(user_id, {
             "type": "achievement_unlocked",
             "achievement": achievement,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _utcnow()
         })
     
     # Send evolution update
     if evolution_points > 1.0:
+        # Not persisted: /ws/{user_id} is unauthenticated and planet_id comes from the
+        # client, so ownership can't be checked before writing evolution_events
         await manager.send_message(user_id, {
             "type": "planet_evolution",
             "points_earned": evolution_points,
             "skill_updates": analysis_result.get("skill_deltas", {}),
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": _utcnow()
         })
 
 async def handle_start_session(user_id: str, message: dict):
@@ -263,12 +439,14 @@ async def handle_start_session(user_id: str, message: dict):
         "planet_id": message.get("planet_id"),
         "project_name": message.get("project_name", "Unknown Project"),
         "language": message.get("language", "unknown"),
-        "start_time": datetime.utcnow().isoformat()
+        "start_time": _utcnow()
     }
     
     # Update session info
-    if user_id in manager.user_sessions:
-        manager.user_sessions[user_id].update(session_data)
+    record = manager.conns.get(user_id)
+    if record is not None:
+        record.session.update(session_data)
+        record.session_started_ns = time.monotonic_ns()
     
     await manager.send_message(user_id, {
         "type": "session_started",
@@ -279,35 +457,52 @@ async def handle_start_session(user_id: str, message: dict):
 async def handle_end_session(user_id: str, message: dict):
     """Handle session end"""
     
-    if user_id not in manager.user_sessions:
+    record = manager.conns.get(user_id)
+    # No active session: a repeated or unpaired end_session has nothing to summarize
+    if record is None or not record.session_started_ns:
         return
     
-    session = manager.user_sessions[user_id]
-    duration = message.get("duration_seconds", 0)
+    # Measured server-side from the session start; the client's duration_seconds is not trusted
+    duration_ns = time.monotonic_ns() - record.session_started_ns
     
     session_summary = {
-        "duration_seconds": duration,
-        "analyses_performed": session.get("analysis_count", 0),
-        "avg_analysis_time": duration / max(session.get("analysis_count", 1), 1),
-        "end_time": datetime.utcnow().isoformat()
+        "duration_seconds": duration_ns // 1_000_000_000,
+        "analyses_performed": record.analysis_count,
+        "avg_analysis_time_us": duration_ns // max(record.analysis_count, 1) // 1000,
+        "end_time": _utcnow()
     }
     
+    # Not persisted: code_sessions needs the real users.id from a token checked on
+    # the socket, not the URL's user_id (e.g. "github_<id>")
+    
     await manager.send_message(user_id, {
         "type": "session_ended",
         "summary": session_summary,
         "message": "📊 Session complete! Planet evolution saved."
     })
     
-    # Reset session analysis count
-    session["analysis_count"] = 0
+    # Reset session state
+    record.session = {}
+    record.analysis_count = 0
+    record.session_started_ns = 0
+
+# The client message types form a small closed set; dispatch by lookup
+_MESSAGE_HANDLERS = {
+    "code_analysis": handle_code_analysis,
+    "heartbeat": handle_heartbeat,
+    "start_session": handle_start_session,
+    "end_session": handle_end_session,
+}
 
 @stream_router.get("/status")
 async def get_stream_status():
     """Get current streaming service status"""
     
     return {
-        "active_connections": len(manager.active_connections),
-        "total_sessions": len(manager.user_sessions),
+        "active_connections": len(manager.conns),
+        "total_sessions": len(manager.conns),
+        "merged_messages": manager.merged_messages,
+        "dropped_messages": manager.dropped_messages,
         "service_status": "healthy",
         "uptime": "running"
     }
\ No newline at end of file
@@ -8,15 +8,30 @@ from datetime import datetime
 from typing import Optional, List
 from enum import Enum
 import uuid
+import os
+import time
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON, ForeignKey, Text, Index
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, Session
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 import sqlalchemy as sa
 
 Base = declarative_base()
 
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUIDv7 (RFC 9562): 48-bit Unix ms timestamp followed by random bits"""
+    value = ((time.time_ns() // 1_000_000) << 80) | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+# Random v4 keys for low-churn tables, generated by Postgres (built in since 13)
+_SERVER_UUID = sa.text("gen_random_uuid()")
+
+# JSON columns default to an empty object so readers never branch on NULL
+_EMPTY_JSONB = sa.text("'{}'::jsonb")
+
 class PlanetType(str, Enum):
     TERRESTRIAL = "terrestrial"
     GAS_GIANT = "gas_giant"
@@ -37,7 +52,7 @@ class EvolutionStage(str, Enum):
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_SERVER_UUID)
     wallet_address = Column(String, unique=True, nullable=True)  # Web3 wallet
     email = Column(String, unique=True, nullable=True)  # Traditional auth
     username = Column(String, unique=True, nullable=False)
@@ -60,7 +75,7 @@ class User(Base):
 class Planet(Base):
     __tablename__ = "planets"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_SERVER_UUID)
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
     # Basic planet info
@@ -104,13 +119,16 @@ class Planet(Base):
 
 class CodeSession(Base):
     __tablename__ = "code_sessions"
+    # Append-only time series: monthly range partitions (see ensure_monthly_partitions)
+    __table_args__ = {"postgresql_partition_by": "RANGE (start_time)"}
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Append-only: time-ordered keys keep inserts at the right edge of the PK index
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     planet_id = Column(UUID(as_uuid=True), ForeignKey("planets.id"), nullable=False)
     
     # Session metadata
-    start_time = Column(DateTime, default=datetime.utcnow)
+    start_time = Column(DateTime, primary_key=True, default=datetime.utcnow)  # partition key, so part of the PK
     end_time = Column(DateTime, nullable=True)
     duration_minutes = Column(Integer, default=0)
     
@@ -126,8 +144,8 @@ class CodeSession(Base):
     complexity_score = Column(Float, default=0.0)
     
     # Style analysis
-    coding_style = Column(JSON)  # Stores style patterns, not code
-    skill_improvements = Column(JSON)  # Skill deltas during session
+    coding_style = Column(JSONB, server_default=_EMPTY_JSONB)  # Stores style patterns, not code
+    skill_improvements = Column(JSONB, server_default=_EMPTY_JSONB)  # Skill deltas during session
     
     # Real-time metrics
     keystrokes = Column(Integer, default=0)
@@ -141,8 +159,10 @@ class CodeSession(Base):
 
 class EvolutionEvent(Base):
     __tablename__ = "evolution_events"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Append-only: time-ordered keys keep inserts at the right edge of the PK index
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     planet_id = Column(UUID(as_uuid=True), ForeignKey("planets.id"), nullable=False)
     
     # Event details
@@ -151,10 +171,10 @@ class EvolutionEvent(Base):
     points_earned = Column(Integer, default=0)
     
     # Before/after state
-    previous_state = Column(JSON)
-    new_state = Column(JSON)
+    previous_state = Column(JSONB, server_default=_EMPTY_JSONB)
+    new_state = Column(JSONB, server_default=_EMPTY_JSONB)
     
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)  # partition key, so part of the PK
     
     # Relationships
     planet = relationship("Planet", back_populates="evolution_events")
@@ -162,7 +182,7 @@ class EvolutionEvent(Base):
 class Achievement(Base):
     __tablename__ = "achievements"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=_SERVER_UUID)
     planet_id = Column(UUID(as_uuid=True), ForeignKey("planets.id"), nullable=False)
     
     # Achievement info
@@ -175,7 +195,7 @@ class Achievement(Base):
     
     # Unlock details
     unlocked_at = Column(DateTime, default=datetime.utcnow)
-    unlock_condition = Column(JSON)  # What triggered the achievement
+    unlock_condition = Column(JSONB, server_default=_EMPTY_JSONB)  # What triggered the achievement
     
     # Relationships
     planet = relationship("Planet", back_populates="achievements")
@@ -183,9 +203,49 @@ class Achievement(Base):
 # Database indexes for performance
 Index('idx_users_wallet', User.wallet_address)
 Index('idx_users_email', User.email)
-Index('idx_planets_owner', Planet.owner_id)
+Index('idx_planets_owner', Planet.owner_id, postgresql_include=['name', 'evolution_stage'])
+Index('idx_planets_owner_stage', Planet.owner_id, Planet.evolution_stage)
 Index('idx_planets_nft', Planet.nft_token_id)
 Index('idx_sessions_user_time', CodeSession.user_id, CodeSession.start_time)
+Index('idx_sessions_user_active', CodeSession.user_id, CodeSession.end_time,
+      postgresql_where=CodeSession.end_time.is_(None))
 Index('idx_sessions_planet', CodeSession.planet_id)
-Index('idx_evolution_planet_time', EvolutionEvent.planet_id, EvolutionEvent.timestamp)
-Index('idx_achievements_planet', Achievement.planet_id)
\ No newline at end of file
+Index('idx_sessions_style_gin', CodeSession.coding_style, postgresql_using='gin')
+Index('idx_evolution_planet_time', EvolutionEvent.planet_id, EvolutionEvent.timestamp.desc())
+Index('idx_achievements_planet', Achievement.planet_id)
+Index('idx_achievements_planet_rarity', Achievement.planet_id, Achievement.rarity, Achievement.unlocked_at.desc())
+Index('idx_achievements_condition_gin', Achievement.unlock_condition, postgresql_using='gin')
+
+# Range-partitioned tables and their partition key
+PARTITIONED_TABLES = {
+    "code_sessions": "start_time",
+    "evolution_events": "timestamp",
+}
+
+def ensure_monthly_partitions(connection, months_ahead: int = 3, start: Optional[datetime] = None):
+    """
+    Create the monthly partitions from start's month through months_ahead months
+    later, plus a DEFAULT catch-all. Idempotent; main.py reruns it daily so
+    upcoming months exist before rows arrive (a month whose rows already sit in
+    DEFAULT can no longer be attached). Retire old months with
+    DETACH PARTITION + DROP TABLE rather than DELETE.
+    """
+    start = start or datetime.utcnow()
+    year, month = start.year, start.month
+    for _ in range(months_ahead + 1):
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        for table in PARTITIONED_TABLES:
+            connection.execute(sa.text(
+                f"CREATE TABLE IF NOT EXISTS {table}_{year:04d}_{month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{year:04d}-{month:02d}-01') TO ('{next_year:04d}-{next_month:02d}-01')"
+            ))
+        year, month = next_year, next_month
+    for table in PARTITIONED_TABLES:
+        connection.execute(sa.text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+def _create_initial_partitions(target, connection, **kw):
+    if connection.dialect.name == "postgresql":
+        ensure_monthly_partitions(connection)
+
+# Partitions are created once the parents exist when using metadata.create_all()
+sa.event.listen(Base.metadata, "after_create", _create_initial_partitions)
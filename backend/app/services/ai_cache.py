@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+AI Response Cache
+Get-or-generate caching for Groq-backed results: in-process TTL cache in front
+of Redis, with stale-while-revalidate refreshes near expiry
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+import orjson
+from cachetools import TTLCache
+from redis.asyncio import Redis
+from loguru import logger
+
+import sys
+if "config" not in sys.modules:
+    import os
+    sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
+from config import load_config
+
+config = load_config()
+
+# Seconds each kind of generated result stays valid
+CACHE_DURATIONS = {
+    "planet_desc": 6 * 3600,
+}
+
+_L2_PREFIX = "ai:"
+_L2_RETRY_SECONDS = 30
+# Fraction of the TTL after which a hit also schedules a background refresh
+_REFRESH_AFTER = 0.9
+
+_l1: Dict[str, TTLCache] = {}
+_l2 = Redis.from_url(config.redis_url, socket_timeout=0.1, socket_connect_timeout=0.1)
+_l2_retry_at = 0.0
+_refreshing: Set[Tuple[str, str]] = set()
+_tasks: Set[asyncio.Task] = set()
+
+def cache_key(context: Dict[str, Any]) -> str:
+    """Stable digest of a generation context (key order independent)"""
+    return hashlib.blake2b(orjson.dumps(context, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+def _always(value: Any) -> bool:
+    return True
+
+def _layer1(cache_type: str, ttl: int) -> TTLCache:
+    cache = _l1.get(cache_type)
+    if cache is None:
+        cache = _l1[cache_type] = TTLCache(maxsize=1024, ttl=ttl)
+    return cache
+
+async def get_or_generate(cache_type: str, key: str, ttl: int, gen: Callable[[], Awaitable[Any]],
+                          cacheable: Callable[[Any], bool] = _always) -> Any:
+    """
+    Return the cached result for (cache_type, key), generating it on a miss.
+    Generated values are stored only when cacheable(value) holds, so fallback
+    output is returned to the caller without being shared for the whole TTL.
+    """
+    l1 = _layer1(cache_type, ttl)
+    entry = l1.get(key)
+    if entry is not None:
+        value, stored_at = entry
+        if time.monotonic() - stored_at >= ttl * _REFRESH_AFTER:
+            _schedule_refresh(cache_type, key, ttl, gen, cacheable)
+        return value
+
+    value = await _l2_get(cache_type, key)
+    if value is not None:
+        # Age in Redis is unknown; the local copy gets a full TTL
+        l1[key] = (value, time.monotonic())
+        return value
+
+    return await _generate(cache_type, key, ttl, gen, cacheable)
+
+async def _generate(cache_type: str, key: str, ttl: int, gen: Callable[[], Awaitable[Any]],
+                    cacheable: Callable[[Any], bool]) -> Any:
+    value = await gen()
+    if cacheable(value):
+        _layer1(cache_type, ttl)[key] = (value, time.monotonic())
+        await _l2_set(cache_type, key, ttl, value)
+    return value
+
+def _schedule_refresh(cache_type: str, key: str, ttl: int, gen: Callable[[], Awaitable[Any]],
+                      cacheable: Callable[[Any], bool]):
+    if (cache_type, key) in _refreshing:
+        return
+    _refreshing.add((cache_type, key))
+    task = asyncio.create_task(_refresh(cache_type, key, ttl, gen, cacheable))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+async def _refresh(cache_type: str, key: str, ttl: int, gen: Callable[[], Awaitable[Any]],
+                   cacheable: Callable[[Any], bool]):
+    try:
+        await _generate(cache_type, key, ttl, gen, cacheable)
+    except Exception as e:
+        logger.error(f"Background refresh of {cache_type} failed: {e}")
+    finally:
+        _refreshing.discard((cache_type, key))
+
+async def _l2_get(cache_type: str, key: str) -> Any:
+    if time.monotonic() < _l2_retry_at:
+        return None
+    try:
+        value = await _l2.get(f"{_L2_PREFIX}{cache_type}:{key}")
+    except Exception as e:
+        _l2_unavailable(e)
+        return None
+    return orjson.loads(value) if value is not None else None
+
+async def _l2_set(cache_type: str, key: str, ttl: int, value: Any):
+    if time.monotonic() < _l2_retry_at:
+        return
+    try:
+        await _l2.setex(f"{_L2_PREFIX}{cache_type}:{key}", ttl, orjson.dumps(value))
+    except Exception as e:
+        _l2_unavailable(e)
+
+def _l2_unavailable(error: Exception):
+    global _l2_retry_at
+    # Back off instead of paying a connect timeout on every lookup
+    logger.warning(f"Redis AI cache unavailable, retrying in {_L2_RETRY_SECONDS}s: {error}")
+    _l2_retry_at = time.monotonic() + _L2_RETRY_SECONDS
+
+async def close():
+    """Wait for pending refreshes and close the Redis connection"""
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    await _l2.aclose()
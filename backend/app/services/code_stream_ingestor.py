@@ -6,41 +6,99 @@ Real-time code analysis and behavioral pattern extraction
 
 import asyncio
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Set
 from loguru import logger
 
+AnalysisHandler = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+# Queue marker posted by the batch window timer
+_FLUSH = object()
+
 class CodeStreamIngestor:
     """Handles real-time code streaming and analysis"""
     
-    def __init__(self):
+    def __init__(self, batch_size: int = 16, batch_window: float = 0.025, max_in_flight: int = 8):
         self.running = False
         self.analysis_queue = asyncio.Queue()
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.handler: Optional[AnalysisHandler] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(max_in_flight)
         
-    async def start(self):
+    async def start(self, handler: AnalysisHandler):
         """Start the code stream ingestor service"""
         self.running = True
+        self.handler = handler
         logger.info("🔄 Code Stream Ingestor started")
         
-        # Start background analysis task
-        asyncio.create_task(self.process_analysis_queue())
+        # Start background batch collector
+        self._collector = asyncio.create_task(self.process_analysis_queue())
         
     async def stop(self):
         """Stop the service"""
         self.running = False
+        if self._collector is not None:
+            # Sentinel unblocks the pending get(); the partial batch is flushed first
+            self.analysis_queue.put_nowait(None)
+            await self._collector
+            self._collector = None
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
         logger.info("⏹️  Code Stream Ingestor stopped")
         
     def is_running(self) -> bool:
         """Check if service is running"""
         return self.running
         
+    def submit(self, item: Dict[str, Any]):
+        """Queue an analysis request; returns immediately"""
+        self.analysis_queue.put_nowait(item)
+        
     async def process_analysis_queue(self):
-        """Process queued analysis requests"""
-        while self.running:
-            try:
-                # Process any queued analysis requests
-                await asyncio.sleep(1)
-            except Exception as e:
-                logger.error(f"Error processing analysis queue: {e}")
+        """Group queued requests into batches of up to batch_size, waiting at most batch_window"""
+        loop = asyncio.get_running_loop()
+        batch: List[Dict[str, Any]] = []
+        timer = None
+        
+        while True:
+            item = await self.analysis_queue.get()
+            
+            if item is None or item is _FLUSH:
+                if timer is not None:
+                    timer.cancel()
+                    timer = None
+                if batch:
+                    await self._dispatch(batch)
+                    batch = []
+                if item is None:
+                    break
+                continue
+            
+            batch.append(item)
+            if len(batch) == 1:
+                timer = loop.call_later(self.batch_window, self.analysis_queue.put_nowait, _FLUSH)
+            if len(batch) >= self.batch_size:
+                timer.cancel()
+                timer = None
+                await self._dispatch(batch)
+                batch = []
+                
+    async def _dispatch(self, batch: List[Dict[str, Any]]):
+        """Hand a batch to the handler without blocking collection of the next one"""
+        # Bounded: when every slot is busy, collection pauses and the queue absorbs the burst
+        await self._slots.acquire()
+        task = asyncio.create_task(self._run_batch(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+        
+    async def _run_batch(self, batch: List[Dict[str, Any]]):
+        try:
+            await self.handler(batch)
+        except Exception as e:
+            logger.error(f"Error processing analysis batch: {e}")
+        finally:
+            self._slots.release()
                 
     async def analyze_code_stream(self, user_id: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze incoming code metrics"""
@@ -59,4 +117,7 @@ class CodeStreamIngestor:
                 "algorithm_mastery": 1.5,
                 "web_development_skill": 0.8
             }
-        }
\ No newline at end of file
+        }
+
+# Global instance
+code_stream_ingestor = CodeStreamIngestor()
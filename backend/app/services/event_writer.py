@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Event Writer Service
+Buffered, batched persistence for append-only session and evolution rows
+"""
+
+import asyncio
+import uuid
+from typing import Dict, List, Optional, Tuple
+import asyncpg
+from loguru import logger
+
+# Column order of the records accepted for each table
+TABLE_COLUMNS = {
+    "code_sessions": (
+        "id", "user_id", "planet_id", "start_time", "end_time", "duration_minutes", "language_detected"
+    ),
+    "evolution_events": (
+        "id", "planet_id", "event_type", "description", "points_earned", "new_state", "timestamp"
+    ),
+}
+
+# UUID columns of each table; cast before buffering so one malformed id can't fail a whole COPY
+_UUID_COLUMNS = {
+    table: tuple(i for i, column in enumerate(columns) if column == "id" or column.endswith("_id"))
+    for table, columns in TABLE_COLUMNS.items()
+}
+
+# Queue marker posted by the batch window timer
+_FLUSH = object()
+
+class EventWriter:
+    """Accumulates rows in memory and writes them with one COPY per table per batch"""
+
+    def __init__(self, batch_size: int = 50, batch_window: float = 0.1):
+        self.running = False
+        self.write_queue = asyncio.Queue()
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.pool: Optional[asyncpg.Pool] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def start(self, dsn: str):
+        """Open the connection pool and start the background flusher"""
+        try:
+            self.pool = await asyncpg.create_pool(dsn, min_size=1, max_size=2)
+        except Exception as e:
+            logger.warning(f"⚠️  Event Writer disabled - database unavailable: {e}")
+            return
+
+        self.running = True
+        self._flusher = asyncio.create_task(self.process_write_queue())
+        logger.info("🗄️  Event Writer started")
+
+    async def stop(self):
+        """Flush whatever is buffered and close the pool"""
+        self.running = False
+        if self._flusher is not None:
+            # Sentinel unblocks the pending get(); the partial batch is flushed first
+            self.write_queue.put_nowait(None)
+            await self._flusher
+            self._flusher = None
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+        logger.info("⏹️  Event Writer stopped")
+
+    def is_running(self) -> bool:
+        """Check if service is running"""
+        return self.running
+
+    def add(self, table: str, record: tuple):
+        """Buffer one row (in TABLE_COLUMNS order); dropped when the writer isn't running"""
+        if not self.running:
+            return
+        try:
+            record = _cast_uuids(table, record)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Dropping {table} row with invalid id: {e} {record!r}")
+            return
+        self.write_queue.put_nowait((table, record))
+
+    async def process_write_queue(self):
+        """Group buffered rows into batches of up to batch_size, waiting at most batch_window"""
+        loop = asyncio.get_running_loop()
+        batch: List[Tuple[str, tuple]] = []
+        timer = None
+
+        while True:
+            item = await self.write_queue.get()
+
+            if item is None or item is _FLUSH:
+                if timer is not None:
+                    timer.cancel()
+                    timer = None
+                if batch:
+                    await self._write_batch(batch)
+                    batch = []
+                if item is None:
+                    break
+                continue
+
+            batch.append(item)
+            if len(batch) == 1:
+                timer = loop.call_later(self.batch_window, self.write_queue.put_nowait, _FLUSH)
+            if len(batch) >= self.batch_size:
+                timer.cancel()
+                timer = None
+                await self._write_batch(batch)
+                batch = []
+
+    async def _write_batch(self, batch: List[Tuple[str, tuple]]):
+        by_table: Dict[str, List[tuple]] = {}
+        for table, record in batch:
+            by_table.setdefault(table, []).append(record)
+
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    for table, records in by_table.items():
+                        await conn.copy_records_to_table(table, records=records, columns=TABLE_COLUMNS[table])
+            return
+        except Exception as e:
+            logger.warning(f"Batch of {len(batch)} buffered rows failed, retrying row by row: {e}")
+
+        # One bad row aborts the whole COPY; retry individually so only it is lost
+        for table, records in by_table.items():
+            for record in records:
+                try:
+                    async with self.pool.acquire() as conn:
+                        await conn.copy_records_to_table(table, records=[record], columns=TABLE_COLUMNS[table])
+                except Exception as e:
+                    logger.error(f"Dead-lettered {table} row {record!r}: {e}")
+
+def _cast_uuids(table: str, record: tuple) -> tuple:
+    """Return record with its UUID columns as uuid.UUID; raises ValueError on a malformed id"""
+    columns = _UUID_COLUMNS[table]
+    if len(record) != len(TABLE_COLUMNS[table]):
+        raise ValueError(f"expected {len(TABLE_COLUMNS[table])} columns, got {len(record)}")
+    values = list(record)
+    for i in columns:
+        if not isinstance(values[i], uuid.UUID):
+            values[i] = uuid.UUID(str(values[i]))
+    return tuple(values)
+
+# Global instance
+event_writer = EventWriter()
@@ -5,11 +5,32 @@ Powered by Groq AI for fast behavioral analysis
 """
 
 import asyncio
+from types import MappingProxyType
 from typing import Dict, Any, List
 from loguru import logger
 
 from .groq_ai import groq_service
 
+_ARCHETYPE_MAP = MappingProxyType({
+    "methodical": "The Architect",
+    "pragmatic": "The Builder",
+    "artistic": "The Visionary",
+    "complex": "The Explorer",
+    "minimal": "The Zen Master"
+})
+
+# Complexity preference by how many of the >4 / >8 thresholds are crossed
+_COMPLEXITY_PREFERENCES = ("simple_solutions", "moderate_to_high", "high")
+
+# Genome affinity -> skill delta it is derived from
+_AFFINITY_SKILLS = (
+    ("algorithms", "algorithm_mastery"),
+    ("systems", "api_design_discipline"),
+    ("ui", "web_development_skill"),
+    ("devops", "devops_maturity"),
+    ("security", "security_awareness")
+)
+
 class GenomeLabEngine:
     """ML engine for coding genome analysis"""
     
@@ -97,15 +118,7 @@ class GenomeLabEngine:
         style = analysis.get("coding_style", "pragmatic")
         traits = analysis.get("personality_traits", [])
         
-        archetype_map = {
-            "methodical": "The Architect",
-            "pragmatic": "The Builder", 
-            "artistic": "The Visionary",
-            "complex": "The Explorer",
-            "minimal": "The Zen Master"
-        }
-        
-        return archetype_map.get(style, "The Builder")
+        return _ARCHETYPE_MAP.get(style, "The Builder")
     
     def _calculate_skill_affinities(self, analysis: Dict[str, Any]) -> Dict[str, float]:
         """Calculate skill affinities from analysis"""
@@ -113,11 +126,8 @@ class GenomeLabEngine:
         skills = analysis.get("skill_deltas", {})
         
         return {
-            "algorithms": min(skills.get("algorithm_mastery", 0) / 5.0, 1.0),
-            "systems": min(skills.get("api_design_discipline", 0) / 5.0, 1.0),
-            "ui": min(skills.get("web_development_skill", 0) / 5.0, 1.0),
-            "devops": min(skills.get("devops_maturity", 0) / 5.0, 1.0),
-            "security": min(skills.get("security_awareness", 0) / 5.0, 1.0)
+            affinity: min(skills.get(skill, 0) / 5.0, 1.0)
+            for affinity, skill in _AFFINITY_SKILLS
         }
     
     def _calculate_learning_velocity(self, analysis: Dict[str, Any]) -> float:
@@ -131,12 +141,7 @@ class GenomeLabEngine:
         
         complexity = behavioral_data.get("complexity", 1)
         
-        if complexity > 8:
-            return "high"
-        elif complexity > 4:
-            return "moderate_to_high"
-        else:
-            return "simple_solutions"
+        return _COMPLEXITY_PREFERENCES[(complexity > 4) + (complexity > 8)]
     
     def _fallback_genome_analysis(self, behavioral_data: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback analysis when Groq is unavailable"""
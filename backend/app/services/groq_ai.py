@@ -2,22 +2,385 @@
 """
 Groq AI Service for Planet Code Forge
 High-speed AI inference for code analysis and planet generation
+
+The client is shared process-wide through the groq_service singleton and is
+expected to run on uvloop (selected by the uvicorn launch in main.py / Dockerfile).
 """
 
 import asyncio
-from typing import Dict, List, Any, Optional
-import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+import hashlib
+import re
 import httpx
+import orjson
+from cachetools import TTLCache
+from redis.asyncio import Redis
+import numpy as np
 from loguru import logger
 import time
 
 import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
+if "config" not in sys.modules:
+    # Entry points (main.py, start_server.py, the Docker PYTHONPATH) already put
+    # backend/ on the path; only standalone imports of this module need it added
+    import os
+    sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 from config import load_config
 
 config = load_config()
 
+# Response shape requested from the model, shared by the single and batch prompts
+_ANALYSIS_SCHEMA = """{
+  "coding_style": "methodical|pragmatic|artistic|complex|minimal",
+  "personality_traits": ["trait1", "trait2", "trait3"],
+  "skill_assessment": {
+    "algorithm_mastery": 0.0-100.0,
+    "web_development": 0.0-100.0,
+    "api_design": 0.0-100.0,
+    "devops_skills": 0.0-100.0,
+    "security_awareness": 0.0-100.0
+  },
+  "planet_characteristics": {
+    "atmosphere": "neon|crystalline|stormy|clear|toxic",
+    "terrain": "rocky|liquid|crystalline|volcanic|metallic",
+    "primary_color": "#hexcolor",
+    "evolution_stage": "protoplanet|young_world|mature_planet|ancient_world"
+  },
+  "achievements_earned": ["achievement_id1", "achievement_id2"],
+  "insights": ["insight1", "insight2", "insight3"]
+}"""
+
+# First markdown code fence (optionally tagged json) around the model's JSON
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.S)
+
+# Defaults used when the model leaves a field out, built once and shared by every
+# result. Read-only by convention: results are serialized with orjson, which
+# cannot encode MappingProxyType, so the mapping stays a plain dict
+_DEFAULT_PLANET_UPDATES = {
+    "atmosphere": "clear",
+    "terrain": "rocky",
+    "primary_color": "#3b82f6",
+    "evolution_stage": "young_world"
+}
+_DEFAULT_TRAITS = ("focused", "methodical")
+_DEFAULT_INSIGHTS = ("Great coding session!",)
+_FALLBACK_TRAITS = ("focused", "analytical")
+
+# Static system prompts, identical on every call so the provider can reuse the
+# processed prefix; only the user message carries per-request data
+_SYSTEM_SCHEMA_PROMPT = f"""You are a code behavior analyst. Analyze coding patterns and return JSON only.
+
+For each coding session, produce a JSON object with this exact structure:
+{_ANALYSIS_SCHEMA}
+
+For a single session return that object. For a numbered list of independent sessions
+return a JSON array with exactly one such object per session, in the same order."""
+
+# Per-request user messages, filled from _bucket_metrics (which supplies every field)
+_PROMPT_TMPL = """Code Metrics:
+- Lines of code: {lines}
+- Functions created: {functions}
+- Comments: {comments}
+- Complexity score: {complexity}
+- Language: {language}
+- Time spent: {duration_minutes} minutes
+- Keystrokes: {keystrokes}
+"""
+_SESSION_TMPL = (
+    "{0}. lines={lines}, functions={functions}, comments={comments}, complexity={complexity}, "
+    "language={language}, minutes={duration_minutes}, keystrokes={keystrokes}"
+)
+
+_POET_SYSTEM_PROMPT = """You are a cosmic poet describing unique coding planets.
+Write 2-3 sentences that capture the essence of the coder's planet described by the user. Be creative and inspiring."""
+_PLANET_TMPL = """Planet characteristics:
+- Type: {planet_type}
+- Atmosphere: {atmosphere}
+- Terrain: {terrain}
+- Evolution Stage: {evolution_stage}
+- Algorithm Mastery: {algorithm_mastery}/100
+- Web Development: {web_development_skill}/100
+"""
+
+# Metrics that decide an analysis; everything else in the payload is ignored for caching
+_CACHE_FIELDS = ("lines", "functions", "comments", "complexity", "duration_minutes", "keystrokes")
+
+def _bucket(value) -> str:
+    """Power-of-two range for a count, e.g. 1234 -> "1024-2048", so similar sessions prompt identically"""
+    width = int(max(value or 0, 0)).bit_length()
+    return f"{1 << width - 1}-{1 << width}" if width else "0"
+
+@dataclass(slots=True, frozen=True)
+class CodeMetrics:
+    """The session metrics an analysis depends on, read out of the request dict once"""
+    lines: int = 0
+    functions: int = 0
+    comments: int = 0
+    complexity: float = 1
+    language: str = "unknown"
+    duration_minutes: int = 0
+    keystrokes: int = 0
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CodeMetrics":
+        get = data.get
+        return cls(
+            get("lines", 0), get("functions", 0), get("comments", 0), get("complexity", 1),
+            get("language", "unknown"), get("duration_minutes", 0), get("keystrokes", 0)
+        )
+
+_EMPTY_METRICS = CodeMetrics()
+
+# Cache keys hash the static prompt text first, so editing a prompt retires old
+# (including shared Redis) entries; the seeded state is copied, never rehashed
+_KEY_SEED = hashlib.blake2b((_SYSTEM_SCHEMA_PROMPT + _PROMPT_TMPL).encode(), digest_size=16)
+
+def _bucket_metrics(metrics: CodeMetrics) -> Dict[str, str]:
+    """Prompt-ready metric values; complexity and language are kept verbatim"""
+    return {
+        "lines": _bucket(metrics.lines),
+        "functions": _bucket(metrics.functions),
+        "comments": _bucket(metrics.comments),
+        "complexity": str(metrics.complexity),
+        "language": str(metrics.language),
+        "duration_minutes": _bucket(metrics.duration_minutes),
+        "keystrokes": _bucket(metrics.keystrokes)
+    }
+
+def _build_envelope(model: str, system_prompt: str, temperature: float, stream: bool = False) -> Tuple[bytes, bytes]:
+    """Encode the static part of a completion request once, split around the user message
+    
+    The body is pre + <JSON string> + post + <max_tokens> + "}" (see _fill_envelope).
+    """
+    head = orjson.dumps({
+        "model": model,
+        "temperature": temperature,
+        "stream": stream,
+        "messages": [{"role": "system", "content": system_prompt}]
+    })
+    # head ends with "]}"; reopen the messages array for the user turn
+    return head[:-2] + b',{"role":"user","content":', b'}],"max_tokens":'
+
+def _fill_envelope(envelope: Tuple[bytes, bytes], user_content: str, max_tokens: int) -> bytes:
+    """Complete a pre-encoded request body"""
+    pre, post = envelope
+    return b"".join((pre, orjson.dumps(user_content), post, str(max_tokens).encode(), b"}"))
+
+# Offline planet descriptions, four per evolution stage; one is picked per planet
+# by its description key so similar planets don't all read the same
+_FALLBACK_DESCRIPTIONS = {
+    "protoplanet": (
+        "A newborn {planet_type} world, its {atmosphere} skies still settling over {terrain} ground.",
+        "Dust and first light swirl around this {planet_type} protoplanet, wrapped in a {atmosphere} haze.",
+        "Barely formed, this {planet_type} world hums with the promise of its first functions.",
+        "A young spark of a {planet_type} planet, {terrain} plains waiting for their first builders."
+    ),
+    "young_world": (
+        "A {planet_type} planet with {atmosphere} atmosphere, its {terrain} surface shaped by steady commits.",
+        "Rivers of logic carve the {terrain} valleys of this growing {planet_type} world.",
+        "Under {atmosphere} skies, this {planet_type} world is finding its rhythm one session at a time.",
+        "A magnificent {planet_type} where code flows like cosmic rivers across {terrain} plains."
+    ),
+    "mature_planet": (
+        "A seasoned {planet_type} world whose {terrain} continents echo with well-structured thought.",
+        "Cities of clean abstractions rise from the {terrain} ground beneath {atmosphere} skies.",
+        "This {planet_type} planet glows with the quiet confidence of code refined over many orbits.",
+        "Balanced and deliberate, the {planet_type} world turns under a {atmosphere} sky of its own design."
+    ),
+    "ancient_world": (
+        "An ancient {planet_type} world, its {terrain} ridges etched with the patterns of countless sessions.",
+        "Legends are written in the {atmosphere} skies of this timeless {planet_type} planet.",
+        "Ages of craft have polished this {planet_type} world into something luminous.",
+        "A venerable {planet_type} planet where every {terrain} stone remembers a solved problem."
+    )
+}
+
+def _description_key(planet_data: Dict[str, Any]) -> bytes:
+    """Content address of the fields that shape a planet description"""
+    fields = (
+        planet_data.get("planet_type", "terrestrial"),
+        planet_data.get("atmosphere", "clear"),
+        planet_data.get("terrain", "rocky"),
+        planet_data.get("evolution_stage", "young_world"),
+        _bucket(planet_data.get("algorithm_mastery", 0)),
+        _bucket(planet_data.get("web_development_skill", 0))
+    )
+    return hashlib.blake2b(repr(fields).encode(), digest_size=16).digest()
+
+def _fallback_description(planet_data: Dict[str, Any], key: bytes) -> str:
+    """Prewritten description for a planet when Groq can't write one"""
+    templates = _FALLBACK_DESCRIPTIONS.get(planet_data.get("evolution_stage"), _FALLBACK_DESCRIPTIONS["young_world"])
+    return templates[key[0] % len(templates)].format(
+        planet_type=planet_data.get("planet_type", "mysterious"),
+        atmosphere=planet_data.get("atmosphere", "clear"),
+        terrain=planet_data.get("terrain", "rocky")
+    )
+
+# Redis (L2) analysis cache shared by all workers
+_L2_PREFIX = "groq:analysis:"
+_L2_TTL = 3600
+_L2_RETRY_SECONDS = 30
+
+# Sessions below this size get the heuristic fallback without a Groq call
+_TRIVIAL_MAGNITUDE = 20
+
+def _is_trivial(metrics: CodeMetrics) -> bool:
+    """True when a session is too small for an AI analysis to add anything"""
+    return metrics.lines + metrics.keystrokes // 50 < _TRIVIAL_MAGNITUDE
+
+# Coding style by (comment-heavy | function-dense << 1 | complex << 2); the
+# lowest set bit wins, matching the methodical > modular > complex precedence
+_FALLBACK_STYLES = ("pragmatic", "methodical", "modular", "methodical", "complex", "methodical", "modular", "methodical")
+
+def _fallback_kernel(lines, functions, comments, complexity) -> Tuple[int, float, float, float]:
+    """Numeric core of the heuristic fallback: (style_id, skill_gain, comment_ratio, function_density)"""
+    inv_lines = 1.0 / max(lines, 1)
+    comment_ratio = comments * inv_lines
+    function_density = functions * inv_lines
+    style_id = (comment_ratio > 0.15) | ((function_density > 0.1) << 1) | ((complexity > 5) << 2)
+    return style_id, min(complexity * 0.5, 3.0), comment_ratio, function_density
+
+_FALLBACK_STYLE_TABLE = np.array(_FALLBACK_STYLES)
+
+def fallback_batch(lines: np.ndarray, functions: np.ndarray, comments: np.ndarray,
+                   complexity: np.ndarray) -> Dict[str, np.ndarray]:
+    """Vectorized _fallback_kernel over whole columns, returned as a dict of arrays"""
+    inv_lines = 1.0 / np.maximum(lines, 1)
+    comment_ratio = comments * inv_lines
+    function_density = functions * inv_lines
+    style_id = (
+        (comment_ratio > 0.15).astype(np.uint8)
+        | ((function_density > 0.1).astype(np.uint8) << 1)
+        | ((complexity > 5).astype(np.uint8) << 2)
+    )
+    return {
+        "coding_style": _FALLBACK_STYLE_TABLE[style_id],
+        "skill_gain": np.minimum(complexity * 0.5, 3.0),
+        "comment_ratio": comment_ratio,
+        "function_density": function_density
+    }
+
+class _JsonObjectScanner:
+    """Incrementally finds the first balanced top-level {...} in streamed text"""
+    
+    __slots__ = ("depth", "in_string", "escaped", "parts")
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.parts: List[str] = []
+        
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; True once the object is complete (see text())"""
+        if self.depth == 0:
+            # Skip prose / markdown fences before the object starts
+            start = chunk.find("{")
+            if start < 0:
+                return False
+            chunk = chunk[start:]
+        
+        depth, in_string, escaped = self.depth, self.in_string, self.escaped
+        for i, char in enumerate(chunk):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    self.parts.append(chunk[:i + 1])
+                    return True
+        self.parts.append(chunk)
+        self.depth, self.in_string, self.escaped = depth, in_string, escaped
+        return False
+        
+    def text(self) -> str:
+        return "".join(self.parts)
+
+class _ResponseCache:
+    """LRU + TTL cache of normalized analyses, with a nearest-neighbour fallback
+    
+    Exact hits are keyed on a digest of the prompts and bucketed metrics. On a miss, the
+    log-scaled metric vector is compared (cosine) against cached entries of the
+    same language and the closest one is served if it clears the threshold.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, threshold: float = 0.98):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        # key -> [expires_at, language, unit vector, analysis, hits]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        # Stacked vectors for the similarity search, rebuilt lazily after changes
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        
+    @staticmethod
+    def key_for(metrics: CodeMetrics) -> Tuple[str, str, np.ndarray]:
+        """Return (exact key, language, unit vector) for a session's metrics"""
+        values = [max(float(getattr(metrics, name) or 0), 0.0) for name in _CACHE_FIELDS]
+        language = str(metrics.language).lower()
+        hasher = _KEY_SEED.copy()
+        hasher.update("|".join(_bucket_metrics(metrics).values()).lower().encode())
+        key = hasher.hexdigest()
+        vector = np.log1p(values)
+        norm = np.linalg.norm(vector)
+        return key, language, vector / norm if norm else vector
+        
+    def get(self, key: str, language: str, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None:
+            key = self._nearest(language, vector, now)
+            if key is None:
+                return None
+            entry = self._entries[key]
+        elif entry[0] < now:
+            self._evict(key)
+            return None
+        
+        self._entries.move_to_end(key)
+        entry[4] += 1
+        return dict(entry[3], cache_hits=entry[4])
+        
+    def put(self, key: str, language: str, vector: np.ndarray, analysis: Dict[str, Any]):
+        if key in self._entries:
+            self._evict(key)
+        while len(self._entries) >= self.max_entries:
+            self._evict(next(iter(self._entries)))
+        self._entries[key] = [time.monotonic() + self.ttl, language, vector, analysis, 0]
+        self._matrix = None
+        
+    def _evict(self, key: str):
+        del self._entries[key]
+        self._matrix = None
+        
+    def _nearest(self, language: str, vector: np.ndarray, now: float) -> Optional[str]:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._entries[key][2] for key in self._keys])
+        
+        similarity = self._matrix @ vector
+        for index in np.argsort(similarity)[::-1]:
+            if similarity[index] < self.threshold:
+                return None
+            entry = self._entries[self._keys[index]]
+            if entry[1] == language and entry[0] >= now:
+                return self._keys[index]
+        return None
+
 class GroqAIService:
     """Service for Groq API integration"""
     
@@ -27,25 +390,48 @@ class GroqAIService:
         self.base_url = config.GROQ_BASE_URL
         self.client = None
         self._initialized = False
+        # Pre-encoded request bodies around the per-call user message
+        self._analysis_envelope = _build_envelope(self.model, _SYSTEM_SCHEMA_PROMPT, 0.3)
+        self._analysis_stream_envelope = _build_envelope(self.model, _SYSTEM_SCHEMA_PROMPT, 0.3, stream=True)
+        self._poet_envelope = _build_envelope(self.model, _POET_SYSTEM_PROMPT, 0.7)
+        self._cache = _ResponseCache()
+        # Planet descriptions by _description_key; planets that look alike share a poem
+        self._desc_cache: TTLCache = TTLCache(maxsize=2048, ttl=86400)
+        # Cache key -> future of the request already in flight for it
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Bounds concurrent completions sharing the HTTP/2 pool
+        self._sem = asyncio.Semaphore(32)
+        # Shared L2 behind the in-process cache, so every worker benefits from any worker's result
+        self._l2 = Redis.from_url(config.redis_url, socket_timeout=0.1, socket_connect_timeout=0.1)
+        self._l2_retry_at = 0.0
         
     async def initialize(self):
         """Initialize the Groq service"""
+        if self._initialized:
+            # One client per process; later callers reuse the warm pool
+            return True
+        
         if not self.api_key:
             logger.warning("⚠️  Groq API key not provided. AI analysis will use fallback methods.")
             return False
             
         try:
+            # HTTP/2 multiplexes concurrent analyses over one kept-alive TLS connection;
+            # per-stage timeouts fail a stalled connect or pool wait fast
             self.client = httpx.AsyncClient(
                 base_url=self.base_url,
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json"
                 },
-                timeout=30.0
+                http2=True,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60.0),
+                timeout=httpx.Timeout(connect=2.0, read=20.0, write=5.0, pool=1.0)
             )
             
-            # Test connection
+            # Test connection, then warm the pool so the first analysis skips the TLS handshake
             await self._test_connection()
+            await self._warm_pool()
             self._initialized = True
             logger.success("✅ Groq AI Service initialized successfully")
             return True
@@ -57,16 +443,27 @@ class GroqAIService:
     async def _test_connection(self):
         """Test Groq API connection"""
         try:
-            response = await self.client.post("/chat/completions", json={
+            response = await self.client.post("/chat/completions", content=orjson.dumps({
                 "model": self.model,
                 "messages": [{"role": "user", "content": "Test connection"}],
                 "max_tokens": 10
-            })
+            }))
             response.raise_for_status()
             logger.info("🚀 Groq API connection successful")
         except Exception as e:
             raise Exception(f"Groq API connection failed: {e}")
     
+    async def _warm_pool(self, connections: int = 4):
+        """Open keep-alive connections with a few parallel one-token completions"""
+        await asyncio.gather(*(
+            self._post_completion(orjson.dumps({
+                "model": self.model,
+                "messages": [{"role": "user", "content": "ping"}],
+                "max_tokens": 1
+            }))
+            for _ in range(connections)
+        ), return_exceptions=True)
+    
     async def test_connection(self) -> bool:
         """Public method to test connection"""
         try:
@@ -76,36 +473,95 @@ class GroqAIService:
             logger.warning(f"Connection test failed: {e}")
             return False
     
+    async def _post_completion(self, body: bytes) -> Dict[str, Any]:
+        """POST an encoded chat completion request and return the decoded response body"""
+        async with self._sem:
+            response = await self.client.post("/chat/completions", content=body)
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    async def _stream_completion(self, body: bytes) -> str:
+        """Stream a chat completion and return its content
+        
+        Stops reading as soon as the first top-level JSON object in the content is
+        complete; closing the stream early skips any trailing tokens the model emits.
+        """
+        scanner = _JsonObjectScanner()
+        parts: List[str] = []
+        async with self._sem:
+            async with self.client.stream(
+                "POST", "/chat/completions", content=body
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]
+                    if data == "[DONE]":
+                        break
+                    delta = orjson.loads(data)["choices"][0]["delta"].get("content")
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    if scanner.feed(delta):
+                        return scanner.text()
+        return "".join(parts)
+    
+    async def analyze_many(self, metrics_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze sessions as concurrent individual requests multiplexed over the pool"""
+        return list(await asyncio.gather(*(self.analyze_code_behavior(metrics) for metrics in metrics_list)))
+    
     async def analyze_code_behavior(self, code_metrics: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze coding behavior using Groq AI"""
-        
-        if not self._initialized:
+        return await self._analyze(CodeMetrics.from_dict(code_metrics))
+    
+    async def _analyze(self, code_metrics: CodeMetrics) -> Dict[str, Any]:
+        if not self._initialized or _is_trivial(code_metrics):
             return self._fallback_analysis(code_metrics)
         
+        key, language, vector = self._cache.key_for(code_metrics)
+        cached = self._cache.get(key, language, vector)
+        if cached is not None:
+            return cached
+        
+        # Concurrent misses for the same key share one request
+        pending = self._pending.get(key)
+        if pending is not None:
+            return dict(await asyncio.shield(pending))
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            analysis = (await self._l2_get([key]))[0]
+            if analysis is not None:
+                self._cache.put(key, language, vector, analysis)
+            else:
+                analysis = await self._request_analysis(code_metrics)
+                if "analysis_method" not in analysis:
+                    self._cache.put(key, language, vector, analysis)
+                    await self._l2_set({key: analysis})
+            future.set_result(analysis)
+            return dict(analysis)
+        finally:
+            del self._pending[key]
+            if not future.done():
+                future.cancel()
+    
+    async def _request_analysis(self, code_metrics: CodeMetrics) -> Dict[str, Any]:
+        """Run one Groq analysis request, falling back to heuristics on failure"""
+        
         try:
             start_time = time.time()
             
             # Create prompt for code behavior analysis
             prompt = self._create_analysis_prompt(code_metrics)
             
-            response = await self.client.post("/chat/completions", json={
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "system", 
-                        "content": "You are a code behavior analyst. Analyze coding patterns and return JSON only."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 1000,
-                "temperature": 0.3
-            })
-            
-            response.raise_for_status()
-            result = response.json()
+            content = await self._stream_completion(_fill_envelope(
+                self._analysis_stream_envelope, prompt, min(1000, 200 + int(code_metrics.lines))
+            ))
             
             # Extract and parse the AI response
-            analysis = self._parse_ai_response(result)
+            analysis = self._parse_ai_response(content)
             
             # Add performance metrics
             analysis["ai_analysis_time_ms"] = int((time.time() - start_time) * 1000)
@@ -118,128 +574,148 @@ class GroqAIService:
             logger.error(f"Groq analysis failed: {e}")
             return self._fallback_analysis(code_metrics)
     
-    def _create_analysis_prompt(self, metrics: Dict[str, Any]) -> str:
+    async def analyze_code_behavior_batch(self, metrics_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze several coding sessions with a single Groq request"""
+        return await self._analyze_batch([CodeMetrics.from_dict(metrics) for metrics in metrics_list])
+    
+    async def _analyze_batch(self, metrics_list: List[CodeMetrics]) -> List[Dict[str, Any]]:
+        if len(metrics_list) == 1:
+            return [await self._analyze(metrics_list[0])]
+        
+        if not self._initialized:
+            return self._fallback_analysis_batch(metrics_list)
+        
+        # Serve trivial sessions and cache hits directly; only the misses go into the batch prompt
+        keys = [self._cache.key_for(metrics) for metrics in metrics_list]
+        results = [
+            self._fallback_analysis(metrics) if _is_trivial(metrics) else self._cache.get(*key)
+            for metrics, key in zip(metrics_list, keys)
+        ]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            shared = await self._l2_get([keys[i][0] for i in misses])
+            for i, analysis in zip(misses, shared):
+                if analysis is not None:
+                    self._cache.put(*keys[i], analysis)
+                    results[i] = dict(analysis)
+            misses = [i for i in misses if results[i] is None]
+        if misses and len(misses) < len(metrics_list):
+            fresh = await self._analyze_batch([metrics_list[i] for i in misses])
+            for i, analysis in zip(misses, fresh):
+                results[i] = analysis
+        if len(misses) < len(metrics_list):
+            return results
+        
+        try:
+            start_time = time.time()
+            
+            prompt = self._create_batch_analysis_prompt(metrics_list)
+            
+            result = await self._post_completion(_fill_envelope(
+                self._analysis_envelope, prompt, min(1000 * len(metrics_list), 8000)
+            ))
+            
+            analyses = orjson.loads(self._extract_json(result["choices"][0]["message"]["content"]))
+            if not isinstance(analyses, list) or len(analyses) != len(metrics_list):
+                raise ValueError(f"Expected {len(metrics_list)} analyses, got {type(analyses).__name__}")
+            
+            analysis_time_ms = int((time.time() - start_time) * 1000)
+            results = []
+            for analysis, key in zip(analyses, keys):
+                normalized = self._normalize_analysis(analysis)
+                normalized["ai_analysis_time_ms"] = analysis_time_ms
+                normalized["model_used"] = self.model
+                self._cache.put(*key, normalized)
+                results.append(dict(normalized))
+            await self._l2_set({key[0]: result for key, result in zip(keys, results)})
+            
+            logger.info(f"🧠 Groq batch analysis of {len(results)} sessions completed in {analysis_time_ms}ms")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Groq batch analysis failed: {e}")
+            return self._fallback_analysis_batch(metrics_list)
+    
+    def _create_analysis_prompt(self, metrics: CodeMetrics) -> str:
         """Create analysis prompt for Groq"""
         
-        prompt = f"""
-Analyze this coding session and provide insights:
-
-Code Metrics:
-- Lines of code: {metrics.get('lines', 0)}
-- Functions created: {metrics.get('functions', 0)}
-- Comments: {metrics.get('comments', 0)}
-- Complexity score: {metrics.get('complexity', 1)}
-- Language: {metrics.get('language', 'unknown')}
-- Time spent: {metrics.get('duration_minutes', 0)} minutes
-- Keystrokes: {metrics.get('keystrokes', 0)}
-
-Return a JSON object with this exact structure:
-{{
-  "coding_style": "methodical|pragmatic|artistic|complex|minimal",
-  "personality_traits": ["trait1", "trait2", "trait3"],
-  "skill_assessment": {{
-    "algorithm_mastery": 0.0-100.0,
-    "web_development": 0.0-100.0,
-    "api_design": 0.0-100.0,
-    "devops_skills": 0.0-100.0,
-    "security_awareness": 0.0-100.0
-  }},
-  "planet_characteristics": {{
-    "atmosphere": "neon|crystalline|stormy|clear|toxic",
-    "terrain": "rocky|liquid|crystalline|volcanic|metallic",
-    "primary_color": "#hexcolor",
-    "evolution_stage": "protoplanet|young_world|mature_planet|ancient_world"
-  }},
-  "achievements_earned": ["achievement_id1", "achievement_id2"],
-  "insights": ["insight1", "insight2", "insight3"]
-}}
+        return _PROMPT_TMPL.format_map(_bucket_metrics(metrics))
+    
+    def _create_batch_analysis_prompt(self, metrics_list: List[CodeMetrics]) -> str:
+        """Create one analysis prompt covering several coding sessions"""
+        
+        sessions = "\n".join(
+            _SESSION_TMPL.format(i, **_bucket_metrics(metrics))
+            for i, metrics in enumerate(metrics_list, 1)
+        )
+        
+        prompt = f"""{len(metrics_list)} independent coding sessions:
+{sessions}
 """
         return prompt
     
-    def _parse_ai_response(self, response: Dict) -> Dict[str, Any]:
-        """Parse Groq AI response"""
+    def _parse_ai_response(self, content: str) -> Dict[str, Any]:
+        """Parse Groq AI response content"""
         
         try:
-            content = response["choices"][0]["message"]["content"]
-            
-            # Extract JSON from response (handle markdown formatting)
-            if "```json" in content:
-                json_start = content.find("```json") + 7
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            elif "```" in content:
-                json_start = content.find("```") + 3
-                json_end = content.find("```", json_start)
-                content = content[json_start:json_end].strip()
-            
-            analysis = json.loads(content)
+            analysis = orjson.loads(self._extract_json(content))
             
             # Validate and normalize the response
             return self._normalize_analysis(analysis)
             
         except Exception as e:
             logger.error(f"Failed to parse AI response: {e}")
-            return self._fallback_analysis({})
+            return self._fallback_analysis(_EMPTY_METRICS)
+    
+    def _extract_json(self, content: str) -> str:
+        """Extract JSON from response (handle markdown formatting)"""
+        
+        match = _FENCE_RE.search(content)
+        return match.group(1) if match else content
     
     def _normalize_analysis(self, analysis: Dict) -> Dict[str, Any]:
         """Normalize AI analysis response"""
         
+        skills = analysis.get("skill_assessment") or {}
+        algorithm = min(skills.get("algorithm_mastery", 10.0) / 10, 5.0)
+        web = min(skills.get("web_development", 10.0) / 10, 5.0)
+        api = min(skills.get("api_design", 10.0) / 10, 5.0)
+        devops = min(skills.get("devops_skills", 10.0) / 10, 5.0)
+        security = min(skills.get("security_awareness", 10.0) / 10, 5.0)
+        
         normalized = {
             "coding_style": analysis.get("coding_style", "pragmatic"),
-            "personality_traits": analysis.get("personality_traits", ["focused", "methodical"]),
+            "personality_traits": analysis.get("personality_traits") or _DEFAULT_TRAITS,
             "skill_deltas": {
-                "algorithm_mastery": min(analysis.get("skill_assessment", {}).get("algorithm_mastery", 10.0) / 10, 5.0),
-                "web_development_skill": min(analysis.get("skill_assessment", {}).get("web_development", 10.0) / 10, 5.0),
-                "api_design_discipline": min(analysis.get("skill_assessment", {}).get("api_design", 10.0) / 10, 5.0),
-                "devops_maturity": min(analysis.get("skill_assessment", {}).get("devops_skills", 10.0) / 10, 5.0),
-                "security_awareness": min(analysis.get("skill_assessment", {}).get("security_awareness", 10.0) / 10, 5.0)
+                "algorithm_mastery": algorithm,
+                "web_development_skill": web,
+                "api_design_discipline": api,
+                "devops_maturity": devops,
+                "security_awareness": security
             },
-            "planet_updates": analysis.get("planet_characteristics", {
-                "atmosphere": "clear",
-                "terrain": "rocky",
-                "primary_color": "#3b82f6",
-                "evolution_stage": "young_world"
-            }),
-            "achievements_earned": analysis.get("achievements_earned", []),
-            "ai_insights": analysis.get("insights", ["Great coding session!"]),
-            "evolution_points": sum([
-                min(analysis.get("skill_assessment", {}).get("algorithm_mastery", 10.0) / 10, 5.0),
-                min(analysis.get("skill_assessment", {}).get("web_development", 10.0) / 10, 5.0),
-                min(analysis.get("skill_assessment", {}).get("api_design", 10.0) / 10, 5.0),
-                min(analysis.get("skill_assessment", {}).get("devops_skills", 10.0) / 10, 5.0),
-                min(analysis.get("skill_assessment", {}).get("security_awareness", 10.0) / 10, 5.0)
-            ])
+            "planet_updates": analysis.get("planet_characteristics") or _DEFAULT_PLANET_UPDATES,
+            "achievements_earned": analysis.get("achievements_earned") or (),
+            "ai_insights": analysis.get("insights") or _DEFAULT_INSIGHTS,
+            "evolution_points": algorithm + web + api + devops + security
         }
         
         return normalized
     
-    def _fallback_analysis(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+    def _fallback_analysis(self, metrics: CodeMetrics) -> Dict[str, Any]:
         """Fallback analysis when Groq is unavailable"""
         
-        lines = metrics.get("lines", 0)
-        functions = metrics.get("functions", 0)
-        comments = metrics.get("comments", 0)
-        complexity = metrics.get("complexity", 1)
-        
         # Simple heuristic analysis
-        comment_ratio = comments / max(lines, 1)
-        function_density = functions / max(lines, 1)
-        
-        # Determine coding style
-        if comment_ratio > 0.15:
-            style = "methodical"
-        elif function_density > 0.1:
-            style = "modular"
-        elif complexity > 5:
-            style = "complex"
-        else:
-            style = "pragmatic"
-        
-        skill_gain = min(complexity * 0.5, 3.0)
+        style_id, skill_gain, _, _ = _fallback_kernel(
+            metrics.lines,
+            metrics.functions,
+            metrics.comments,
+            metrics.complexity
+        )
+        style = _FALLBACK_STYLES[style_id]
         
         return {
             "coding_style": style,
-            "personality_traits": ["focused", "analytical"],
+            "personality_traits": _FALLBACK_TRAITS,
             "skill_deltas": {
                 "algorithm_mastery": skill_gain,
                 "web_development_skill": skill_gain * 0.6,
@@ -247,59 +723,110 @@ Return a JSON object with this exact structure:
                 "devops_maturity": skill_gain * 0.3,
                 "security_awareness": skill_gain * 0.2
             },
-            "planet_updates": {
-                "atmosphere": "clear",
-                "terrain": "rocky",
-                "primary_color": "#3b82f6",
-                "evolution_stage": "young_world"
-            },
+            "planet_updates": _DEFAULT_PLANET_UPDATES,
             "achievements_earned": ["productive_session"] if skill_gain > 2.0 else [],
             "ai_insights": [f"Productive {style} coding session"],
             "evolution_points": skill_gain * 2,
             "analysis_method": "fallback_heuristic"
         }
     
+    def _fallback_analysis_batch(self, metrics_list: List[CodeMetrics]) -> List[Dict[str, Any]]:
+        """Fallback analysis for many sessions, scored column-wise by fallback_batch"""
+        
+        columns = np.array([
+            (m.lines, m.functions, m.comments, m.complexity)
+            for m in metrics_list
+        ], dtype=np.float64).reshape(-1, 4)
+        scores = fallback_batch(columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3])
+        
+        return [
+            {
+                "coding_style": style,
+                "personality_traits": _FALLBACK_TRAITS,
+                "skill_deltas": {
+                    "algorithm_mastery": skill_gain,
+                    "web_development_skill": skill_gain * 0.6,
+                    "api_design_discipline": skill_gain * 0.4,
+                    "devops_maturity": skill_gain * 0.3,
+                    "security_awareness": skill_gain * 0.2
+                },
+                "planet_updates": _DEFAULT_PLANET_UPDATES,
+                "achievements_earned": ["productive_session"] if skill_gain > 2.0 else [],
+                "ai_insights": [f"Productive {style} coding session"],
+                "evolution_points": skill_gain * 2,
+                "analysis_method": "fallback_heuristic"
+            }
+            for style, skill_gain in zip(scores["coding_style"].tolist(), scores["skill_gain"].tolist())
+        ]
+    
     async def generate_planet_description(self, planet_data: Dict[str, Any]) -> str:
         """Generate planet description using Groq AI"""
         
+        key = _description_key(planet_data)
+        cached = self._desc_cache.get(key)
+        if cached is not None:
+            return cached
+        
         if not self._initialized:
-            return f"A {planet_data.get('planet_type', 'mysterious')} planet with {planet_data.get('atmosphere', 'clear')} atmosphere."
+            return _fallback_description(planet_data, key)
         
         try:
-            prompt = f"""
-Create a poetic, inspiring description for a coding planet with these characteristics:
-- Type: {planet_data.get('planet_type', 'terrestrial')}
-- Atmosphere: {planet_data.get('atmosphere', 'clear')}
-- Terrain: {planet_data.get('terrain', 'rocky')}
-- Evolution Stage: {planet_data.get('evolution_stage', 'young_world')}
-- Algorithm Mastery: {planet_data.get('algorithm_mastery', 0)}/100
-- Web Development: {planet_data.get('web_development_skill', 0)}/100
-
-Write 2-3 sentences that capture the essence of this coder's planet. Be creative and inspiring.
-"""
-            
-            response = await self.client.post("/chat/completions", json={
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": "You are a cosmic poet describing unique coding planets."},
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 200,
-                "temperature": 0.7
-            })
+            prompt = _PLANET_TMPL.format(
+                planet_type=planet_data.get("planet_type", "terrestrial"),
+                atmosphere=planet_data.get("atmosphere", "clear"),
+                terrain=planet_data.get("terrain", "rocky"),
+                evolution_stage=planet_data.get("evolution_stage", "young_world"),
+                algorithm_mastery=planet_data.get("algorithm_mastery", 0),
+                web_development_skill=planet_data.get("web_development_skill", 0)
+            )
             
-            response.raise_for_status()
-            result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
+            result = await self._post_completion(_fill_envelope(self._poet_envelope, prompt, 200))
+            description = result["choices"][0]["message"]["content"].strip()
+            self._desc_cache[key] = description
+            return description
             
         except Exception as e:
             logger.error(f"Failed to generate planet description: {e}")
-            return f"A magnificent {planet_data.get('planet_type', 'world')} where code flows like cosmic rivers."
+            return _fallback_description(planet_data, key)
+    
+    def is_generated_description(self, planet_data: Dict[str, Any], description: str) -> bool:
+        """True when description is a Groq completion rather than a fallback template"""
+        # Only successful completions are memoized, so the memo tells the two apart
+        return self._desc_cache.get(_description_key(planet_data)) == description
+    
+    async def _l2_get(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Look analyses up in Redis; all misses while Redis is unreachable"""
+        if time.monotonic() < self._l2_retry_at:
+            return [None] * len(keys)
+        try:
+            values = await self._l2.mget([_L2_PREFIX + key for key in keys])
+        except Exception as e:
+            self._l2_unavailable(e)
+            return [None] * len(keys)
+        return [orjson.loads(value) if value is not None else None for value in values]
+    
+    async def _l2_set(self, analyses: Dict[str, Dict[str, Any]]):
+        """Share fresh analyses with the other workers"""
+        if time.monotonic() < self._l2_retry_at:
+            return
+        try:
+            async with self._l2.pipeline(transaction=False) as pipe:
+                for key, analysis in analyses.items():
+                    pipe.setex(_L2_PREFIX + key, _L2_TTL, orjson.dumps(analysis))
+                await pipe.execute()
+        except Exception as e:
+            self._l2_unavailable(e)
+    
+    def _l2_unavailable(self, error: Exception):
+        # Back off instead of paying a connect timeout on every analysis
+        logger.warning(f"Redis analysis cache unavailable, retrying in {_L2_RETRY_SECONDS}s: {error}")
+        self._l2_retry_at = time.monotonic() + _L2_RETRY_SECONDS
     
     async def cleanup(self):
         """Cleanup resources"""
         if self.client:
             await self.client.aclose()
+        await self._l2.aclose()
         logger.info("🧹 Groq AI Service cleaned up")
 
 # Global service instance
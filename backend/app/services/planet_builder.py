@@ -4,17 +4,23 @@ Planet Builder Service - Creates unique coding planets using AI
 """
 
 import random
+import sys
+import math
+import time
 import json
 import asyncio
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
-from datetime import datetime
+import functools
+from typing import Dict, List, NamedTuple, Optional, Any, Tuple
+from dataclasses import dataclass
+from datetime import datetime, timezone
 import hashlib
+import numpy as np
 from loguru import logger
 
 from .groq_ai import groq_service
+from . import ai_cache
 
-@dataclass
+@dataclass(slots=True)
 class PlanetCharacteristics:
     """Planet visual and behavioral characteristics"""
     name: str
@@ -30,8 +36,28 @@ class PlanetCharacteristics:
     color_palette: List[str]
     evolution_stage: str  # "nascent", "developing", "mature", "advanced", "transcendent"
     coding_influence: Dict[str, str]  # How coding style affects planet
+    description: str = ""  # Groq-written prose; empty for procedural planets
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict form; only the mutable containers are copied"""
+        return {
+            "name": self.name,
+            "terrain_type": self.terrain_type,
+            "atmosphere": self.atmosphere,
+            "climate": self.climate,
+            "size": self.size,
+            "orbital_period": self.orbital_period,
+            "moons": self.moons,
+            "rings": self.rings,
+            "life_forms": list(self.life_forms),
+            "special_features": list(self.special_features),
+            "color_palette": list(self.color_palette),
+            "evolution_stage": self.evolution_stage,
+            "coding_influence": dict(self.coding_influence),
+            "description": self.description
+        }
 
-@dataclass
+@dataclass(slots=True)
 class PlanetPersonality:
     """Planet's behavioral traits and preferences"""
     dominant_traits: List[str]
@@ -43,13 +69,133 @@ class PlanetPersonality:
     stability_preference: float  # 0.0 - 1.0 (vs experimentation)
     documentation_inclination: float  # 0.0 - 1.0
     optimization_focus: str  # "performance", "readability", "maintainability", "innovation"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict form; only the mutable containers are copied"""
+        return {
+            "dominant_traits": list(self.dominant_traits),
+            "learning_speed": self.learning_speed,
+            "adaptation_style": self.adaptation_style,
+            "complexity_preference": self.complexity_preference,
+            "collaboration_tendency": self.collaboration_tendency,
+            "innovation_drive": self.innovation_drive,
+            "stability_preference": self.stability_preference,
+            "documentation_inclination": self.documentation_inclination,
+            "optimization_focus": self.optimization_focus
+        }
+
+# Language families checked in priority order by _infer_terrain
+_WEB_LANGS = frozenset({"python", "javascript", "typescript"})
+_ENTERPRISE_LANGS = frozenset({"java", "c#", "kotlin"})
+_SYSTEMS_LANGS = frozenset({"c", "c++", "rust", "go"})
+_FUNCTIONAL_LANGS = frozenset({"haskell", "lisp", "prolog"})
+_LOW_LEVEL_LANGS = frozenset({"assembly", "embedded"})
+
+_STYLE_TERRAINS = {
+    "minimalist": "desert",
+    "experimental": "gaseous",
+    "methodical": "crystalline",
+    "rapid": "volcanic"
+}
+
+_EXPERIENCE_STAGES = {
+    "beginner": "nascent",
+    "intermediate": "developing",
+    "advanced": "mature",
+    "expert": "advanced"
+}
+
+@functools.lru_cache(maxsize=2048)
+def _infer_terrain(languages: Tuple[str, ...], style: str, project_types: Tuple[str, ...]) -> str:
+    """Infer planet terrain from user coding preferences (languages/project_types as sorted tuples)"""
+    
+    # Language-based terrain inference
+    langs = frozenset(languages)
+    if not langs.isdisjoint(_WEB_LANGS):
+        return "oceanic" if "web" in project_types else "forest"
+    elif not langs.isdisjoint(_ENTERPRISE_LANGS):
+        return "crystalline"
+    elif not langs.isdisjoint(_SYSTEMS_LANGS):
+        return "volcanic"
+    elif not langs.isdisjoint(_FUNCTIONAL_LANGS):
+        return "gaseous"
+    elif not langs.isdisjoint(_LOW_LEVEL_LANGS):
+        return "desert"
+    
+    # Style-based inference
+    return _STYLE_TERRAINS.get(style, "forest")
+
+@functools.lru_cache(maxsize=4096)
+def _short_hash(s: str, n: int) -> str:
+    """First n hex chars of a BLAKE2b digest of s (ids/name tags are opaque, not security-sensitive)"""
+    return hashlib.blake2b(s.encode(), digest_size=(n + 1) // 2).hexdigest()[:n]
+
+_last_ts_sec = 0
+_last_ts_iso = ""
+
+def _iso_now() -> str:
+    """Current UTC time as ISO 8601, formatted at most once per wall-clock second"""
+    global _last_ts_sec, _last_ts_iso
+    t = int(time.time())
+    if t != _last_ts_sec:
+        _last_ts_sec = t
+        _last_ts_iso = datetime.fromtimestamp(t, tz=timezone.utc).isoformat()
+    return _last_ts_iso
+
+def _rng_for(username: str) -> random.Random:
+    """Per-request generator seeded from the username, so repeat generations are reproducible"""
+    return random.Random(int(_short_hash(username, 16), 16))
+
+@functools.lru_cache(maxsize=2048)
+def _evolution_stage(experience: str) -> str:
+    """Determine planet evolution stage"""
+    return _EXPERIENCE_STAGES.get(experience, "developing")
+
+# Initial skill model: (base + terrain bonus) * experience multiplier, columns in _SKILL_ORDER
+_SKILL_ORDER = ("algorithm_mastery", "web_development_skill", "api_design_discipline", "devops_maturity", "security_awareness")
+_TERRAIN_ORDER = tuple(sys.intern(t) for t in ("volcanic", "oceanic", "crystalline", "forest", "desert", "arctic", "gaseous"))
+_TERRAIN_INDEX = {terrain: i for i, terrain in enumerate(_TERRAIN_ORDER)}
+_DEFAULT_TERRAIN_INDEX = _TERRAIN_INDEX["forest"]
+
+_BASE = np.array([5.0, 3.0, 2.0, 1.0, 1.5])
+# One row per _TERRAIN_ORDER entry plus a trailing zero row for unknown terrains
+_BONUS_MATRIX = np.array([
+    [3.0, 0.0, 0.0, 2.0, 0.0],  # volcanic
+    [0.0, 4.0, 2.0, 0.0, 0.0],  # oceanic
+    [0.0, 0.0, 3.0, 0.0, 2.0],  # crystalline
+    [2.0, 2.0, 0.0, 0.0, 0.0],  # forest
+    [0.0, 0.0, 0.0, 3.0, 2.0],  # desert
+    [1.0, 0.0, 0.0, 0.0, 3.0],  # arctic
+    [4.0, 0.0, 1.0, 0.0, 0.0],  # gaseous
+    [0.0, 0.0, 0.0, 0.0, 0.0]
+])
+
+_EXP_MUL = {
+    "beginner": 0.8,
+    "intermediate": 1.0,
+    "advanced": 1.3,
+    "expert": 1.6
+}
+
+def _calculate_initial_skills_batch(terrain_idx: np.ndarray, exp_mul: np.ndarray) -> np.ndarray:
+    """Initial skills for many planets at once; returns an (N, 5) array in _SKILL_ORDER"""
+    return (_BASE + _BONUS_MATRIX[terrain_idx]) * exp_mul[:, None]
+
+# Terrain template fields plus the values derived from them, indexed by _TERRAIN_INDEX
+class TerrainTpl(NamedTuple):
+    base_colors: Tuple[str, ...]
+    features: Tuple[str, ...]
+    life_forms: List[str]
+    coding_traits: Tuple[str, ...]
+    first_features: Tuple[str, ...]
+    coding_dict: Dict[str, str]
 
 class PlanetBuilderAPI:
     """AI-powered planet generation service"""
     
-    def __init__(self):
-        self.active = False
-        self.terrain_templates = {
+    def __init__(self) -> None:
+        self.active: bool = False
+        self.terrain_templates: Dict[str, Dict[str, List[str]]] = {
             "volcanic": {
                 "base_colors": ["#FF4500", "#DC143C", "#B22222", "#8B0000"],
                 "features": ["lava_rivers", "geysers", "volcanic_peaks", "ash_clouds"],
@@ -94,12 +240,25 @@ class PlanetBuilderAPI:
             }
         }
         
-    async def start(self):
+        # Per-terrain values derived from the templates, built once instead of per planet
+        self._terrain_tpls: Tuple[TerrainTpl, ...] = tuple(
+            TerrainTpl(
+                base_colors=tuple(tpl["base_colors"]),
+                features=tuple(tpl["features"]),
+                life_forms=tpl["life_forms"],
+                coding_traits=tuple(tpl["coding_traits"]),
+                first_features=tuple(tpl["features"][:2]),
+                coding_dict={t: "active" for t in tpl["coding_traits"]}
+            )
+            for tpl in (self.terrain_templates[terrain] for terrain in _TERRAIN_ORDER)
+        )
+        
+    async def start(self) -> None:
         """Start planet builder service"""
         self.active = True
         logger.info("🌍 Planet Builder API started with Groq AI integration")
         
-    async def stop(self):
+    async def stop(self) -> None:
         """Stop the service"""
         self.active = False
         logger.info("⏹️  Planet Builder API stopped")
@@ -115,20 +274,24 @@ class PlanetBuilderAPI:
             raise Exception("Planet Builder service not active")
         
         try:
-            # Extract user data from genome
+            # Extract user data from genome; list fields are canonicalized to sorted
+            # tuples once so the terrain lookup can be memoized on them
+            langs = tuple(sorted(genome_data.get("preferred_languages", [])))
+            ptypes = tuple(sorted(genome_data.get("project_types", [])))
             user_data = {
                 "username": genome_data.get("username", "Developer"),
-                "preferred_languages": genome_data.get("preferred_languages", []),
+                "preferred_languages": langs,
                 "coding_style": genome_data.get("coding_style", "pragmatic"),
                 "experience_level": genome_data.get("experience_level", "intermediate"),
-                "project_types": genome_data.get("project_types", []),
+                "project_types": ptypes,
                 "personality_hints": genome_data.get("personality_hints", [])
             }
             
             coding_history = genome_data.get("coding_history", {})
+            rng = _rng_for(user_data["username"])
             
             # Generate planet using AI
-            characteristics = await self._generate_planet_with_groq(user_data, coding_history)
+            characteristics = await self._generate_planet_with_groq(user_data, rng, coding_history)
             
             # Generate personality
             personality = await self._generate_planet_personality(characteristics, user_data)
@@ -138,11 +301,11 @@ class PlanetBuilderAPI:
             
             return {
                 "planet_id": self._generate_planet_id(characteristics.name),
-                "characteristics": asdict(characteristics),
-                "personality": asdict(personality),
+                "characteristics": characteristics.to_dict(),
+                "personality": personality.to_dict(),
                 "initial_skills": initial_skills,
                 "generation_method": "groq_ai",
-                "created_at": datetime.utcnow().isoformat()
+                "created_at": _iso_now()
             }
             
         except Exception as e:
@@ -150,7 +313,7 @@ class PlanetBuilderAPI:
             # Fallback to basic generation
             return await self._generate_basic_planet(genome_data)
     
-    async def _generate_planet_with_groq(self, user_data: Dict, coding_history: Optional[Dict] = None) -> PlanetCharacteristics:
+    async def _generate_planet_with_groq(self, user_data: Dict[str, Any], rng: random.Random, coding_history: Optional[Dict[str, Any]] = None) -> PlanetCharacteristics:
         """Generate planet using Groq AI"""
         
         try:
@@ -165,50 +328,59 @@ class PlanetBuilderAPI:
                 "personality_hints": user_data.get("personality_hints", [])
             }
             
-            # Generate planet using Groq
-            planet_result = await groq_service.generate_planet_description(context)
+            # Generate planet using Groq (fallback descriptions are not cached)
+            description = await ai_cache.get_or_generate(
+                "planet_desc", ai_cache.cache_key(context), ai_cache.CACHE_DURATIONS["planet_desc"],
+                lambda: groq_service.generate_planet_description(context),
+                lambda text: groq_service.is_generated_description(context, text)
+            )
             
-            # Build characteristics from AI result
-            return self._build_planet_characteristics(planet_result, user_data)
+            # The description is prose; structured fields come from the terrain template
+            return self._build_planet_characteristics({"description": description}, user_data, rng)
             
         except Exception as e:
             logger.error(f"Groq planet generation failed: {e}")
-            return await self._procedural_generate_planet(user_data, coding_history)
+            return await self._procedural_generate_planet(user_data, rng, coding_history)
     
-    def _build_planet_characteristics(self, ai_data: Dict, user_data: Dict) -> PlanetCharacteristics:
+    def _build_planet_characteristics(self, ai_data: Dict[str, Any], user_data: Dict[str, Any], rng: random.Random) -> PlanetCharacteristics:
         """Build planet characteristics from AI-generated data"""
         
         # Extract AI suggestions with fallbacks
-        terrain_type = ai_data.get("terrain_type", self._infer_terrain_from_user(user_data))
+        terrain_type = ai_data.get("terrain_type") or _infer_terrain(
+            user_data["preferred_languages"], user_data["coding_style"], user_data["project_types"]
+        )
         atmosphere = ai_data.get("atmosphere", "oxygen_rich")
         climate = ai_data.get("climate", "temperate")
         size = ai_data.get("size", "medium")
         
         # Get terrain template
-        terrain_template = self.terrain_templates.get(terrain_type, self.terrain_templates["forest"])
+        idx = _TERRAIN_INDEX.get(terrain_type)
+        if idx is None:
+            idx = _DEFAULT_TERRAIN_INDEX
+        else:
+            terrain_type = _TERRAIN_ORDER[idx]
+        tpl = self._terrain_tpls[idx]
         
         # Generate name
-        name = ai_data.get("name") or self._generate_planet_name(user_data, terrain_type)
+        name = ai_data.get("name") or self._generate_planet_name(user_data, terrain_type, rng)
         
         # Orbital characteristics
-        orbital_period = ai_data.get("orbital_period", random.randint(200, 800))
-        moons = ai_data.get("moons", random.randint(0, 3))
-        rings = ai_data.get("rings", random.choice([True, False]))
+        orbital_period = ai_data.get("orbital_period", rng.randint(200, 800))
+        moons = ai_data.get("moons", rng.randint(0, 3))
+        rings = ai_data.get("rings", rng.choice([True, False]))
         
         # Life forms
-        life_forms = ai_data.get("life_forms", terrain_template["life_forms"])
+        life_forms = ai_data.get("life_forms", tpl.life_forms)
         
         # Special features
-        special_features = ai_data.get("special_features", [])
-        special_features.extend(terrain_template["features"][:2])
+        special_features = [*ai_data.get("special_features", ()), *tpl.first_features]
         
         # Color palette
-        base_colors = terrain_template["base_colors"]
-        accent_colors = ai_data.get("accent_colors", [])
-        color_palette = base_colors + accent_colors
+        accent_colors = ai_data.get("accent_colors", ())
+        color_palette = [*tpl.base_colors, *accent_colors]
         
         # Evolution stage
-        evolution_stage = self._determine_evolution_stage(user_data)
+        evolution_stage = _evolution_stage(user_data["experience_level"])
         
         # Coding influence
         coding_influence = {
@@ -217,7 +389,7 @@ class PlanetBuilderAPI:
             "collaboration_pattern": ai_data.get("collaboration_pattern", "team_oriented"),
             "innovation_tendency": ai_data.get("innovation_tendency", "balanced")
         }
-        coding_influence.update({trait: "active" for trait in terrain_template["coding_traits"]})
+        coding_influence.update(tpl.coding_dict)
         
         return PlanetCharacteristics(
             name=name,
@@ -232,65 +404,36 @@ class PlanetBuilderAPI:
             special_features=special_features,
             color_palette=color_palette,
             evolution_stage=evolution_stage,
-            coding_influence=coding_influence
+            coding_influence=coding_influence,
+            description=ai_data.get("description", "")
         )
     
-    async def _procedural_generate_planet(self, user_data: Dict, coding_history: Optional[Dict]) -> PlanetCharacteristics:
+    async def _procedural_generate_planet(self, user_data: Dict[str, Any], rng: random.Random, coding_history: Optional[Dict[str, Any]]) -> PlanetCharacteristics:
         """Fallback procedural planet generation"""
         
-        terrain_type = self._infer_terrain_from_user(user_data)
-        terrain_template = self.terrain_templates[terrain_type]
-        name = self._generate_planet_name(user_data, terrain_type)
+        terrain_type = _infer_terrain(
+            user_data["preferred_languages"], user_data["coding_style"], user_data["project_types"]
+        )
+        tpl = self._terrain_tpls[_TERRAIN_INDEX[terrain_type]]
+        name = self._generate_planet_name(user_data, terrain_type, rng)
         
         return PlanetCharacteristics(
             name=name,
             terrain_type=terrain_type,
-            atmosphere=random.choice(["oxygen_rich", "methane", "silicon_based", "energy_plasma"]),
-            climate=random.choice(["tropical", "temperate", "arctic", "scorching", "variable"]),
-            size=random.choice(["small", "medium", "large"]),
-            orbital_period=random.randint(200, 800),
-            moons=random.randint(0, 3),
-            rings=random.choice([True, False]),
-            life_forms=terrain_template["life_forms"],
-            special_features=terrain_template["features"][:2],
-            color_palette=terrain_template["base_colors"],
-            evolution_stage=self._determine_evolution_stage(user_data),
-            coding_influence={trait: "active" for trait in terrain_template["coding_traits"]}
+            atmosphere=rng.choice(["oxygen_rich", "methane", "silicon_based", "energy_plasma"]),
+            climate=rng.choice(["tropical", "temperate", "arctic", "scorching", "variable"]),
+            size=rng.choice(["small", "medium", "large"]),
+            orbital_period=rng.randint(200, 800),
+            moons=rng.randint(0, 3),
+            rings=rng.choice([True, False]),
+            life_forms=tpl.life_forms,
+            special_features=list(tpl.first_features),
+            color_palette=list(tpl.base_colors),
+            evolution_stage=_evolution_stage(user_data["experience_level"]),
+            coding_influence=dict(tpl.coding_dict)
         )
     
-    def _infer_terrain_from_user(self, user_data: Dict) -> str:
-        """Infer planet terrain from user coding preferences"""
-        
-        languages = user_data.get("preferred_languages", [])
-        style = user_data.get("coding_style", "pragmatic")
-        project_types = user_data.get("project_types", [])
-        
-        # Language-based terrain inference
-        if any(lang in ["python", "javascript", "typescript"] for lang in languages):
-            if "web" in project_types:
-                return "oceanic"
-            else:
-                return "forest"
-        elif any(lang in ["java", "c#", "kotlin"] for lang in languages):
-            return "crystalline"
-        elif any(lang in ["c", "c++", "rust", "go"] for lang in languages):
-            return "volcanic"
-        elif any(lang in ["haskell", "lisp", "prolog"] for lang in languages):
-            return "gaseous"
-        elif any(lang in ["assembly", "embedded"] for lang in languages):
-            return "desert"
-        
-        # Style-based inference
-        style_map = {
-            "minimalist": "desert",
-            "experimental": "gaseous",
-            "methodical": "crystalline",
-            "rapid": "volcanic"
-        }
-        
-        return style_map.get(style, "forest")
-    
-    def _generate_planet_name(self, user_data: Dict, terrain_type: str) -> str:
+    def _generate_planet_name(self, user_data: Dict[str, Any], terrain_type: str, rng: random.Random) -> str:
         """Generate unique planet name"""
         
         terrain_prefixes = {
@@ -305,69 +448,25 @@ class PlanetBuilderAPI:
         
         suffixes = ["prime", "nova", "core", "sphere", "world", "realm", "haven", "forge"]
         
-        user_hash = hashlib.md5(user_data.get("username", "dev").encode()).hexdigest()[:6]
-        prefix = random.choice(terrain_prefixes[terrain_type])
-        suffix = random.choice(suffixes)
+        user_hash = _short_hash(user_data.get("username", "dev"), 6)
+        prefix = rng.choice(terrain_prefixes[terrain_type])
+        suffix = rng.choice(suffixes)
         
         return f"{prefix}-{suffix}-{user_hash}"
     
-    def _determine_evolution_stage(self, user_data: Dict) -> str:
-        """Determine planet evolution stage"""
-        
-        experience_map = {
-            "beginner": "nascent",
-            "intermediate": "developing",
-            "advanced": "mature",
-            "expert": "advanced"
-        }
-        
-        experience = user_data.get("experience_level", "beginner")
-        return experience_map.get(experience, "developing")
-    
     def _generate_planet_id(self, planet_name: str) -> str:
         """Generate unique planet ID"""
-        return f"planet_{hashlib.md5(planet_name.encode()).hexdigest()[:12]}"
+        return f"planet_{_short_hash(planet_name, 12)}"
     
-    def _calculate_initial_skills(self, characteristics: PlanetCharacteristics, user_data: Dict) -> Dict[str, float]:
+    def _calculate_initial_skills(self, characteristics: PlanetCharacteristics, user_data: Dict[str, Any]) -> Dict[str, float]:
         """Calculate initial skill levels based on planet and user data"""
         
-        base_skills = {
-            "algorithm_mastery": 5.0,
-            "web_development_skill": 3.0,
-            "api_design_discipline": 2.0,
-            "devops_maturity": 1.0,
-            "security_awareness": 1.5
-        }
-        
-        # Adjust based on terrain type
-        terrain_bonuses = {
-            "volcanic": {"algorithm_mastery": 3.0, "devops_maturity": 2.0},
-            "oceanic": {"web_development_skill": 4.0, "api_design_discipline": 2.0},
-            "crystalline": {"api_design_discipline": 3.0, "security_awareness": 2.0},
-            "forest": {"algorithm_mastery": 2.0, "web_development_skill": 2.0},
-            "desert": {"devops_maturity": 3.0, "security_awareness": 2.0},
-            "arctic": {"security_awareness": 3.0, "algorithm_mastery": 1.0},
-            "gaseous": {"algorithm_mastery": 4.0, "api_design_discipline": 1.0}
-        }
-        
-        bonuses = terrain_bonuses.get(characteristics.terrain_type, {})
-        
-        for skill, bonus in bonuses.items():
-            base_skills[skill] += bonus
-        
-        # Adjust based on experience
-        experience_multipliers = {
-            "beginner": 0.8,
-            "intermediate": 1.0,
-            "advanced": 1.3,
-            "expert": 1.6
-        }
-        
-        multiplier = experience_multipliers.get(user_data.get("experience_level", "beginner"), 1.0)
-        
-        return {skill: value * multiplier for skill, value in base_skills.items()}
+        terrain_idx = _TERRAIN_INDEX.get(characteristics.terrain_type, len(_TERRAIN_ORDER))
+        multiplier = _EXP_MUL.get(user_data.get("experience_level", "beginner"), 1.0)
+        skills = _calculate_initial_skills_batch(np.array([terrain_idx]), np.array([multiplier]))[0]
+        return dict(zip(_SKILL_ORDER, skills.tolist()))
     
-    async def _generate_planet_personality(self, characteristics: PlanetCharacteristics, user_data: Dict) -> PlanetPersonality:
+    async def _generate_planet_personality(self, characteristics: PlanetCharacteristics, user_data: Dict[str, Any]) -> PlanetPersonality:
         """Generate planet personality traits"""
         
         terrain_personalities = {
@@ -440,10 +539,11 @@ class PlanetBuilderAPI:
         """Fallback basic planet generation"""
         
         terrain_types = ["volcanic", "oceanic", "crystalline", "forest", "desert", "arctic", "gaseous"]
-        terrain = random.choice(terrain_types)
+        rng = _rng_for(genome_data.get("username", "Developer"))
+        terrain = rng.choice(terrain_types)
         
         return {
-            "planet_id": f"basic_planet_{random.randint(1000, 9999)}",
+            "planet_id": f"basic_planet_{rng.randint(1000, 9999)}",
             "characteristics": {
                 "name": f"Basic-{terrain.title()}-World",
                 "terrain_type": terrain,
@@ -469,47 +569,83 @@ class PlanetBuilderAPI:
         if not self.active:
             raise Exception("Planet Builder service not active")
         
+        # Calculate evolution points
+        evolution_points = math.fsum(skill_deltas.values())
+        
         try:
-            # Calculate evolution points
-            evolution_points = sum(skill_deltas.values())
-            
-            # Determine if major evolution occurred
-            major_evolution = evolution_points > 10.0
-            visual_changes = evolution_points > 5.0
-            
-            # Use Groq for evolution analysis if major changes
-            if major_evolution:
-                evolution_analysis = await groq_service.analyze_code_behavior({
-                    "skill_deltas": skill_deltas,
-                    "evolution_points": evolution_points,
-                    "planet_id": planet_id
-                })
-                
-                planet_updates = evolution_analysis.get("planet_updates", {})
+            # Use Groq for evolution analysis only if major changes occurred
+            if evolution_points > 10.0:
+                planet_updates = await self._analyze_evolution(planet_id, skill_deltas, evolution_points)
             else:
                 planet_updates = {}
-            
-            return {
-                "planet_id": planet_id,
-                "evolution_applied": True,
-                "points_earned": evolution_points,
-                "stage_changed": major_evolution,
-                "visual_updated": visual_changes,
-                "new_features": planet_updates.get("new_features", []),
-                "skill_bonuses": planet_updates.get("skill_bonuses", {}),
-                "evolution_method": "groq_ai" if major_evolution else "standard"
-            }
+            return self._evolution_result(planet_id, evolution_points, planet_updates)
             
         except Exception as e:
             logger.error(f"Planet evolution failed: {e}")
-            
-            # Fallback evolution
-            evolution_points = sum(skill_deltas.values())
-            return {
-                "planet_id": planet_id,
-                "evolution_applied": True,
-                "points_earned": evolution_points,
-                "stage_changed": evolution_points > 10,
-                "visual_updated": evolution_points > 3,
-                "evolution_method": "fallback"
-            }
\ No newline at end of file
+            return self._fallback_evolution(planet_id, evolution_points)
+    
+    async def evolve_planets(self, deltas: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
+        """Apply evolution to many planets at once; Groq analyses for major evolutions run concurrently"""
+        
+        if not self.active:
+            raise Exception("Planet Builder service not active")
+        
+        planet_ids = list(deltas)
+        skills = sorted({skill for skill_deltas in deltas.values() for skill in skill_deltas})
+        column = {skill: j for j, skill in enumerate(skills)}
+        
+        arr = np.zeros((len(planet_ids), len(skills)))
+        for i, planet_id in enumerate(planet_ids):
+            for skill, delta in deltas[planet_id].items():
+                arr[i, column[skill]] = delta
+        totals = arr.sum(axis=1)
+        points = totals.tolist()
+        major = np.flatnonzero(totals > 10.0).tolist()
+        
+        analyses = await asyncio.gather(
+            *(self._analyze_evolution(planet_ids[i], deltas[planet_ids[i]], points[i]) for i in major),
+            return_exceptions=True
+        )
+        updates: Dict[int, Any] = dict(zip(major, analyses))
+        
+        results = []
+        for i, planet_id in enumerate(planet_ids):
+            planet_updates = updates.get(i, {})
+            if isinstance(planet_updates, Exception):
+                logger.error(f"Planet evolution failed for {planet_id}: {planet_updates}")
+                results.append(self._fallback_evolution(planet_id, points[i]))
+            else:
+                results.append(self._evolution_result(planet_id, points[i], planet_updates))
+        return results
+    
+    async def _analyze_evolution(self, planet_id: str, skill_deltas: Dict[str, float], evolution_points: float) -> Dict[str, Any]:
+        """Groq planet updates for a major evolution"""
+        evolution_analysis = await groq_service.analyze_code_behavior({
+            "skill_deltas": skill_deltas,
+            "evolution_points": evolution_points,
+            "planet_id": planet_id
+        })
+        return evolution_analysis.get("planet_updates", {})
+    
+    def _evolution_result(self, planet_id: str, evolution_points: float, planet_updates: Dict[str, Any]) -> Dict[str, Any]:
+        major_evolution = evolution_points > 10.0
+        return {
+            "planet_id": planet_id,
+            "evolution_applied": True,
+            "points_earned": evolution_points,
+            "stage_changed": major_evolution,
+            "visual_updated": evolution_points > 5.0,
+            "new_features": planet_updates.get("new_features", []),
+            "skill_bonuses": planet_updates.get("skill_bonuses", {}),
+            "evolution_method": "groq_ai" if major_evolution else "standard"
+        }
+    
+    def _fallback_evolution(self, planet_id: str, evolution_points: float) -> Dict[str, Any]:
+        return {
+            "planet_id": planet_id,
+            "evolution_applied": True,
+            "points_earned": evolution_points,
+            "stage_changed": evolution_points > 10,
+            "visual_updated": evolution_points > 3,
+            "evolution_method": "fallback"
+        }
@@ -4,20 +4,27 @@ Configuration management for Planet Code Forge Backend
 """
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-@dataclass
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
+def _env_flag(name: str, default: str = "true") -> bool:
+    return os.getenv(name, default).strip().lower() in _TRUTHY
+
+@dataclass(frozen=True, slots=True)
 class PlanetForgeConfig:
     """Configuration for Planet Code Forge backend services"""
     
     # API Configuration
     API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    # One uvicorn worker process (each with its own event loop) per core unless overridden
+    API_WORKERS: int = int(os.getenv("API_WORKERS", str(max(2, os.cpu_count() or 1))))
     API_VERSION: str = "v1"
     
     # Database Configuration  
@@ -26,6 +33,8 @@ class PlanetForgeConfig:
     DB_NAME: str = os.getenv("DB_NAME", "planetforge")
     DB_USER: str = os.getenv("DB_USER", "postgres")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "postgres")
+    # Server-wide connection limit shared by every worker's pools (Postgres default)
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
     
     # Redis Configuration
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
@@ -48,8 +57,12 @@ class PlanetForgeConfig:
     
     # Security
     JWT_SECRET: str = os.getenv("JWT_SECRET", "planet-forge-secret-key-change-in-production")
-    JWT_ALGORITHM: str = "HS256"
+    JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+    # PEM keys for asymmetric algorithms (e.g. EdDSA); unused for HS*
+    JWT_PRIVATE_KEY: str = os.getenv("JWT_PRIVATE_KEY", "")
+    JWT_PUBLIC_KEY: str = os.getenv("JWT_PUBLIC_KEY", "")
     JWT_EXPIRATION: int = 3600  # 1 hour
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
     
     # OAuth Configuration
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
@@ -62,24 +75,33 @@ class PlanetForgeConfig:
     MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", "4"))
     CODE_ANALYSIS_TIMEOUT: int = 30
     WEBSOCKET_HEARTBEAT: int = 30
+    WEBSOCKET_MAX_SIZE: int = int(os.getenv("WEBSOCKET_MAX_SIZE", str(1024 * 1024)))
     
     # Debug mode
-    debug: bool = os.getenv("DEBUG", "true").lower() == "true"
+    debug: bool = _env_flag("DEBUG")
     environment: str = os.getenv("ENVIRONMENT", "development")
     
     # Features
-    ENABLE_WEB3: bool = os.getenv("ENABLE_WEB3", "true").lower() == "true"
-    ENABLE_ML_TRAINING: bool = os.getenv("ENABLE_ML_TRAINING", "true").lower() == "true"
-    ENABLE_MONITORING: bool = os.getenv("ENABLE_MONITORING", "true").lower() == "true"
+    ENABLE_WEB3: bool = _env_flag("ENABLE_WEB3")
+    ENABLE_ML_TRAINING: bool = _env_flag("ENABLE_ML_TRAINING")
+    ENABLE_MONITORING: bool = _env_flag("ENABLE_MONITORING")
     
-    @property
-    def database_url(self) -> str:
-        return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+    # Connection URLs, derived once from the fields above
+    database_url: str = field(init=False, default="")
+    redis_url: str = field(init=False, default="")
     
-    @property 
-    def redis_url(self) -> str:
+    def __post_init__(self):
         auth = f":{self.REDIS_PASSWORD}@" if self.REDIS_PASSWORD else ""
-        return f"redis://{auth}{self.REDIS_HOST}:{self.REDIS_PORT}/0"
+        object.__setattr__(self, "database_url", f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}")
+        object.__setattr__(self, "redis_url", f"redis://{auth}{self.REDIS_HOST}:{self.REDIS_PORT}/0")
+    
+    @property
+    def jwt_signing_key(self) -> str:
+        return self.JWT_SECRET if self.JWT_ALGORITHM.startswith("HS") else self.JWT_PRIVATE_KEY
+    
+    @property
+    def jwt_verification_key(self) -> str:
+        return self.JWT_SECRET if self.JWT_ALGORITHM.startswith("HS") else self.JWT_PUBLIC_KEY
     
     # Convenience properties for lowercase access
     @property
@@ -6,14 +6,20 @@ A production-grade backend that transforms code behavior into living digital pla
 """
 
 import asyncio
+import anyio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import uvicorn
+import httpx
+from redis.asyncio import Redis
+import sqlalchemy as sa
+from sqlalchemy.pool import NullPool
 from loguru import logger
-from datetime import datetime
+from datetime import datetime, timezone
+import time
 
 import sys
 import os
@@ -23,15 +29,61 @@ from app.api.auth import auth_router
 from app.api.planet import planet_router
 from app.api.genome import genome_router
 from app.api.evolution import evolution_router
-from app.api.stream import stream_router
+from app.api.stream import stream_router, process_code_analysis
 from app.services.groq_ai import groq_service
 from app.services.genome_lab import genome_lab_engine
+from app.services.code_stream_ingestor import code_stream_ingestor
+from app.services.event_writer import event_writer
+from app.services import ai_cache
 from app.services.planet_builder import PlanetBuilderAPI
+from app.models.database import ensure_monthly_partitions
 from config import load_config
 
 # Global service instances
 planet_builder = None
 
+# Response body bytes before and after GZip, for tuning the compression settings
+response_bytes = {"uncompressed": 0, "sent": 0}
+
+class ResponseSizeRecorder:
+    """ASGI middleware adding the size of every HTTP response body to response_bytes[key]"""
+    
+    def __init__(self, app, key: str):
+        self.app = app
+        self.key = key
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        async def record(message):
+            if message["type"] == "http.response.body":
+                response_bytes[self.key] += len(message.get("body", b""))
+            await send(message)
+        
+        await self.app(scope, receive, record)
+
+# How often upcoming monthly partitions are (idempotently) created
+PARTITION_JOB_INTERVAL = 24 * 3600
+
+async def maintain_partitions(database_url: str):
+    """Keep the next months' partitions ahead of incoming rows so none land in DEFAULT"""
+    engine = sa.create_engine(database_url, poolclass=NullPool)
+    
+    def run():
+        with engine.begin() as connection:
+            ensure_monthly_partitions(connection)
+    
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(run)
+            except Exception as e:
+                logger.warning(f"⚠️  Partition maintenance failed: {e}")
+            await asyncio.sleep(PARTITION_JOB_INTERVAL)
+    finally:
+        engine.dispose()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
@@ -43,6 +95,27 @@ async def lifespan(app: FastAPI):
         # Load configuration
         config = load_config()
         logger.info(f"✅ Configuration loaded - Groq Model: {config.groq_model}")
+
+        # Stream throughput is bound by event-loop wakeups; flag launches that bypass
+        # the uvloop/httptools/websockets settings in __main__ and the Dockerfile
+        loop_type = type(asyncio.get_running_loop()).__module__
+        if sys.platform != "win32" and not loop_type.startswith("uvloop"):
+            logger.warning(f"⚠️  Running on {loop_type} event loop - start uvicorn with --loop uvloop --http httptools --ws websockets")
+
+        # Threadpool used for sync routes/dependencies; sized above the sync DB pool
+        # (pool_size + max_overflow) so threads don't queue behind the default 40
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 200
+
+        # Shared outbound HTTP client (keep-alive pool reused across requests)
+        app.state.http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        )
+        
+        # Shared Redis pool (connections are opened lazily on first use); timeouts
+        # bound how long auth's revocation check can stall when Redis is unhealthy
+        app.state.redis = Redis.from_url(config.redis_url, socket_timeout=1.0, socket_connect_timeout=1.0)
         
         # Test Groq connection
         groq_test = await groq_service.test_connection()
@@ -55,6 +128,10 @@ async def lifespan(app: FastAPI):
         await genome_lab_engine.start()
         logger.info("✅ Genome Lab Engine started")
         
+        await code_stream_ingestor.start(process_code_analysis)
+        await event_writer.start(config.database_url)
+        app.state.partition_job = asyncio.create_task(maintain_partitions(config.database_url))
+        
         planet_builder = PlanetBuilderAPI()
         await planet_builder.start()
         logger.info("✅ Planet Builder started")
@@ -73,9 +150,18 @@ async def lifespan(app: FastAPI):
     finally:
         # Cleanup
         logger.info("🛑 Shutting down services...")
+        if getattr(app.state, "partition_job", None):
+            app.state.partition_job.cancel()
         await genome_lab_engine.stop()
+        await code_stream_ingestor.stop()
+        await event_writer.stop()
+        await ai_cache.close()
         if planet_builder:
             await planet_builder.stop()
+        if getattr(app.state, "http_client", None):
+            await app.state.http_client.aclose()
+        if getattr(app.state, "redis", None):
+            await app.state.redis.aclose()
         logger.success("✅ Shutdown complete")
 
 # Create FastAPI app
@@ -83,10 +169,13 @@ app = FastAPI(
     title="Planet Code Forge API",
     description="AI-powered coding genome analysis and planet evolution platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Add middleware
+# Add middleware (the last one added wraps the others, so GZip compresses what
+# CORS emits and the recorders sit on either side of it)
+app.add_middleware(ResponseSizeRecorder, key="uncompressed")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -96,10 +185,14 @@ app.add_middleware(
         "http://localhost:4173"
     ],  # Frontend URLs
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Explicit lists avoid reflecting request headers on every preflight
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+    max_age=86400,
 )
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Level 5 keeps most of the ratio for JSON at a fraction of level 9's CPU on the loop
+app.add_middleware(GZipMiddleware, minimum_size=2048, compresslevel=5)
+app.add_middleware(ResponseSizeRecorder, key="sent")
 
 # Include routers
 app.include_router(auth_router, prefix="/api", tags=["Authentication"])
@@ -108,29 +201,57 @@ app.include_router(genome_router, prefix="/api", tags=["Genome"])
 app.include_router(evolution_router, prefix="/api", tags=["Evolution"])
 app.include_router(stream_router, prefix="/stream", tags=["Real-time Streaming"])
 
-@app.get("/")
+# Static parts of the status payloads; handlers only stamp the per-request fields
+_ROOT_SKELETON = {
+    "message": "🌍 Planet Code Forge Backend API",
+    "version": "1.0.0",
+    "status": "running",
+    "endpoints": {
+        "api_docs": "/docs",
+        "websocket": "/stream/ws/{user_id}",
+        "health": "/health"
+    }
+}
+_HEALTH_SKELETON = {
+    "uptime": "running",
+    "version": "1.0.0"
+}
+
+_last_ts_sec = 0
+_last_ts_iso = ""
+
+# Live Groq probes from /health are reused for this many seconds
+_GROQ_HEALTH_TTL = 30
+_groq_health_checked_at = float("-inf")
+_groq_health_ok = False
+
+def _iso_now() -> str:
+    """Current UTC time to the second, formatted at most once per second"""
+    global _last_ts_sec, _last_ts_iso
+    t = int(time.time())
+    if t != _last_ts_sec:
+        _last_ts_sec = t
+        _last_ts_iso = datetime.fromtimestamp(t, tz=timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+    return _last_ts_iso
+
+# Status routes return ORJSONResponse directly; response_model=None keeps them off
+# FastAPI's response validation/encoding path
+@app.get("/", response_model=None)
 async def root():
     """Root endpoint - API status"""
-    return {
-        "message": "🌍 Planet Code Forge Backend API",
-        "version": "1.0.0",
-        "status": "running",
-        "timestamp": datetime.utcnow().isoformat(),
-        "services": {
-            "groq_ai": groq_service.is_available(),
-            "genome_lab": genome_lab_engine.is_active(),
-            "planet_builder": planet_builder.is_active() if planet_builder else False
-        },
-        "endpoints": {
-            "api_docs": "/docs",
-            "websocket": "/stream/ws/{user_id}",
-            "health": "/health"
-        }
+    payload = _ROOT_SKELETON.copy()
+    payload["timestamp"] = _iso_now()
+    payload["services"] = {
+        "groq_ai": groq_service.is_available(),
+        "genome_lab": genome_lab_engine.is_active(),
+        "planet_builder": planet_builder.is_active() if planet_builder else False
     }
+    return ORJSONResponse(payload)
 
-@app.get("/health")
+@app.get("/health", response_model=None)
 async def health_check():
     """Comprehensive health check endpoint for monitoring"""
+    global _groq_health_checked_at, _groq_health_ok
     
     services_status = {}
     overall_health = "healthy"
@@ -139,8 +260,10 @@ async def health_check():
     try:
         groq_available = groq_service.is_available()
         if groq_available:
-            groq_test = await groq_service.test_connection()
-            services_status["groq_ai"] = "connected" if groq_test else "connection_failed"
+            if time.monotonic() - _groq_health_checked_at > _GROQ_HEALTH_TTL:
+                _groq_health_ok = await groq_service.test_connection()
+                _groq_health_checked_at = time.monotonic()
+            services_status["groq_ai"] = "connected" if _groq_health_ok else "connection_failed"
         else:
             services_status["groq_ai"] = "not_configured"
     except Exception as e:
@@ -157,18 +280,17 @@ async def health_check():
     elif any("inactive" in str(status) for status in services_status.values()):
         overall_health = "starting"
     
-    return {
-        "status": overall_health,
-        "timestamp": datetime.utcnow().isoformat(),
-        "services": services_status,
-        "uptime": "running",
-        "version": "1.0.0"
-    }
+    payload = _HEALTH_SKELETON.copy()
+    payload["status"] = overall_health
+    payload["timestamp"] = _iso_now()
+    payload["services"] = services_status
+    payload["response_bytes"] = response_bytes
+    return ORJSONResponse(payload)
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail,
@@ -181,7 +303,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 async def general_exception_handler(request: Request, exc: Exception):
     """General exception handler"""
     logger.error(f"Unhandled exception: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -193,10 +315,24 @@ async def general_exception_handler(request: Request, exc: Exception):
 if __name__ == "__main__":
     config = load_config()
     
+    if sys.platform == "win32":
+        # uvloop has no Windows build; winloop is its drop-in port
+        import winloop
+        winloop.install()
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=config.debug,
-        log_level="info"
+        # reload and multiple workers are mutually exclusive in uvicorn
+        workers=1 if config.debug else config.API_WORKERS,
+        log_level="info",
+        # On Windows the loop policy installed above is left as is
+        loop="none" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets",
+        # Analysis updates are repetitive JSON; compress frames on the wire
+        ws_per_message_deflate=True,
+        ws_max_size=config.WEBSOCKET_MAX_SIZE
     )
\ No newline at end of file
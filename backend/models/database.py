@@ -3,10 +3,11 @@
 Database models for Planet Code Forge
 """
 
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, JSON, Boolean, Text, ForeignKey
+from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, JSON, Boolean, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import sessionmaker, relationship, validates
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 import uuid
 from datetime import datetime
 from typing import Optional, Dict, Any
@@ -14,8 +15,30 @@ from typing import Optional, Dict, Any
 from config import config
 
 # Database setup
-engine = create_engine(config.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Every API worker holds a sync and an async engine, plus the event writer's
+# 2-connection pool and the partition job's 1; all of it must fit under the
+# server's max_connections, less a few kept free for admin/migration sessions
+_PER_WORKER_CONNECTIONS = (config.DB_MAX_CONNECTIONS - 5) // config.API_WORKERS - 3
+_PER_ENGINE_CONNECTIONS = max(2, _PER_WORKER_CONNECTIONS // 2)
+_MAX_OVERFLOW = min(10, _PER_ENGINE_CONNECTIONS // 3)
+_POOL_OPTIONS = dict(
+    pool_size=_PER_ENGINE_CONNECTIONS - _MAX_OVERFLOW,
+    max_overflow=_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    # Recycle before server/proxy idle timeouts drop the connection
+    pool_recycle=1800
+)
+engine = create_engine(config.database_url, **_POOL_OPTIONS)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async engine for writes made from inside the event loop (asyncpg driver)
+async_engine = create_async_engine(
+    config.database_url.replace("postgresql://", "postgresql+asyncpg://", 1),
+    # No per-checkout ping on the hot async path; pool_recycle retires old connections
+    **{**_POOL_OPTIONS, "pool_pre_ping": False}
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
 Base = declarative_base()
 
 class User(Base):
@@ -35,13 +58,18 @@ class User(Base):
     planets = relationship("Planet", back_populates="user")
     code_sessions = relationship("CodeSession", back_populates="user")
     achievements = relationship("Achievement", back_populates="user")
+    
+    @validates("wallet_address")
+    def normalize_wallet_address(self, key, value):
+        # Stored lowercase so lookups are a plain indexed equality
+        return value.lower() if value else value
 
 class Planet(Base):
     """User's unique coding planet"""
     __tablename__ = "planets"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     planet_type = Column(String, nullable=False)  # minimalist, chaotic, structured, etc.
     
@@ -79,6 +107,11 @@ class Planet(Base):
     # Relationships
     user = relationship("User", back_populates="planets")
     evolution_events = relationship("EvolutionEvent", back_populates="planet")
+    
+    # Gallery: WHERE planet_type = ? ORDER BY evolution_points DESC
+    __table_args__ = (
+        Index("ix_planet_type_evo", planet_type, evolution_points.desc()),
+    )
 
 class CodeSession(Base):
     """Individual code analysis session"""
@@ -110,11 +143,15 @@ class EvolutionEvent(Base):
     __tablename__ = "evolution_events"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    planet_id = Column(UUID(as_uuid=True), ForeignKey("planets.id"), nullable=False)
+    planet_id = Column(UUID(as_uuid=True), ForeignKey("planets.id"), nullable=False, index=True)
     
     event_type = Column(String)  # skill_unlock, terrain_change, achievement, etc.
     description = Column(Text)
-    metadata = Column(JSON)  # Event-specific data
+    metadata = Column(JSONB)  # Event-specific data (genome stored without default-valued keys)
+    
+    # Categorical genome fields, kept out of the JSONB payload
+    planet_type = Column(String(32))
+    atmosphere = Column(String(32))
     
     # Before/after state
     previous_state = Column(JSON)
@@ -126,6 +163,11 @@ class EvolutionEvent(Base):
     
     # Relationships
     planet = relationship("Planet", back_populates="evolution_events")
+    
+    __table_args__ = (
+        Index("ix_evolution_events_metadata", "metadata", postgresql_using="gin",
+              postgresql_ops={"metadata": "jsonb_path_ops"}),
+    )
 
 class Achievement(Base):
     """User achievements and badges"""
@@ -174,10 +216,21 @@ class SkillChallenge(Base):
 def create_tables():
     Base.metadata.create_all(bind=engine)
 
-# Database dependency for FastAPI
+# Database dependencies for FastAPI
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
 async def get_db():
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
\ No newline at end of file
@@ -6,15 +6,19 @@ Streams user code events and extracts behavioral patterns without storing source
 """
 
 import asyncio
-import json
-from typing import Dict, Any, Optional, Callable
+import orjson
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Tuple
+import operator
 from dataclasses import asdict
 import time
+import hashlib
+import secrets
 from loguru import logger
-import aioredis
+from redis.asyncio import Redis, BlockingConnectionPool
 from datetime import datetime, timedelta
 
-from models.database import CodeSession, SessionLocal
+from models.database import CodeSession, AsyncSessionLocal
 from services.genome_lab import GenomeLabEngine
 from config import config
 
@@ -27,25 +31,56 @@ except ImportError:
     # Fallback implementation if notebook code not available
     from services.code_analysis import CodeAnalysisEngine, CodingBehaviorMetrics
 
+# Naive datetimes here are UTC; numpy scalars can appear in behavior metrics
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+# (metric attribute, comparison, threshold, change label) rules for planet updates
+_TERRAIN_RULES = (
+    ('function_complexity_avg', operator.gt, 5, "mountain_peaks_forming"),
+    ('code_reuse_score', operator.gt, 0.7, "forest_growth"),
+    ('exception_handling_score', operator.gt, 0.8, "defensive_walls"),
+    ('comment_ratio', operator.gt, 0.3, "knowledge_crystals")
+)
+_ATMOSPHERE_RULES = (
+    ('typing_speed_estimate', operator.gt, 60, "energetic_aurora"),
+    ('indentation_consistency', operator.gt, 0.9, "clarity_mist"),
+    ('revision_frequency', operator.lt, 2, "confidence_glow")
+)
+
+# Queue marker posted by the publish batch window timer
+_FLUSH = object()
+
+# Message that stops _process_message_queue
+_SHUTDOWN = {'type': '__shutdown__'}
+
 class CodeStreamIngestor:
     """Handles real-time code streaming and analysis"""
     
     def __init__(self):
         self.redis = None
+        self.pool = None
         self.analysis_engine = CodeAnalysisEngine()
         self.active_sessions: Dict[str, Dict] = {}
         self.running = False
         self.message_queue = asyncio.Queue()
+        self.publish_queue = asyncio.Queue()
+        self.publish_batch_size = 64
+        self.publish_window = 0.01
+        self._publisher: Optional[asyncio.Task] = None
+        self._worker: Optional[asyncio.Task] = None
         
     async def start(self):
         """Initialize the code stream ingestor"""
         try:
-            # Connect to Redis for real-time communication
-            self.redis = aioredis.from_url(config.redis_url)
+            # Connect to Redis for real-time communication; concurrent sessions
+            # wait for a free pooled connection instead of sharing one socket
+            self.pool = BlockingConnectionPool.from_url(config.redis_url, max_connections=50, timeout=5)
+            self.redis = Redis(connection_pool=self.pool)
             
             # Start background tasks
             self.running = True
-            asyncio.create_task(self._process_message_queue())
+            self._worker = asyncio.create_task(self._process_message_queue())
+            self._publisher = asyncio.create_task(self._publish_flusher())
             
             logger.info("⚙️ Code Stream Ingestor started")
             
@@ -57,8 +92,21 @@ class CodeStreamIngestor:
         """Stop the code stream ingestor"""
         self.running = False
         
+        if self._worker is not None:
+            self.message_queue.put_nowait(_SHUTDOWN)
+            await self._worker
+            self._worker = None
+        
+        if self._publisher is not None:
+            # Sentinel unblocks the pending get(); queued publishes are flushed first
+            self.publish_queue.put_nowait(None)
+            await self._publisher
+            self._publisher = None
+        
         if self.redis:
-            await self.redis.close()
+            await self.redis.aclose()
+        if self.pool:
+            await self.pool.disconnect()
         
         logger.info("🛑 Code Stream Ingestor stopped")
     
@@ -67,7 +115,9 @@ class CodeStreamIngestor:
     
     async def start_session(self, user_id: str, session_metadata: Dict) -> str:
         """Start a new coding session for a user"""
-        session_id = f"session_{user_id}_{int(time.time())}"
+        # Random token: unique even for several sessions per user per second, and short
+        # to hash on the per-edit lookup (the owner is kept in the session itself)
+        session_id = secrets.token_urlsafe(8)
         
         session_data = {
             'user_id': user_id,
@@ -77,17 +127,28 @@ class CodeStreamIngestor:
             'filename': session_metadata.get('filename'),
             'edit_count': 0,
             'total_characters': 0,
-            'behavior_samples': []
+            'sample_count': 0,
+            'sum_edit_time_ms': 0
         }
         
         self.active_sessions[session_id] = session_data
         
-        # Cache session in Redis
-        await self.redis.setex(
-            f"session:{session_id}", 
-            config.CODE_ANALYSIS_TIMEOUT,
-            json.dumps(session_data, default=str)
-        )
+        # Cache session metadata in Redis for recovery (hash + expiry in one round trip)
+        key = f"session:{session_id}"
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={
+                "user_id": user_id,
+                "start_time": str(session_data['start_time']),
+                "language": session_data['language'],
+                "filename": session_data['filename'] or ""
+            })
+            pipe.expire(key, config.CODE_ANALYSIS_TIMEOUT)
+            await pipe.execute()
+        
+        # Running fingerprint over the sample metric hashes and a bounded window of
+        # recent samples; totals live in the counters above (kept out of the Redis copy)
+        session_data['behavior_hasher'] = hashlib.blake2b(digest_size=16)
+        session_data['behavior_samples'] = deque(maxlen=256)
         
         logger.info(f"🚀 Started coding session {session_id} for user {user_id}")
         return session_id
@@ -112,19 +173,27 @@ class CodeStreamIngestor:
             )
             
             # Update session statistics
+            now = time.time()
             session['edit_count'] += 1
             session['total_characters'] = len(code_content)
-            session['last_activity'] = time.time()
+            session['last_activity'] = now
+            metrics_hash = behavior_metrics.to_hash()
+            session['behavior_hasher'].update(metrics_hash.encode())
+            session['sample_count'] += 1
+            session['sum_edit_time_ms'] += edit_time
             session['behavior_samples'].append({
-                'timestamp': time.time(),
-                'metrics_hash': behavior_metrics.to_hash(),
+                'timestamp': now,
+                'metrics_hash': metrics_hash,
                 'edit_time_ms': edit_time
             })
             
+            terrain_changes = self._calculate_terrain_changes(behavior_metrics)
+            atmosphere_changes = self._calculate_atmosphere_changes(behavior_metrics)
+            
             # Generate real-time analysis result for frontend
             analysis_result = {
                 'session_id': session_id,
-                'analysis_timestamp': datetime.utcnow().isoformat(),
+                'analysis_timestamp': datetime.utcfromtimestamp(now),
                 'behavior_insights': {
                     'code_elegance': behavior_metrics.indentation_consistency * 100,
                     'comment_poetry': behavior_metrics.comment_quality_score * 100,
@@ -140,16 +209,16 @@ class CodeStreamIngestor:
                 },
                 'planet_evolution': {
                     'evolution_points': session['edit_count'],
-                    'terrain_changes': self._calculate_terrain_changes(behavior_metrics),
-                    'atmosphere_shifts': self._calculate_atmosphere_changes(behavior_metrics)
+                    'terrain_changes': terrain_changes,
+                    'atmosphere_shifts': atmosphere_changes
                 }
             }
             
-            # Cache result for real-time frontend updates
-            await self.redis.publish(
+            # Publish for real-time frontend updates (batched by _publish_flusher)
+            self.publish_queue.put_nowait((
                 f"user_stream:{session['user_id']}",
-                json.dumps(analysis_result)
-            )
+                orjson.dumps(analysis_result, option=_ORJSON_OPTIONS)
+            ))
             
             # Add to processing queue for ML analysis
             await self.message_queue.put({
@@ -157,6 +226,8 @@ class CodeStreamIngestor:
                 'session_id': session_id,
                 'user_id': session['user_id'],
                 'metrics': behavior_metrics,
+                'terrain_changes': terrain_changes,
+                'atmosphere_changes': atmosphere_changes,
                 'session_data': session
             })
             
@@ -186,30 +257,30 @@ class CodeStreamIngestor:
             'edit_count': session['edit_count'],
             'total_characters': session['total_characters'],
             'language': session['language'],
-            'behavior_samples_count': len(session['behavior_samples']),
+            'behavior_samples_count': session['sample_count'],
+            'avg_edit_time_ms': session['sum_edit_time_ms'] / max(session['sample_count'], 1),
             'typing_speed_estimate': session['total_characters'] / max(duration / 60, 1),  # chars per minute
             'edit_frequency': session['edit_count'] / max(duration / 60, 1)  # edits per minute
         }
         
-        # Store session in database
-        db = SessionLocal()
-        try:
-            db_session = CodeSession(
-                user_id=session['user_id'],
-                language=session['language'],
-                duration_seconds=int(duration),
-                code_length=session['total_characters'],
-                behavior_fingerprint=str(hash(str(session['behavior_samples']))),
-                genome_generated=True  # Will be updated by genome lab
-            )
-            db.add(db_session)
-            db.commit()
-            
-        except Exception as e:
-            logger.error(f"Failed to save session to database: {e}")
-            db.rollback()
-        finally:
-            db.close()
+        fingerprint = session['behavior_hasher'].hexdigest()
+        
+        # Store session in database without blocking the event loop
+        async with AsyncSessionLocal() as db:
+            try:
+                db.add(CodeSession(
+                    user_id=session['user_id'],
+                    language=session['language'],
+                    duration_seconds=int(duration),
+                    code_length=session['total_characters'],
+                    behavior_fingerprint=fingerprint,
+                    genome_generated=True  # Will be updated by genome lab
+                ))
+                await db.commit()
+                
+            except Exception as e:
+                logger.error(f"Failed to save session to database: {e}")
+                await db.rollback()
         
         # Trigger ML genome generation
         await self.message_queue.put({
@@ -217,7 +288,11 @@ class CodeStreamIngestor:
             'session_id': session_id,
             'user_id': session['user_id'],
             'session_summary': session_summary,
-            'behavior_samples': session['behavior_samples']
+            'features': {
+                'count': session['sample_count'],
+                'avg_edit_time_ms': session_summary['avg_edit_time_ms'],
+                'fingerprint': fingerprint
+            }
         })
         
         # Cleanup
@@ -228,41 +303,60 @@ class CodeStreamIngestor:
         
         return session_summary
     
-    def _calculate_terrain_changes(self, metrics: CodingBehaviorMetrics) -> List[str]:
+    def _calculate_terrain_changes(self, metrics: CodingBehaviorMetrics) -> Tuple[str, ...]:
         """Calculate potential terrain changes based on behavior"""
-        changes = []
-        
-        if metrics.function_complexity_avg > 5:
-            changes.append("mountain_peaks_forming")
-        if metrics.code_reuse_score > 0.7:
-            changes.append("forest_growth")
-        if metrics.exception_handling_score > 0.8:
-            changes.append("defensive_walls")
-        if metrics.comment_ratio > 0.3:
-            changes.append("knowledge_crystals")
-            
-        return changes
+        return tuple(label for attr, op, threshold, label in _TERRAIN_RULES if op(getattr(metrics, attr), threshold))
     
-    def _calculate_atmosphere_changes(self, metrics: CodingBehaviorMetrics) -> List[str]:
+    def _calculate_atmosphere_changes(self, metrics: CodingBehaviorMetrics) -> Tuple[str, ...]:
         """Calculate atmospheric changes based on behavior"""
-        changes = []
+        return tuple(label for attr, op, threshold, label in _ATMOSPHERE_RULES if op(getattr(metrics, attr), threshold))
+    
+    async def _publish_flusher(self):
+        """Send queued publishes in pipelines of up to publish_batch_size, waiting at most publish_window"""
+        loop = asyncio.get_running_loop()
+        batch = []
+        timer = None
         
-        if metrics.typing_speed_estimate > 60:
-            changes.append("energetic_aurora")
-        if metrics.indentation_consistency > 0.9:
-            changes.append("clarity_mist")
-        if metrics.revision_frequency < 2:
-            changes.append("confidence_glow")
+        while True:
+            item = await self.publish_queue.get()
             
-        return changes
+            if item is None or item is _FLUSH:
+                if timer is not None:
+                    timer.cancel()
+                    timer = None
+                if batch:
+                    await self._publish_batch(batch)
+                    batch = []
+                if item is None:
+                    break
+                continue
+            
+            batch.append(item)
+            if len(batch) == 1:
+                timer = loop.call_later(self.publish_window, self.publish_queue.put_nowait, _FLUSH)
+            if len(batch) >= self.publish_batch_size:
+                timer.cancel()
+                timer = None
+                await self._publish_batch(batch)
+                batch = []
+    
+    async def _publish_batch(self, batch):
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for channel, payload in batch:
+                    pipe.publish(channel, payload)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to publish {len(batch)} stream updates: {e}")
     
     async def _process_message_queue(self):
         """Background task to process ML analysis queue"""
-        while self.running:
+        while True:
+            message = await self.message_queue.get()
+            if message['type'] == '__shutdown__':
+                break
+            
             try:
-                # Wait for messages with timeout
-                message = await asyncio.wait_for(self.message_queue.get(), timeout=1.0)
-                
                 if message['type'] == 'behavior_analysis':
                     # Trigger real-time planet updates
                     await self._trigger_planet_evolution(message)
@@ -271,8 +365,6 @@ class CodeStreamIngestor:
                     # Trigger comprehensive genome analysis
                     await self._trigger_genome_generation(message)
                     
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 logger.error(f"Error processing message queue: {e}")
     
@@ -284,15 +376,15 @@ class CodeStreamIngestor:
                 'user_id': message['user_id'],
                 'type': 'real_time_evolution',
                 'changes': {
-                    'terrain': self._calculate_terrain_changes(message['metrics']),
-                    'atmosphere': self._calculate_atmosphere_changes(message['metrics'])
+                    'terrain': message['terrain_changes'],
+                    'atmosphere': message['atmosphere_changes']
                 },
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': datetime.utcnow()
             }
             
             await self.redis.publish(
                 f"planet_evolution:{message['user_id']}",
-                json.dumps(evolution_event)
+                orjson.dumps(evolution_event, option=_ORJSON_OPTIONS)
             )
             
         except Exception as e:
@@ -305,13 +397,14 @@ class CodeStreamIngestor:
             genome_request = {
                 'user_id': message['user_id'],
                 'session_summary': message['session_summary'],
-                'behavior_samples': message['behavior_samples'],
-                'timestamp': datetime.utcnow().isoformat()
+                # Aggregates only; raw samples stay out of pub/sub
+                'features': message['features'],
+                'timestamp': datetime.utcnow()
             }
             
             await self.redis.publish(
                 f"genome_generation:{message['user_id']}",
-                json.dumps(genome_request)
+                orjson.dumps(genome_request, option=_ORJSON_OPTIONS)
             )
             
             logger.info(f"🧬 Triggered genome generation for user {message['user_id']}")
@@ -4,22 +4,189 @@ Planet Builder API - Generates and updates planet data from code genomes
 """
 
 import asyncio
-from typing import Dict, Any, List, Optional
-from dataclasses import asdict
+import hashlib
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
-import json
+from functools import lru_cache
+from types import SimpleNamespace
+import orjson
 from loguru import logger
 import aioredis
+from sqlalchemy import bindparam, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
 
-from models.database import Planet, EvolutionEvent, User, SessionLocal
+from models.database import Planet, EvolutionEvent, User, AsyncSessionLocal
 from config import config
 
+# Seconds a cached planet payload stays in Redis
+PLANET_CACHE_TTL = 3600
+
+# Naive datetimes (created_at/updated_at, event timestamps) are encoded as UTC
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+async def _fetch_planet(db: AsyncSession, planet_id: str) -> Optional[Planet]:
+    """Load one planet's columns; relationship access raises instead of lazy-loading per row"""
+    result = await db.execute(select(Planet).options(raiseload("*")).where(Planet.id == planet_id))
+    return result.scalars().first()
+
+async def _fetch_planets(db: AsyncSession, planet_ids: List[str]) -> List[Planet]:
+    """Load many planets in one SELECT, with the same no-lazy-load guard as _fetch_planet"""
+    result = await db.execute(select(Planet).options(raiseload("*")).where(Planet.id.in_(planet_ids)))
+    return result.scalars().all()
+
+# Recent evolution events embedded in the planet payload
+RECENT_EVENTS = 10
+RECENT_EVENT_WINDOW = timedelta(days=7)
+
+async def _fetch_planet_with_events(db: AsyncSession, planet_id: str) -> Optional[Planet]:
+    """Load one planet plus its events from the last RECENT_EVENT_WINDOW in two SELECTs total"""
+    recent = Planet.evolution_events.and_(EvolutionEvent.created_at > datetime.utcnow() - RECENT_EVENT_WINDOW)
+    result = await db.execute(
+        select(Planet)
+        .options(selectinload(recent), raiseload("*"))
+        .where(Planet.id == planet_id)
+    )
+    return result.scalars().first()
+
+# Core statements for the update_planet hot path; built once so SQLAlchemy's
+# compiled-statement cache is hit on every call instead of rebuilding an ORM query
+_PLANETS = Planet.__table__
+_EVOLUTION_EVENTS = EvolutionEvent.__table__
+
+# Skills only ever ratchet up, so the database applies max() itself via GREATEST
+_SKILL_COLUMNS = (
+    "algorithm_mastery", "web_development_skill", "api_design_discipline", "devops_maturity",
+    "security_awareness"
+)
+# Short skill names used in payloads and evolution events, in _SKILL_COLUMNS order
+_SKILL_NAMES = ("algorithm", "web", "api", "devops", "security")
+# Evolution stage per 20-point band of the mean skill
+_STAGE_TABLE = ('proto_planet', 'rocky_planet', 'terrestrial_planet', 'gas_giant', 'stellar_planet')
+_SET_COLUMNS = ("learning_velocity", "exploration_tendency", "evolution_stage", "visual_params")
+# Row-locked until commit, so concurrent updates (from any process) each see the previous one's result
+_SELECT_PLANET = select(_PLANETS).where(_PLANETS.c.id == bindparam("pid")).with_for_update()
+# Bind names can't match the SET column names, hence the b_ prefix
+_UPDATE_PLANET = (
+    _PLANETS.update()
+    .where(_PLANETS.c.id == bindparam("pid"))
+    .values({
+        **{column: func.greatest(_PLANETS.c[column], bindparam(f"b_{column}")) for column in _SKILL_COLUMNS},
+        **{column: bindparam(f"b_{column}") for column in _SET_COLUMNS},
+        "evolution_points": _PLANETS.c.evolution_points + bindparam("b_points_earned")
+    })
+)
+
+# Planet name parts keyed by planet type / atmosphere
+_NAME_PREFIXES = {
+    'minimalist': ('Zen', 'Pure', 'Clean', 'Simple'),
+    'chaotic': ('Storm', 'Flux', 'Wild', 'Chaos'),
+    'structured': ('Order', 'Logic', 'System', 'Grid'),
+    'creative': ('Dream', 'Vision', 'Color', 'Art'),
+    'analytical': ('Mind', 'Data', 'Logic', 'Calc')
+}
+_NAME_SUFFIXES = {
+    'calm': ('Prime', 'Core', 'Haven', 'Rest'),
+    'energetic': ('Burst', 'Rush', 'Spark', 'Blaze'),
+    'focused': ('Point', 'Beam', 'Lock', 'Sharp'),
+    'experimental': ('Lab', 'Test', 'Try', 'Explore')
+}
+_DEFAULT_PREFIXES = ('Planet',)
+_DEFAULT_SUFFIXES = ('World',)
+
+@lru_cache(maxsize=4096)
+def _planet_name(planet_type: str, atmosphere: str, user_id: str) -> str:
+    """Name from a digest of the naming inputs; unlike hash() it is stable across processes"""
+    key = f"{planet_type}|{atmosphere}|{user_id}".encode()
+    h = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+    prefixes = _NAME_PREFIXES.get(planet_type, _DEFAULT_PREFIXES)
+    suffixes = _NAME_SUFFIXES.get(atmosphere, _DEFAULT_SUFFIXES)
+    return f"{prefixes[h % len(prefixes)]}{suffixes[(h >> 32) % len(suffixes)]}"
+
+_COLOR_PALETTES = {
+    'minimalist': ('#2D3748', '#4A5568', '#718096'),
+    'chaotic': ('#E53E3E', '#DD6B20', '#D69E2E'),
+    'structured': ('#3182CE', '#2B6CB0', '#2C5282'),
+    'creative': ('#9F7AEA', '#805AD5', '#6B46C1'),
+    'analytical': ('#38A169', '#2F855A', '#276749')
+}
+_DEFAULT_PALETTE = ('#4A5568', '#718096', '#A0AEC0')
+
+# (genome key, threshold, effect) - the effect applies above the threshold
+_EFFECT_RULES = (
+    ('algorithm_mastery', 80, 'algorithm_aurora'),
+    ('web_development_skill', 80, 'web_constellation'),
+    ('security_awareness', 70, 'security_shield'),
+    ('innovation_drive', 80, 'innovation_nebula')
+)
+
+# Values create_planet assumes for missing genome keys; event metadata omits keys at these values
+_GENOME_DEFAULTS = {
+    'terrain': 'plains',
+    'algorithm_mastery': 0,
+    'web_development_skill': 0,
+    'api_design_discipline': 0,
+    'devops_maturity': 0,
+    'security_awareness': 0,
+    'evolution_stage': 'proto_planet',
+    'learning_velocity': 0.5,
+    'exploration_tendency': 0.5,
+    'code_elegance': 0.5,
+    'innovation_drive': 0.5,
+    'collaboration_style': 0.5,
+    'problem_solving_approach': 0.5
+}
+# Stored in their own EvolutionEvent columns instead
+_PROMOTED_GENOME_KEYS = frozenset({'planet_type', 'atmosphere'})
+
+def _merge_genome(merged: Dict, genome_data: Dict):
+    """Fold a newer genome update into merged: skills keep their maximum, other keys the latest value"""
+    for key, value in genome_data.items():
+        if key in _SKILL_COLUMNS and key in merged:
+            merged[key] = max(merged[key], value)
+        else:
+            merged[key] = value
+
+def _compact_genome(genome_data: Dict) -> Dict:
+    """genome_data minus promoted keys and keys equal to their create_planet default"""
+    return {
+        key: value for key, value in genome_data.items()
+        if key not in _PROMOTED_GENOME_KEYS and (key not in _GENOME_DEFAULTS or _GENOME_DEFAULTS[key] != value)
+    }
+
+# Queue marker posted by a flusher's window timer
+_FLUSH = object()
+
 class PlanetBuilderAPI:
     """Service for building and evolving user planets"""
     
-    def __init__(self):
+    def __init__(self, cache_batch_size: int = 100, cache_window: float = 0.05,
+                 event_batch_size: int = 500, event_window: float = 0.5, evolution_workers: int = 4,
+                 coalesce_window: float = 0.5):
         self.redis = None
         self.active = False
+        # Pooled AsyncSession factory (expire_on_commit=False: no re-SELECT after commit)
+        self.Session = AsyncSessionLocal
+        # Genome updates merged per planet for coalesce_window before being queued
+        self.coalesce_window = coalesce_window
+        self._pending: Dict[str, Tuple[Dict, asyncio.Future]] = {}
+        # Each planet hashes to one worker's queue, so its updates never run concurrently
+        self.evolution_workers = evolution_workers
+        self._shards: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+        # Queued, not yet started update per planet: (genome_data, futures of every caller folded in)
+        self._queued: Dict[str, Tuple[Dict, List[asyncio.Future]]] = {}
+        self.cache_queue = asyncio.Queue()
+        self.cache_batch_size = cache_batch_size
+        self.cache_window = cache_window
+        self._cache_writer: Optional[asyncio.Task] = None
+        # Evolution events from update_planet, inserted in bulk off the request path
+        self.event_queue = asyncio.Queue()
+        self.event_batch_size = event_batch_size
+        self.event_window = event_window
+        self._event_writer: Optional[asyncio.Task] = None
         
     async def start(self):
         """Initialize the planet builder service"""
@@ -27,8 +194,15 @@ class PlanetBuilderAPI:
             self.redis = aioredis.from_url(config.redis_url)
             self.active = True
             
-            # Start background evolution processor
-            asyncio.create_task(self._evolution_processor())
+            # Start evolution workers, one queue each
+            self._shards = [asyncio.Queue() for _ in range(self.evolution_workers)]
+            self._workers = [asyncio.create_task(self._evolution_worker(shard)) for shard in self._shards]
+            self._cache_writer = asyncio.create_task(
+                self._flusher(self.cache_queue, self.cache_batch_size, self.cache_window, self._cache_many)
+            )
+            self._event_writer = asyncio.create_task(
+                self._flusher(self.event_queue, self.event_batch_size, self.event_window, self._insert_events)
+            )
             
             logger.info("🏗️  Planet Builder API started")
             
@@ -40,6 +214,27 @@ class PlanetBuilderAPI:
         """Stop the planet builder service"""
         self.active = False
         
+        # Queue coalesced updates now rather than when their timers fire
+        for planet_id in list(self._pending):
+            self._release_pending(planet_id)
+        
+        # One sentinel per worker, queued behind any pending updates
+        for shard in self._shards:
+            shard.put_nowait(None)
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        
+        if self._event_writer is not None:
+            # Sentinel unblocks the pending get(); buffered writes are flushed first
+            self.event_queue.put_nowait(None)
+            await self._event_writer
+            self._event_writer = None
+        
+        if self._cache_writer is not None:
+            self.cache_queue.put_nowait(None)
+            await self._cache_writer
+            self._cache_writer = None
+        
         if self.redis:
             await self.redis.close()
         
@@ -50,16 +245,25 @@ class PlanetBuilderAPI:
     
     async def create_planet(self, user_id: str, genome_data: Dict) -> str:
         """Create a new planet for a user based on their code genome"""
+        planet_id, created = await self._insert_planet(user_id, genome_data)
+        if not created:
+            # Called with the session closed: the update waits out the coalesce window
+            # and the worker needs its own connection from the same pool
+            return await self.update_planet(planet_id, genome_data)
+        return planet_id
+    
+    async def _insert_planet(self, user_id: str, genome_data: Dict) -> Tuple[str, bool]:
+        """Insert the user's planet; (planet_id, created), or (existing_id, False) if they have one"""
         
-        db = SessionLocal()
+        db = self.Session()
         try:
             # Check if user already has a planet
-            existing_planet = db.query(Planet).filter(Planet.user_id == user_id).first()
-            if existing_planet:
-                return await self.update_planet(str(existing_planet.id), genome_data)
+            existing_id = (await db.execute(select(Planet.id).where(Planet.user_id == user_id).limit(1))).scalar()
+            if existing_id is not None:
+                return str(existing_id), False
             
             # Generate unique planet name
-            planet_name = self._generate_planet_name(genome_data)
+            planet_name = self._generate_planet_name(user_id, genome_data)
             
             # Create visual parameters
             visual_params = self._generate_visual_params(genome_data)
@@ -92,79 +296,118 @@ class PlanetBuilderAPI:
                 problem_solving_approach=genome_data.get('problem_solving_approach', 0.5)
             )
             
+            # Flush assigns the id and column defaults; one commit covers the event too
             db.add(planet)
-            db.commit()
-            db.refresh(planet)
+            await db.flush()
             
             # Create initial evolution event
             evolution_event = EvolutionEvent(
                 planet_id=planet.id,
                 event_type="planet_birth",
                 description=f"Planet {planet_name} was born from coding behavior analysis",
-                metadata=genome_data,
-                new_state=asdict(planet) if hasattr(planet, '__dict__') else {},
+                metadata=_compact_genome(genome_data),
+                planet_type=planet.planet_type,
+                atmosphere=planet.atmosphere,
+                new_state=self._planet_state(planet),
                 points_earned=10
             )
             
             db.add(evolution_event)
-            db.commit()
+            await db.commit()
             
             # Cache planet data
-            await self.redis.setex(
-                f"planet:{planet.id}",
-                3600,  # 1 hour cache
-                json.dumps({
-                    'id': str(planet.id),
-                    'name': planet.name,
-                    'type': planet.planet_type,
-                    'visual_params': visual_params,
-                    'skills': {
-                        'algorithm': planet.algorithm_mastery,
-                        'web': planet.web_development_skill,
-                        'api': planet.api_design_discipline,
-                        'devops': planet.devops_maturity,
-                        'security': planet.security_awareness
-                    },
-                    'evolution': {
-                        'stage': planet.evolution_stage,
-                        'points': planet.evolution_points,
-                        'velocity': planet.learning_velocity
-                    }
-                })
-            )
+            await self._update_planet_cache(planet, [self._event_to_dict(evolution_event)])
             
             logger.info(f"🌍 Created planet {planet_name} for user {user_id}")
             
-            return str(planet.id)
+            return str(planet.id), True
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Failed to create planet: {e}")
             raise
         finally:
-            db.close()
+            await db.close()
     
     async def update_planet(self, planet_id: str, genome_data: Dict) -> str:
-        """Update an existing planet with new genome data"""
+        """Update an existing planet with new genome data (applied by an evolution worker)
+        
+        Updates arriving within coalesce_window of the first pending one are merged
+        and applied once; every caller waits on the same result.
+        """
+        if not self.active:
+            raise RuntimeError("Planet Builder is not running")
+        pending = self._pending.get(planet_id)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[planet_id] = (dict(genome_data), future)
+            loop.call_later(self.coalesce_window, self._release_pending, planet_id)
+        else:
+            merged, future = pending
+            _merge_genome(merged, genome_data)
+        # Shielded so one cancelled caller doesn't cancel the shared result
+        return await asyncio.shield(future)
+    
+    def _release_pending(self, planet_id: str):
+        """Queue a planet's coalesced update for the evolution workers"""
+        pending = self._pending.pop(planet_id, None)
+        if pending is None:
+            return
+        genome_data, future = pending
+        if not self._workers:
+            # No worker would ever pick it up; fail instead of leaving callers waiting
+            future.set_exception(RuntimeError("Planet Builder is not running"))
+            return
+        queued = self._queued.get(planet_id)
+        if queued is not None:
+            # The previous update hasn't started yet; apply both as one
+            _merge_genome(queued[0], genome_data)
+            queued[1].append(future)
+            return
+        self._queued[planet_id] = (genome_data, [future])
+        self._shards[hash(planet_id) % len(self._shards)].put_nowait(planet_id)
+    
+    async def _evolution_worker(self, shard: asyncio.Queue):
+        """Apply updates for this worker's planets one at a time until a None sentinel arrives"""
+        while True:
+            planet_id = await shard.get()
+            if planet_id is None:
+                break
+            
+            # Popped before applying: updates released meanwhile queue behind this one
+            genome_data, futures = self._queued.pop(planet_id)
+            try:
+                result = await self._apply_update(planet_id, genome_data)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future in futures:
+                    future.set_result(result)
+    
+    async def _apply_update(self, planet_id: str, genome_data: Dict) -> str:
+        """Write one genome update to the planet, its cache and the evolution event stream"""
         
-        db = SessionLocal()
+        # Only the recent events come from the cached payload (None when unavailable);
+        # the skills the deltas are computed from are read from the locked row below
         try:
-            planet = db.query(Planet).filter(Planet.id == planet_id).first()
-            if not planet:
+            cached_data = await self.redis.get(f"planet:{planet_id}")
+            events = orjson.loads(cached_data).get('events') if cached_data else None
+        except Exception as e:
+            logger.warning(f"Planet cache read failed for {planet_id}: {e}")
+            events = None
+        
+        db = self.Session()
+        try:
+            row = (await db.execute(_SELECT_PLANET, {"pid": planet_id})).one_or_none()
+            if row is None:
                 raise ValueError(f"Planet {planet_id} not found")
+            # Attribute view of the row, used to derive the new state without a refresh
+            planet = SimpleNamespace(**row._asdict())
             
             # Store previous state for evolution tracking
-            previous_state = {
-                'skills': {
-                    'algorithm': planet.algorithm_mastery,
-                    'web': planet.web_development_skill,
-                    'api': planet.api_design_discipline,
-                    'devops': planet.devops_maturity,
-                    'security': planet.security_awareness
-                },
-                'evolution_stage': planet.evolution_stage,
-                'evolution_points': planet.evolution_points
-            }
+            previous_state = self._planet_state(planet)
             
             # Update planet with new data
             skill_changes = self._calculate_skill_changes(planet, genome_data)
@@ -191,149 +434,172 @@ class PlanetBuilderAPI:
             # Update visual parameters if significant changes
             if sum(skill_changes.values()) > 5 or stage_changed:
                 planet.visual_params = self._generate_visual_params(genome_data)
+            planet.updated_at = datetime.utcnow()
             
-            db.commit()
-            db.refresh(planet)
+            await db.execute(_UPDATE_PLANET, {
+                "pid": planet.id,
+                **{f"b_{column}": genome_data.get(column, 0) for column in _SKILL_COLUMNS},
+                **{f"b_{column}": getattr(planet, column) for column in _SET_COLUMNS},
+                "b_points_earned": points_earned
+            })
+            await db.commit()
             
-            # Create evolution event
+            # Record the evolution event (inserted with the next event batch)
             if points_earned > 0:
-                evolution_event = EvolutionEvent(
-                    planet_id=planet.id,
-                    event_type="skill_evolution" if not stage_changed else "stage_evolution",
-                    description=self._generate_evolution_description(skill_changes, stage_changed, new_stage),
-                    metadata={
+                event_type = "skill_evolution" if not stage_changed else "stage_evolution"
+                description = self._generate_evolution_description(skill_changes, stage_changed, new_stage)
+                event = {
+                    # Assigned here so the cached summary and the batched row share it
+                    'id': uuid.uuid4(),
+                    'planet_id': planet.id,
+                    'event_type': event_type,
+                    'description': description,
+                    'metadata': {
                         'skill_changes': skill_changes,
                         'stage_changed': stage_changed,
                         'new_stage': new_stage,
-                        'genome_data': genome_data
+                        'genome_data': _compact_genome(genome_data)
                     },
-                    previous_state=previous_state,
-                    new_state={
-                        'skills': {
-                            'algorithm': planet.algorithm_mastery,
-                            'web': planet.web_development_skill,
-                            'api': planet.api_design_discipline,
-                            'devops': planet.devops_maturity,
-                            'security': planet.security_awareness
-                        },
-                        'evolution_stage': planet.evolution_stage,
-                        'evolution_points': planet.evolution_points
-                    },
-                    points_earned=points_earned
-                )
+                    'planet_type': genome_data.get('planet_type', planet.planet_type),
+                    'atmosphere': genome_data.get('atmosphere', planet.atmosphere),
+                    'previous_state': previous_state,
+                    'new_state': self._planet_state(planet),
+                    'points_earned': points_earned,
+                    'created_at': datetime.utcnow()
+                }
+                self.event_queue.put_nowait(event)
                 
-                db.add(evolution_event)
-                db.commit()
+                if events is not None:
+                    events = [self._event_to_dict(SimpleNamespace(**event))] + events[:RECENT_EVENTS - 1]
                 
-                # Publish evolution event
-                await self.redis.publish(
+                # Evolution notice, published in the same pipeline as the cache write
+                publish = (
                     f"planet_evolution:{planet.user_id}",
-                    json.dumps({
+                    orjson.dumps({
                         'planet_id': str(planet.id),
-                        'event_type': evolution_event.event_type,
-                        'description': evolution_event.description,
+                        'event_type': event_type,
+                        'description': description,
                         'points_earned': points_earned,
                         'new_stage': new_stage if stage_changed else None,
-                        'timestamp': datetime.utcnow().isoformat()
-                    })
+                        # Epoch milliseconds
+                        'timestamp': time.time_ns() // 1_000_000
+                    }, option=_ORJSON_OPTIONS)
                 )
+            else:
+                publish = None
             
-            # Update cache
-            await self._update_planet_cache(planet)
+            # Update cache before returning, so the caller's next read sees this update
+            await self._update_planet_cache(planet, events, publish)
             
             logger.info(f"🔄 Updated planet {planet.name} - earned {points_earned} points")
             
             return str(planet.id)
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Failed to update planet: {e}")
             raise
         finally:
-            db.close()
+            await db.close()
     
     async def get_planet_data(self, planet_id: str) -> Dict[str, Any]:
         """Get complete planet data for frontend"""
         
-        # Try cache first
+        # Try cache first (entries written before events were embedded count as misses)
         cached_data = await self.redis.get(f"planet:{planet_id}")
         if cached_data:
-            return json.loads(cached_data)
+            planet_data = orjson.loads(cached_data)
+            if 'events' in planet_data:
+                return planet_data
         
         # Fetch from database
-        db = SessionLocal()
-        try:
-            planet = db.query(Planet).filter(Planet.id == planet_id).first()
+        async with self.Session() as db:
+            planet = await _fetch_planet_with_events(db, planet_id)
             if not planet:
                 raise ValueError(f"Planet {planet_id} not found")
             
-            planet_data = {
-                'id': str(planet.id),
-                'user_id': str(planet.user_id),
-                'name': planet.name,
-                'type': planet.planet_type,
-                'visual_params': planet.visual_params,
-                'atmosphere': planet.atmosphere,
-                'terrain': planet.terrain,
-                'skills': {
-                    'algorithm': planet.algorithm_mastery,
-                    'web': planet.web_development_skill,
-                    'api': planet.api_design_discipline,
-                    'devops': planet.devops_maturity,
-                    'security': planet.security_awareness
-                },
-                'evolution': {
-                    'stage': planet.evolution_stage,
-                    'points': planet.evolution_points,
-                    'velocity': planet.learning_velocity,
-                    'exploration': planet.exploration_tendency
-                },
-                'personality': {
-                    'elegance': planet.code_elegance,
-                    'innovation': planet.innovation_drive,
-                    'collaboration': planet.collaboration_style,
-                    'problem_solving': planet.problem_solving_approach
-                },
-                'created_at': planet.created_at.isoformat(),
-                'updated_at': planet.updated_at.isoformat()
-            }
-            
-            # Cache the data
-            await self.redis.setex(
-                f"planet:{planet_id}",
-                3600,
-                json.dumps(planet_data)
-            )
-            
-            return planet_data
-            
-        finally:
-            db.close()
+            planet_data = self._planet_to_dict(planet)
+            recent = sorted(planet.evolution_events, key=lambda event: event.created_at, reverse=True)
+            planet_data['events'] = [self._event_to_dict(event) for event in recent[:RECENT_EVENTS]]
+        
+        # Cache the data (never over a newer write-through, see _cache_many)
+        self._queue_cache_write(planet_id, planet_data)
+        
+        return planet_data
     
-    def _generate_planet_name(self, genome_data: Dict) -> str:
-        """Generate unique planet name based on genome"""
-        planet_type = genome_data.get('planet_type', 'unknown')
-        atmosphere = genome_data.get('atmosphere', 'neutral')
+    async def get_planets_bulk(self, planet_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get planet data for many planets in a single query, keyed by planet id"""
+        if not planet_ids:
+            return {}
         
-        name_parts = {
-            'minimalist': ['Zen', 'Pure', 'Clean', 'Simple'],
-            'chaotic': ['Storm', 'Flux', 'Wild', 'Chaos'],
-            'structured': ['Order', 'Logic', 'System', 'Grid'],
-            'creative': ['Dream', 'Vision', 'Color', 'Art'],
-            'analytical': ['Mind', 'Data', 'Logic', 'Calc']
+        async with self.Session() as db:
+            planets = await _fetch_planets(db, planet_ids)
+        return {str(planet.id): self._planet_to_dict(planet) for planet in planets}
+    
+    def _planet_to_dict(self, planet: Planet) -> Dict[str, Any]:
+        """Full planet data with native datetimes (for direct response construction)"""
+        return {
+            'id': str(planet.id),
+            'user_id': str(planet.user_id),
+            'name': planet.name,
+            'type': planet.planet_type,
+            'visual_params': planet.visual_params,
+            'atmosphere': planet.atmosphere,
+            'terrain': planet.terrain,
+            'skills': {
+                'algorithm': planet.algorithm_mastery,
+                'web': planet.web_development_skill,
+                'api': planet.api_design_discipline,
+                'devops': planet.devops_maturity,
+                'security': planet.security_awareness
+            },
+            'evolution': {
+                'stage': planet.evolution_stage,
+                'points': planet.evolution_points,
+                'velocity': planet.learning_velocity,
+                'exploration': planet.exploration_tendency
+            },
+            'personality': {
+                'elegance': planet.code_elegance,
+                'innovation': planet.innovation_drive,
+                'collaboration': planet.collaboration_style,
+                'problem_solving': planet.problem_solving_approach
+            },
+            'created_at': planet.created_at,
+            'updated_at': planet.updated_at
         }
-        
-        suffixes = {
-            'calm': ['Prime', 'Core', 'Haven', 'Rest'],
-            'energetic': ['Burst', 'Rush', 'Spark', 'Blaze'],
-            'focused': ['Point', 'Beam', 'Lock', 'Sharp'],
-            'experimental': ['Lab', 'Test', 'Try', 'Explore']
+    
+    def _event_to_dict(self, event: EvolutionEvent) -> Dict[str, Any]:
+        """Evolution event summary embedded in the cached planet payload"""
+        return {
+            'id': str(event.id),
+            'event_type': event.event_type,
+            'description': event.description,
+            'points_earned': event.points_earned,
+            'created_at': event.created_at
         }
-        
-        prefix = name_parts.get(planet_type, ['Planet'])[hash(genome_data.get('user_id', '')) % 4]
-        suffix = suffixes.get(atmosphere, ['World'])[hash(str(genome_data.values())) % 4]
-        
-        return f"{prefix}{suffix}"
+    
+    def _planet_state(self, planet: Planet) -> Dict[str, Any]:
+        """Skill/evolution snapshot stored on evolution events"""
+        return {
+            'skills': {
+                'algorithm': planet.algorithm_mastery,
+                'web': planet.web_development_skill,
+                'api': planet.api_design_discipline,
+                'devops': planet.devops_maturity,
+                'security': planet.security_awareness
+            },
+            'evolution_stage': planet.evolution_stage,
+            'evolution_points': planet.evolution_points
+        }
+    
+    def _generate_planet_name(self, user_id: str, genome_data: Dict) -> str:
+        """Generate unique planet name based on the owner and genome"""
+        return _planet_name(
+            genome_data.get('planet_type', 'unknown'),
+            genome_data.get('atmosphere', 'neutral'),
+            str(user_id)
+        )
     
     def _generate_visual_params(self, genome_data: Dict) -> Dict[str, Any]:
         """Generate visual parameters for planet rendering"""
@@ -351,40 +617,19 @@ class PlanetBuilderAPI:
             'glow_intensity': genome_data.get('innovation_drive', 0.5) * 100
         }
     
-    def _get_color_palette(self, planet_type: str) -> List[str]:
+    def _get_color_palette(self, planet_type: str) -> Tuple[str, ...]:
         """Get color palette based on planet type"""
-        palettes = {
-            'minimalist': ['#2D3748', '#4A5568', '#718096'],
-            'chaotic': ['#E53E3E', '#DD6B20', '#D69E2E'],
-            'structured': ['#3182CE', '#2B6CB0', '#2C5282'],
-            'creative': ['#9F7AEA', '#805AD5', '#6B46C1'],
-            'analytical': ['#38A169', '#2F855A', '#276749']
-        }
-        return palettes.get(planet_type, ['#4A5568', '#718096', '#A0AEC0'])
+        return _COLOR_PALETTES.get(planet_type, _DEFAULT_PALETTE)
     
     def _get_special_effects(self, genome_data: Dict) -> List[str]:
         """Get special visual effects based on skills"""
-        effects = []
-        
-        if genome_data.get('algorithm_mastery', 0) > 80:
-            effects.append('algorithm_aurora')
-        if genome_data.get('web_development_skill', 0) > 80:
-            effects.append('web_constellation')
-        if genome_data.get('security_awareness', 0) > 70:
-            effects.append('security_shield')
-        if genome_data.get('innovation_drive', 0) > 80:
-            effects.append('innovation_nebula')
-            
-        return effects
+        return [effect for key, threshold, effect in _EFFECT_RULES if genome_data.get(key, 0) > threshold]
     
     def _calculate_skill_changes(self, planet: Planet, genome_data: Dict) -> Dict[str, float]:
         """Calculate changes in skill levels"""
         return {
-            'algorithm': max(0, genome_data.get('algorithm_mastery', 0) - planet.algorithm_mastery),
-            'web': max(0, genome_data.get('web_development_skill', 0) - planet.web_development_skill),
-            'api': max(0, genome_data.get('api_design_discipline', 0) - planet.api_design_discipline),
-            'devops': max(0, genome_data.get('devops_maturity', 0) - planet.devops_maturity),
-            'security': max(0, genome_data.get('security_awareness', 0) - planet.security_awareness)
+            name: max(0, genome_data.get(column, 0) - getattr(planet, column))
+            for name, column in zip(_SKILL_NAMES, _SKILL_COLUMNS)
         }
     
     def _calculate_evolution_stage(self, planet: Planet) -> str:
@@ -394,17 +639,7 @@ class PlanetBuilderAPI:
             planet.api_design_discipline + planet.devops_maturity +
             planet.security_awareness
         ) / 5
-        
-        if total_skill < 20:
-            return 'proto_planet'
-        elif total_skill < 40:
-            return 'rocky_planet'
-        elif total_skill < 60:
-            return 'terrestrial_planet'
-        elif total_skill < 80:
-            return 'gas_giant'
-        else:
-            return 'stellar_planet'
+        return _STAGE_TABLE[min(max(int(total_skill // 20), 0), len(_STAGE_TABLE) - 1)]
     
     def _calculate_evolution_points(self, skill_changes: Dict[str, float], stage_changed: bool) -> int:
         """Calculate evolution points earned"""
@@ -427,42 +662,107 @@ class PlanetBuilderAPI:
         
         return "Continued coding session"
     
-    async def _update_planet_cache(self, planet: Planet):
-        """Update planet cache with latest data"""
-        planet_data = {
-            'id': str(planet.id),
-            'name': planet.name,
-            'type': planet.planet_type,
-            'visual_params': planet.visual_params,
-            'skills': {
-                'algorithm': planet.algorithm_mastery,
-                'web': planet.web_development_skill,
-                'api': planet.api_design_discipline,
-                'devops': planet.devops_maturity,
-                'security': planet.security_awareness
-            },
-            'evolution': {
-                'stage': planet.evolution_stage,
-                'points': planet.evolution_points,
-                'velocity': planet.learning_velocity
-            }
-        }
-        
-        await self.redis.setex(
-            f"planet:{planet.id}",
-            3600,
-            json.dumps(planet_data)
-        )
+    async def _update_planet_cache(self, planet: Planet, events: Optional[List[Dict[str, Any]]],
+                                   publish: Optional[Tuple[str, bytes]] = None):
+        """Write the planet's full payload through to the cache.
+        Without its recent events the key is dropped instead, so the next read reloads them."""
+        planet_data = None
+        if events is not None:
+            planet_data = self._planet_to_dict(planet)
+            planet_data['events'] = events
+        await self._write_cache(str(planet.id), planet_data, publish)
     
-    async def _evolution_processor(self):
-        """Background task for processing evolution events"""
-        while self.active:
+    async def _write_cache(self, planet_id: str, payload: Optional[Dict[str, Any]],
+                           publish: Optional[Tuple[str, bytes]] = None):
+        """SETEX the payload (DEL the key if None) now, with an optional (channel, message) in the same pipeline"""
+        key = f"planet:{planet_id}"
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            if payload is None:
+                pipe.delete(key)
+            else:
+                pipe.setex(key, PLANET_CACHE_TTL, orjson.dumps(payload, option=_ORJSON_OPTIONS))
+            if publish is not None:
+                pipe.publish(*publish)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to write through {key}: {e}")
+            # Don't leave the previous payload readable for the rest of its TTL
             try:
-                # Process any pending evolution events
-                await asyncio.sleep(5)  # Check every 5 seconds
-                
-                # This could process more complex evolution logic
-                # like ecosystem interactions, achievement unlocks, etc.
-                
+                await self.redis.delete(key)
             except Exception as e:
-                logger.error(f"Evolution processor error: {e}")
\ No newline at end of file
+                logger.error(f"Failed to drop stale {key}: {e}")
+    
+    def _queue_cache_write(self, planet_id: str, payload: Dict[str, Any]):
+        """Buffer a read-path cache fill; the cache flusher sends it with the rest of its batch"""
+        self.cache_queue.put_nowait((planet_id, payload))
+    
+    async def _flusher(self, queue: asyncio.Queue, batch_size: int, window: float,
+                       write: Callable[[List[Any]], Awaitable[None]]):
+        """Group queued items into batches of up to batch_size for write, waiting at most window"""
+        loop = asyncio.get_running_loop()
+        batch: List[Any] = []
+        timer = None
+        
+        while True:
+            item = await queue.get()
+            
+            if item is None or item is _FLUSH:
+                if timer is not None:
+                    timer.cancel()
+                    timer = None
+                if batch:
+                    await write(batch)
+                    batch = []
+                if item is None:
+                    break
+                continue
+            
+            batch.append(item)
+            if len(batch) == 1:
+                timer = loop.call_later(window, queue.put_nowait, _FLUSH)
+            if len(batch) >= batch_size:
+                timer.cancel()
+                timer = None
+                await write(batch)
+                batch = []
+    
+    async def _cache_many(self, items: List[tuple]):
+        """Fill (planet_id, payload) items in one pipeline, falling back to one command at a time.
+        
+        Fills use SET NX: a payload read from the database before a concurrent update
+        must not overwrite the newer payload that update wrote through.
+        """
+        encoded = [
+            (f"planet:{planet_id}", orjson.dumps(payload, option=_ORJSON_OPTIONS))
+            for planet_id, payload in items
+        ]
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value in encoded:
+                pipe.set(key, value, ex=PLANET_CACHE_TTL, nx=True)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Pipelined planet cache fill failed, retrying sequentially: {e}")
+            for key, value in encoded:
+                try:
+                    await self.redis.set(key, value, ex=PLANET_CACHE_TTL, nx=True)
+                except Exception as e:
+                    logger.error(f"Failed to cache {key}: {e}")
+    
+    async def _insert_events(self, rows: List[Dict[str, Any]]):
+        """Insert a batch of evolution events in one executemany and one commit"""
+        try:
+            async with self.Session() as db:
+                await db.execute(insert(_EVOLUTION_EVENTS), rows)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to insert {len(rows)} evolution events: {e}")
+    
+    async def invalidate_many(self, planet_ids: List[str]):
+        """Drop cached payloads for many planets in one round trip"""
+        if not planet_ids:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(*(f"planet:{planet_id}" for planet_id in planet_ids))
+        await pipe.execute()
@@ -1,5 +1,7 @@
 import { useState, useEffect, useRef } from 'react';
 
+const textDecoder = new TextDecoder();
+
 export interface CodeMetrics {
   lines: number;
   functions: number;
@@ -48,8 +50,10 @@ export function useRealTimeAnalysis(userId: string) {
 
   const connectWebSocket = () => {
     try {
-      const wsUrl = `ws://localhost:8000/stream/ws/${userId}`;
+      // binary=1: the server sends JSON as UTF-8 binary frames, skipping a re-encode
+      const wsUrl = `ws://localhost:8000/stream/ws/${userId}?binary=1`;
       wsRef.current = new WebSocket(wsUrl);
+      wsRef.current.binaryType = 'arraybuffer';
 
       wsRef.current.onopen = () => {
         console.log('🔌 WebSocket connected');
@@ -59,20 +63,25 @@ export function useRealTimeAnalysis(userId: string) {
 
       wsRef.current.onmessage = (event) => {
         try {
-          const data = JSON.parse(event.data);
+          const text = typeof event.data === 'string' ? event.data : textDecoder.decode(event.data);
+          const frame = JSON.parse(text);
+          // Messages queued together server-side arrive as one batch frame
+          const messages = frame.type === 'batch' ? frame.items : [frame];
           
-          switch (data.type) {
-            case 'analysis_result':
-              setLatestAnalysis(data.data);
-              break;
-            case 'achievement':
-              setRecentAchievements(prev => [data.data, ...prev.slice(0, 4)]); // Keep last 5
-              break;
-            case 'session_stats':
-              setSessionStats(data.data);
-              break;
-            default:
-              console.log('📦 Received data:', data);
+          for (const data of messages) {
+            switch (data.type) {
+              case 'analysis_result':
+                setLatestAnalysis(data.data);
+                break;
+              case 'achievement':
+                setRecentAchievements(prev => [data.data, ...prev.slice(0, 4)]); // Keep last 5
+                break;
+              case 'session_stats':
+                setSessionStats(data.data);
+                break;
+              default:
+                console.log('📦 Received data:', data);
+            }
           }
         } catch (error) {
           console.error('❌ Failed to parse WebSocket message:', error);
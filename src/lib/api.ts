@@ -5,6 +5,7 @@
 
 const API_BASE_URL = 'http://localhost:8000/api';
 const WS_BASE_URL = 'ws://localhost:8000';
+const textDecoder = new TextDecoder();
 
 export interface User {
   id: string;
@@ -192,8 +193,10 @@ class PlanetForgeAPI {
       return;
     }
 
-    const wsUrl = `${this.wsUrl}/stream/ws/${userId}`;
+    // binary=1: the server sends JSON as UTF-8 binary frames, skipping a re-encode
+    const wsUrl = `${this.wsUrl}/stream/ws/${userId}?binary=1`;
     this.websocket = new WebSocket(wsUrl);
+    this.websocket.binaryType = 'arraybuffer';
 
     this.websocket.onopen = () => {
       console.log('🚀 Planet Forge WebSocket connected');
@@ -205,8 +208,14 @@ class PlanetForgeAPI {
 
     this.websocket.onmessage = (event) => {
       try {
-        const data = JSON.parse(event.data);
-        onMessage(data);
+        const text = typeof event.data === 'string' ? event.data : textDecoder.decode(event.data);
+        const data = JSON.parse(text);
+        // Messages queued together server-side arrive as one batch frame
+        if (data.type === 'batch') {
+          data.items.forEach(onMessage);
+        } else {
+          onMessage(data);
+        }
       } catch (error) {
         console.error('Error parsing WebSocket message:', error);
       }